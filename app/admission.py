@@ -0,0 +1,171 @@
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+
+class AdmissionRejectedError(Exception):
+    """
+    Raised when a request is shed because the wait queue of the admission controller is full or the wait timed out.
+    """
+
+    def __init__(self, reason: str, retry_after: float):
+        """
+        Initialize the error.
+        :param reason: Why the request was shed
+        :param retry_after: Seconds after which the caller should retry
+        """
+        super().__init__(
+            f"Server is overloaded: {reason}. Retry after {math.ceil(retry_after)} seconds."
+        )
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Adaptive limit on the number of concurrent logins to PESU Academy, with a bounded wait queue.
+    The limit follows AIMD: it grows by one for every limit's worth of calls that complete while the limit is in use,
+    and is cut by a constant factor when a call fails or takes much longer than the baseline latency. The baseline
+    tracks the lowest recent latency and slowly drifts up if the upstream gets slower for good.
+    Requests over the limit wait in a FIFO queue, and are shed once the queue is full or their wait times out.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 2,
+        max_limit: int = 200,
+        queue_size: int = 100,
+        queue_timeout: float = 5.0,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the admission controller.
+        :param initial_limit: Number of concurrent calls allowed at startup
+        :param min_limit: Lowest concurrency limit
+        :param max_limit: Highest concurrency limit
+        :param queue_size: Maximum number of requests waiting for a slot. Requests beyond it are shed immediately.
+        :param queue_timeout: Seconds a request waits for a slot before it is shed
+        :param latency_tolerance: Multiple of the baseline latency from which a call is a sign of congestion
+        :param backoff: Factor the limit is multiplied with on congestion
+        :param clock: Monotonic clock, in seconds
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.in_flight = 0
+        # Tickets of the waiting requests, in arrival order, so that slots are handed out first come, first served
+        self.next_ticket = 0
+        self.queue: list[int] = []
+        self.baseline: Optional[float] = None
+        self.last_decrease = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def retry_after(self) -> float:
+        # Slots free up about once per baseline latency, so ask shed clients to come back after that
+        return max(1.0, self.baseline or 1.0)
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Wait for a slot to call PESU Academy.
+        :param timeout: Seconds to wait at most, if shorter than the queue timeout, e.g. the rest of a deadline
+        :raises AdmissionRejectedError: If the wait queue is full or the wait timed out
+        """
+        with self.lock:
+            if self.in_flight < int(self.limit) and not self.queue:
+                self.in_flight += 1
+                self.admitted += 1
+                return
+            if len(self.queue) >= self.queue_size:
+                self.rejected += 1
+                raise AdmissionRejectedError("wait queue is full", self.retry_after())
+            ticket = self.next_ticket
+            self.next_ticket += 1
+            self.queue.append(ticket)
+            self.queued += 1
+            wait = (
+                self.queue_timeout
+                if timeout is None
+                else min(self.queue_timeout, timeout)
+            )
+            deadline = self.clock() + wait
+            while self.queue[0] != ticket or self.in_flight >= int(self.limit):
+                remaining = deadline - self.clock()
+                if remaining <= 0 or not self.condition.wait(remaining):
+                    if self.queue[0] == ticket and self.in_flight < int(self.limit):
+                        break
+                    self.queue.remove(ticket)
+                    self.timed_out += 1
+                    # The next request may now be at the head of the queue
+                    self.condition.notify_all()
+                    raise AdmissionRejectedError(
+                        "timed out waiting for a slot", self.retry_after()
+                    )
+            self.queue.pop(0)
+            self.in_flight += 1
+            self.admitted += 1
+            self.condition.notify_all()
+
+    def release(self, latency: float, failed: bool = False, dropped: bool = False):
+        """
+        Free the slot of a completed call and adapt the limit to its outcome.
+        :param latency: Duration of the call in seconds
+        :param failed: Whether the call failed because of PESU Academy
+        :param dropped: Whether the call never reached PESU Academy, in which case its latency says nothing about it
+        """
+        with self.lock:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            if not dropped:
+                self.adapt(latency, failed, saturated)
+            self.condition.notify_all()
+
+    def adapt(self, latency: float, failed: bool, saturated: bool):
+        """
+        Adapt the limit to the outcome of a call. Must be called with the lock held.
+        :param latency: Duration of the call in seconds
+        :param failed: Whether the call failed because of PESU Academy
+        :param saturated: Whether all slots were in use when the call completed
+        """
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        else:
+            self.baseline += (latency - self.baseline) * 0.01
+        now = self.clock()
+        if failed or latency > self.latency_tolerance * self.baseline:
+            # Decrease at most once per baseline latency, so that a burst of slow calls that were all in flight at the
+            # same time counts as one congestion signal
+            if now - self.last_decrease >= self.baseline:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease = now
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the admission counters.
+        :return: The current limit, the number of calls in flight and waiting, and the number of requests admitted,
+            queued, rejected because the queue was full and shed because their wait timed out
+        """
+        with self.lock:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "waiting": len(self.queue),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
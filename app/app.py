@@ -1,37 +1,326 @@
 import argparse
+import contextlib
 import datetime
 import json
 import logging
-import os
+import math
 import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import gh_md_to_html
-from typing import Optional
-import pytz
-from flasgger import Swagger
-from flask import Flask, request
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+from flask import Flask, Response, request
 
+from app import metrics
+from app.admission import AdmissionController, AdmissionRejectedError
+from app.cache import AuthenticationCache, CredentialHasher
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.constants import PESUAcademyConstants
+from app.deadline import Deadline, DeadlineExceededError
+from app.fetch_plan import plan_profile_fetch
+from app.logging_config import parse_sample_rates, setup_logging
+from app.metrics import AuthenticationMetrics, PhaseTimer, render_stats
 from app.pesu import PESUAcademy
+from app.precompressed import PrecompressedContent, PrecompressedFiles
+from app.rate_limit import RateLimitedError, TokenBucketLimiter
+from app.server import run_gunicorn
+from app.singleflight import SingleFlight
 
-IST = pytz.timezone("Asia/Kolkata")
+if TYPE_CHECKING:
+    from flasgger import Swagger
+
+logger = logging.getLogger(__name__)
+# India does not observe daylight saving time, so a fixed offset avoids loading a timezone database
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30), "IST")
 app = Flask(__name__)
 pesu_academy = PESUAcademy()
+credential_hasher = CredentialHasher()
+# Cache of successful authentication results. Disabled unless enabled from the command line.
+authentication_cache: Optional[AuthenticationCache] = None
+# Concurrent identical authentication requests share a single upstream login
+single_flight = SingleFlight()
+# Adaptive limit on concurrent upstream logins. Disabled unless enabled from the command line.
+admission_controller: Optional[AdmissionController] = None
+# Token buckets per client and per username. Disabled unless enabled from the command line.
+client_rate_limiter: Optional[TokenBucketLimiter] = None
+username_rate_limiter: Optional[TokenBucketLimiter] = None
+# API keys that identify a client for rate limiting in place of its address. Unknown keys are ignored, so that a client
+# cannot get a fresh bucket by sending a new key.
+api_keys: frozenset[str] = frozenset()
+authentication_metrics = AuthenticationMetrics()
+# Time budget of a request when the caller does not set one, and the longest budget a caller can set, in seconds
+default_deadline = 10.0
+max_deadline = 30.0
+# Maximum number of logins of a batch that run at the same time, and maximum number of credentials in a batch
+batch_concurrency = 8
+batch_max_size = 500
+# README rendered to HTML, kept in memory once rendered
+readme_content: Optional[PrecompressedContent] = None
+readme_lock = threading.Lock()
+# The README only changes on deployment. Clients revalidate with the ETag after this long.
+README_CACHE_CONTROL = "public, max-age=300"
+DOCS_CACHE_CONTROL = "public, max-age=300"
+# The Swagger UI assets only change when flasgger is upgraded
+DOCS_STATIC_CACHE_CONTROL = "public, max-age=86400"
 
 
-def convert_readme_to_html():
+def convert_readme_to_html() -> str:
     """
-    Convert the README.md file to HTML and save it as README.html so that it can be rendered on the home page.
+    Convert the README.md file to HTML so that it can be rendered on the home page.
+    The conversion runs in a temporary directory, so no intermediate files are left in the working directory.
+    :return: The rendered HTML
     """
-    logging.info("Beginning conversion of README.md to HTML...")
-    readme_content = open("README.md").read().strip()
+    # Imported here, since it is slow to import and only needed to render the README
+    import gh_md_to_html
+
+    logger.info("Beginning conversion of README.md to HTML...")
+    with open("README.md") as f:
+        readme_content = f.read().strip()
     readme_content = re.sub(r":\w+: ", "", readme_content)
-    with open("README_tmp.md", "w") as f:
-        f.write(readme_content)
-    html = gh_md_to_html.main("README_tmp.md").strip()
-    with open("README.html", "w") as f:
-        f.write(html)
-    logging.info("README.md converted to HTML successfully.")
+    with tempfile.TemporaryDirectory() as directory:
+        html = gh_md_to_html.main(
+            readme_content,
+            origin_type="string",
+            website_root=directory,
+            enable_image_downloading=False,
+            enable_css_saving=False,
+        ).strip()
+    logger.info("README.md converted to HTML successfully.")
+    return html
+
+
+def load_readme() -> PrecompressedContent:
+    """
+    Render the README once and keep it in memory with its compressed variants.
+    Call this at startup, so that forked workers inherit the rendered README.
+    :return: The rendered README
+    """
+    global readme_content
+    with readme_lock:
+        if readme_content is None:
+            html = convert_readme_to_html()
+            readme_content = PrecompressedContent.create(
+                html.encode(), "text/html; charset=utf-8"
+            )
+        return readme_content
+
+
+def setup_swagger(flask_app: Flask) -> "Swagger":
+    """
+    Mount the Swagger UI and the API specification on the Flask app.
+    Call this once all routes are registered. The specification is generated once and frozen, and it and the static
+    assets of the Swagger UI are served from memory with ETags and compressed variants.
+    :param flask_app: The Flask app to document
+    :return: The Swagger extension instance
+    """
+    swagger_config = {
+        "headers": [],
+        "specs": [
+            {
+                "endpoint": "v1",
+                "route": "/v1.json",
+                "rule_filter": lambda rule: True,
+                "model_filter": lambda tag: True,
+            }
+        ],
+        "static_url_path": "/flasgger_static",
+        "swagger_ui": True,
+        "specs_route": "/",
+    }
+    # TODO: Add version to the API
+    # TODO: Set host dynamically based on the machine's IP address or domain name
+    swagger_template = {
+        "swagger": "2.0",
+        "info": {
+            "title": "PESU Auth API",
+            "description": "A simple API to authenticate PESU credentials using PESU Academy",
+            # "version": "1.0.0"
+        },
+        # "host": "localhost:5000",
+        "basePath": "/",
+        "schemes": ["https", "http"],
+    }
+    # Imported here, since it is slow to import and not needed on nodes started with --no-docs
+    from flasgger import Swagger
+
+    swagger = Swagger(flask_app, config=swagger_config, template=swagger_template)
+
+    # The spec only depends on the registered routes, so it is generated once and served from memory
+    with flask_app.test_request_context():
+        spec = swagger.get_apispecs(endpoint="v1")
+    spec_content = PrecompressedContent.create(
+        flask_app.json.dumps(spec).encode(), "application/json"
+    )
+    flask_app.view_functions["flasgger.v1"] = lambda: spec_content.response(
+        request, cache_control=DOCS_CACHE_CONTROL
+    )
+    static_files = PrecompressedFiles(
+        flask_app.blueprints["flasgger"].static_folder,
+        cache_control=DOCS_STATIC_CACHE_CONTROL,
+    )
+    flask_app.view_functions["flasgger.static"] = static_files.view
+    return swagger
+
+
+def create_circuit_breaker(args: argparse.Namespace) -> Optional[CircuitBreaker]:
+    """
+    Create the circuit breaker around PESU Academy from the command line arguments.
+    :param args: The parsed command line arguments
+    :return: The circuit breaker, or None if it is disabled
+    """
+    if not args.circuit_breaker:
+        return None
+    return CircuitBreaker(
+        failure_rate=args.circuit_failure_rate,
+        slow_call_seconds=args.circuit_slow_call_seconds,
+        open_seconds=args.circuit_open_seconds,
+    )
+
+
+def create_admission_controller(
+    args: argparse.Namespace,
+) -> Optional[AdmissionController]:
+    """
+    Create the admission controller of upstream logins from the command line arguments.
+    :param args: The parsed command line arguments
+    :return: The admission controller, or None if it is disabled
+    """
+    if not args.admission_control:
+        return None
+    return AdmissionController(
+        initial_limit=args.admission_initial_limit,
+        max_limit=args.admission_max_limit,
+        queue_size=args.admission_queue_size,
+        queue_timeout=args.admission_queue_timeout,
+    )
+
+
+def create_rate_limiters(
+    args: argparse.Namespace,
+) -> tuple[Optional[TokenBucketLimiter], Optional[TokenBucketLimiter]]:
+    """
+    Create the per-client and per-username rate limiters from the command line arguments.
+    :param args: The parsed command line arguments
+    :return: The client and username rate limiters, each None if disabled
+    """
+    limiters = []
+    for rate, burst in (
+        (args.client_rate_limit, args.client_burst),
+        (args.username_rate_limit, args.username_burst),
+    ):
+        limiters.append(
+            TokenBucketLimiter(
+                rate=rate / 60, burst=burst, max_keys=args.rate_limit_max_keys
+            )
+            if rate > 0
+            else None
+        )
+    return limiters[0], limiters[1]
+
+
+def client_key(api_key: Optional[str], address: Optional[str]) -> str:
+    """
+    Identify the client of a request for rate limiting.
+    :param api_key: The X-API-Key header of the request
+    :param address: The address of the client
+    :return: The API key if it is a known one, otherwise the address of the client
+    """
+    if api_key is not None and api_key in api_keys:
+        return f"key:{api_key}"
+    return f"ip:{address}"
+
+
+def check_rate_limits(client: str, username: Optional[str]):
+    """
+    Take a token from the buckets of the client and of the username, if rate limiting is enabled.
+    :param client: The client key, as returned by client_key()
+    :param username: The username the client is logging in with, or None if the request does not log in
+    :raises RateLimitedError: If either bucket is empty
+    """
+    if client_rate_limiter is not None:
+        if retry_after := client_rate_limiter.acquire(client):
+            raise RateLimitedError("client", retry_after)
+    if username_rate_limiter is not None and username is not None:
+        if retry_after := username_rate_limiter.acquire(username.lower()):
+            raise RateLimitedError("username", retry_after)
+
+
+def create_deadline(body_timeout: Any, header_timeout: Optional[str]) -> Deadline:
+    """
+    Start the end-to-end deadline of a request.
+    The caller sets its time budget in seconds with the timeout field of the request body or the X-Request-Timeout
+    header. The shorter of the two applies, capped at the maximum deadline of the server.
+    :param body_timeout: The timeout field of the request body
+    :param header_timeout: The X-Request-Timeout header of the request
+    :return: The deadline
+    :raises AssertionError: If a timeout is not a positive number
+    """
+    seconds = max_deadline
+    if body_timeout is not None:
+        assert (
+            isinstance(body_timeout, (int, float))
+            and not isinstance(body_timeout, bool)
+            and body_timeout > 0
+        ), "Timeout should be a positive number of seconds."
+        seconds = min(seconds, body_timeout)
+    if header_timeout is not None:
+        try:
+            header_seconds = float(header_timeout)
+        except ValueError:
+            header_seconds = 0.0
+        assert 0 < header_seconds < math.inf, (
+            "X-Request-Timeout should be a positive number of seconds."
+        )
+        seconds = min(seconds, header_seconds)
+    if body_timeout is None and header_timeout is None:
+        seconds = min(seconds, default_deadline)
+    return Deadline(seconds)
+
+
+@contextlib.contextmanager
+def admit_login(
+    timer: PhaseTimer, deadline: Optional[Deadline] = None
+) -> Iterator[None]:
+    """
+    Hold a slot of the admission controller for the duration of an upstream login, if admission control is enabled.
+    Logins that fail or never reach PESU Academy tell the controller about the health of the upstream, like for the
+    circuit breaker.
+    :param timer: Timings of the request. The wait for a slot is recorded as the queue phase.
+    :param deadline: Deadline of the request, which also bounds the wait for a slot
+    :raises AdmissionRejectedError: If the request is shed
+    :raises DeadlineExceededError: If the deadline has already run out, which is a timeout rather than load shedding
+    """
+    controller = admission_controller
+    if controller is None:
+        yield
+        return
+    if deadline is not None and deadline.expired():
+        timer.finish(metrics.DEADLINE_EXCEEDED)
+        raise DeadlineExceededError(deadline.seconds)
+    start = time.perf_counter()
+    try:
+        controller.acquire(deadline.remaining() if deadline is not None else None)
+    except AdmissionRejectedError:
+        timer.record(metrics.QUEUE, start)
+        timer.finish(metrics.LOAD_SHED)
+        raise
+    timer.record(metrics.QUEUE, start)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        controller.release(
+            time.perf_counter() - start,
+            failed=timer.outcome
+            not in (
+                metrics.SUCCESS,
+                metrics.INVALID_CREDENTIALS,
+                metrics.DEADLINE_EXCEEDED,
+            ),
+            dropped=timer.outcome == metrics.CIRCUIT_OPEN,
+        )
 
 
 def validate_input(
@@ -39,6 +328,8 @@ def validate_input(
     password: str,
     profile: bool,
     fields: Optional[list[str]],
+    bypass_cache: bool = False,
+    session: bool = False,
 ):
     """
     Validate the input provided by the user.
@@ -46,15 +337,35 @@ def validate_input(
     :param password: str: The password of the user.
     :param profile: bool: Whether to fetch the profile details of the user.
     :param fields: dict: The fields to fetch from the user's profile.
+    :param bypass_cache: bool: Whether to skip the authentication cache.
+    :param session: bool: Whether to keep the session and return a session token.
     """
-    logging.info(
-        f"Validating input: user={username}, password={'*****' if password else None}, profile={profile}, fields={fields}"
+    logger.info(
+        "Validating input: user=%s, password=%s, profile=%s, fields=%s",
+        username,
+        "*****" if password else None,
+        profile,
+        fields,
     )
     assert username is not None, "Username not provided."
     assert isinstance(username, str), "Username should be a string."
     assert password is not None, "Password not provided."
     assert isinstance(password, str), "Password should be a string."
     assert isinstance(profile, bool), "Profile should be a boolean."
+    assert isinstance(bypass_cache, bool), "Bypass cache should be a boolean."
+    assert isinstance(session, bool), "Session should be a boolean."
+    assert not session or pesu_academy.session_store is not None, (
+        "Session tokens are not enabled on this server."
+    )
+    validate_fields(fields)
+    logger.info("Input validation successful. All parameters are valid.")
+
+
+def validate_fields(fields: Optional[list[str]]):
+    """
+    Validate the profile fields requested by the user.
+    :param fields: list: The fields to fetch from the user's profile.
+    """
     assert fields is None or (isinstance(fields, list) and fields), (
         "Fields should be a non-empty list or None."
     )
@@ -65,7 +376,115 @@ def validate_input(
             ), (
                 f"Invalid field: '{field}'. Valid fields are: {PESUAcademyConstants.DEFAULT_FIELDS}."
             )
-    logging.info("Input validation successful. All parameters are valid.")
+
+
+def project_result(
+    result: dict[str, Any], profile: bool, fields: Optional[list[str]]
+) -> dict[str, Any]:
+    """
+    Shape a full authentication result to what the caller asked for.
+    :param result: The authentication result, with the complete profile if it was fetched
+    :param profile: Whether the caller asked for the profile information
+    :param fields: The profile fields the caller asked for. All fields are returned if not provided.
+    :return: The authentication result for the caller
+    """
+    if not profile:
+        result.pop("profile", None)
+    elif (
+        "profile" in result
+        and fields is not None
+        and fields != PESUAcademyConstants.DEFAULT_FIELDS
+    ):
+        result["profile"] = PESUAcademy.filter_profile_fields(result["profile"], fields)
+    return result
+
+
+def upstream_fields(
+    username: str, profile: bool, fields: Optional[list[str]]
+) -> Optional[list[str]]:
+    """
+    Get the profile fields to fetch from PESU Academy for a request.
+    Cached results must carry the complete profile to serve every field projection, so the requested fields only decide
+    which pages are fetched when the authentication cache is disabled. The fields are widened to everything the planned
+    pages produce, so that concurrent requests that need the same pages can share one login.
+    :param username: Username of the user
+    :param profile: Whether the caller asked for the profile information
+    :param fields: The profile fields the caller asked for
+    :return: The fields to fetch, or None to fetch the complete profile
+    """
+    if authentication_cache is not None or not profile or fields is None:
+        return None
+    planned = plan_profile_fetch(username, fields).fields()
+    return None if planned == PESUAcademyConstants.DEFAULT_FIELDS else planned
+
+
+def authenticate_user(
+    username: str,
+    password: str,
+    profile: bool,
+    fields: Optional[list[str]],
+    bypass_cache: bool = False,
+    timer: Optional[PhaseTimer] = None,
+    deadline: Optional[Deadline] = None,
+    session: bool = False,
+) -> dict[str, Any]:
+    """
+    Authenticate the user with PESU Academy, serving successful results from the cache when it is enabled.
+    Concurrent requests with the same credentials and flags wait on one upstream login and share its result.
+    :param username: Username of the user
+    :param password: Password of the user
+    :param profile: Whether to fetch the profile information or not
+    :param fields: The fields to fetch from the profile. Defaults to all fields if not provided.
+    :param bypass_cache: Whether to skip the cache and always authenticate with PESU Academy
+    :param timer: Timings of the request. Only the request that performs the upstream login records phases in it.
+    :param deadline: End-to-end deadline of the request. Coalesced callers share the deadline of the first caller.
+    :param session: Whether to keep the logged in session and return a token for it. Always logs in with PESU Academy.
+    :return: The authentication result
+    :raises DeadlineExceededError: If the deadline ran out before the login completed
+    """
+    timer = PhaseTimer() if timer is None else timer
+    key = credential_hasher.hash(username, password)
+    if authentication_cache is not None and not bypass_cache and not session:
+        if (result := authentication_cache.get(key, profile)) is not None:
+            logger.info("Serving cached authentication result for user=%s.", username)
+            return project_result(result, profile, fields)
+
+    fetch_fields = upstream_fields(username, profile, fields)
+
+    def login() -> dict[str, Any]:
+        # Only the caller that performs the upstream login records its outcome, so coalesced callers are not counted
+        try:
+            with admit_login(timer, deadline):
+                return pesu_academy.authenticate(
+                    username,
+                    password,
+                    profile,
+                    fetch_fields,
+                    timer=timer,
+                    deadline=deadline,
+                    keep_session=session,
+                )
+        except Exception:
+            if timer.outcome is None:
+                timer.finish(metrics.UPSTREAM_ERROR)
+            raise
+        finally:
+            authentication_metrics.observe(timer)
+
+    # Only callers that need the same upstream pages can share a login
+    flight_fields = None if fetch_fields is None else tuple(fetch_fields)
+    result = single_flight.do((key, profile, session, flight_fields), login)
+    if authentication_cache is not None:
+        # Session tokens are handed out once, never from the cache
+        authentication_cache.set(
+            key,
+            {
+                name: value
+                for name, value in result.items()
+                if name not in ("session_token", "session_expires_in")
+            },
+        )
+    return project_result(result, profile, fields)
 
 
 @app.route("/readme")
@@ -80,20 +499,17 @@ def readme():
     responses:
       200:
         description: Successfully rendered README.md content
+      304:
+        description: README.md has not changed since the version identified by If-None-Match
       500:
         description: Internal server error while retrieving README.md
     """
     try:
-        if "README.html" not in os.listdir():
-            logging.info("README.html does not exist. Beginning conversion...")
-            convert_readme_to_html()
-        logging.info("Rendering README.html...")
-        with open("README.html") as f:
-            output = f.read()
-            return output, 200, {"Content-Type": "text/html"}
+        content = load_readme()
     except Exception:
-        logging.exception("Error rendering home page.")
+        logger.exception("Error rendering home page.")
         return "Error occurred while retrieving home page", 500
+    return content.response(request, cache_control=README_CACHE_CONTROL)
 
 
 @app.route("/authenticate", methods=["POST"])
@@ -108,6 +524,16 @@ def authenticate():
     produces:
       - application/json
     parameters:
+      - in: header
+        name: X-API-Key
+        type: string
+        required: false
+        description: API key that identifies the client for rate limiting. Only keys the server was started with are used.
+      - in: header
+        name: X-Request-Timeout
+        type: number
+        required: false
+        description: Seconds the caller is willing to wait, if the timeout field of the body is not used
       - in: body
         name: credentials
         required: true
@@ -149,6 +575,18 @@ def authenticate():
                   - campus_code
                   - campus
               example: ["name", "prn", "branch", "branch_short_code", "campus"]
+            bypass_cache:
+              type: boolean
+              description: Whether to skip the authentication cache and always authenticate with PESU Academy
+              default: false
+            timeout:
+              type: number
+              description: Seconds the caller is willing to wait. Defaults to the deadline of the server.
+              example: 5
+            session:
+              type: boolean
+              description: Whether to keep the logged in session and return a session_token for the /profile endpoint
+              default: false
     responses:
       200:
         description: Authentication successful
@@ -161,6 +599,12 @@ def authenticate():
             message:
               type: string
               example: Login successful.
+            session_token:
+              type: string
+              description: Opaque token of the logged in session, if session was requested
+            session_expires_in:
+              type: integer
+              description: Seconds for which the session token can be used
             timestamp:
               type: string
               format: date-time
@@ -220,6 +664,20 @@ def authenticate():
             timestamp:
               type: string
               format: date-time
+      429:
+        description: Too many logins from this client or with this username. Retry after the number of seconds in the Retry-After header.
+        schema:
+          type: object
+          properties:
+            status:
+              type: boolean
+              example: false
+            message:
+              type: string
+              example: Too many requests for this client. Retry after 3 seconds.
+            timestamp:
+              type: string
+              format: date-time
       500:
         description: Internal server error
         schema:
@@ -231,20 +689,54 @@ def authenticate():
             message:
               type: string
               example: Error authenticating user
+      504:
+        description: PESU Academy did not respond within the deadline of the request
+        schema:
+          type: object
+          properties:
+            status:
+              type: boolean
+              example: false
+            message:
+              type: string
+              example: PESU Academy did not respond within the deadline of 10 seconds.
+            timestamp:
+              type: string
+              format: date-time
+      503:
+        description: PESU Academy is degraded and calls to it fail fast, or the server is overloaded and shed the request. Retry after the number of seconds in the Retry-After header.
+        schema:
+          type: object
+          properties:
+            status:
+              type: boolean
+              example: false
+            message:
+              type: string
+              example: PESU Academy is unavailable. Retry after 30 seconds.
+            timestamp:
+              type: string
+              format: date-time
     """
     # Extract the input provided by the user
     current_time = datetime.datetime.now(IST)
+    timer = PhaseTimer()
     username = request.json.get("username")
     password = request.json.get("password")
     profile = request.json.get("profile", False)
     fields = request.json.get("fields")
+    bypass_cache = request.json.get("bypass_cache", False)
+    session = request.json.get("session", False)
 
     # Validate the input provided by the user
     try:
-        logging.info("Received authentication request. Beginning input validation...")
-        validate_input(username, password, profile, fields)
+        logger.info("Received authentication request. Beginning input validation...")
+        validate_input(username, password, profile, fields, bypass_cache, session)
+        deadline = create_deadline(
+            request.json.get("timeout"), request.headers.get("X-Request-Timeout")
+        )
     except Exception as e:
-        logging.exception("Could not validate request data.")
+        logger.exception("Could not validate request data.")
         return (
             json.dumps(
                 {
@@ -259,27 +751,501 @@ def authenticate():
 
     # Authenticate the user
     try:
-        logging.info(f"Authenticating user={username} with PESU Academy...")
-        authentication_result = pesu_academy.authenticate(
-            username, password, profile, fields
+        check_rate_limits(
+            client_key(request.headers.get("X-API-Key"), request.remote_addr), username
+        )
+        logger.info("Authenticating user=%s with PESU Academy...", username)
+        authentication_result = authenticate_user(
+            username, password, profile, fields, bypass_cache, timer, deadline, session
         )
         authentication_result["timestamp"] = str(current_time)
-        logging.info(
-            f"Returning auth result for user={username}: {authentication_result}"
+        logger.info(
+            "Returning auth result for user=%s: status=%s",
+            username,
+            authentication_result["status"],
         )
+        logger.debug("Auth result for user=%s: %s", username, authentication_result)
         return (
             json.dumps(authentication_result),
             200,
-            {"Content-Type": "application/json"},
+            {
+                "Content-Type": "application/json",
+                "Server-Timing": timer.server_timing(),
+            },
+        )
+    except (CircuitOpenError, AdmissionRejectedError, RateLimitedError) as e:
+        return (
+            json.dumps(
+                {"status": False, "message": str(e), "timestamp": str(current_time)}
+            ),
+            429 if isinstance(e, RateLimitedError) else 503,
+            {
+                "Content-Type": "application/json",
+                "Retry-After": str(math.ceil(e.retry_after)),
+                "Server-Timing": timer.server_timing(),
+            },
+        )
+    except DeadlineExceededError as e:
+        return (
+            json.dumps(
+                {"status": False, "message": str(e), "timestamp": str(current_time)}
+            ),
+            504,
+            {
+                "Content-Type": "application/json",
+                "Server-Timing": timer.server_timing(),
+            },
         )
     except Exception as e:
-        logging.exception(f"Error authenticating user={username}.")
+        logger.exception("Error authenticating user=%s.", username)
         return (
             json.dumps({"status": False, "message": f"Error authenticating user: {e}"}),
             500,
+            {
+                "Content-Type": "application/json",
+                "Server-Timing": timer.server_timing(),
+            },
+        )
+
+
+def authenticate_batch_item(
+    index: int,
+    item: Any,
+    current_time: datetime.datetime,
+    client: str,
+    timeout: Optional[float] = None,
+) -> dict[str, Any]:
+    """
+    Validate and authenticate one set of credentials of a batch.
+    :param index: Position of the credentials in the batch
+    :param item: The credentials object, with the same keys as the /authenticate request body
+    :param current_time: Time at which the batch was received
+    :param client: The client key of the batch request, which every set of credentials is rate limited against
+    :param timeout: Time budget of the login in seconds, started when the login starts rather than when the batch was
+        received, so that the time spent waiting for a worker is not counted against it. No deadline if None.
+    :return: The authentication result, tagged with its index
+    """
+    try:
+        assert isinstance(item, dict), "Credentials should be a JSON object."
+        username = item.get("username")
+        password = item.get("password")
+        profile = item.get("profile", False)
+        fields = item.get("fields")
+        bypass_cache = item.get("bypass_cache", False)
+        session = item.get("session", False)
+        validate_input(username, password, profile, fields, bypass_cache, session)
+    except Exception as e:
+        logger.exception("Could not validate batch item %d.", index)
+        return {
+            "index": index,
+            "status": False,
+            "message": f"Could not validate request data: {e}",
+            "timestamp": str(current_time),
+        }
+
+    deadline = None if timeout is None else Deadline(timeout)
+    try:
+        check_rate_limits(client, username)
+        authentication_result = authenticate_user(
+            username,
+            password,
+            profile,
+            fields,
+            bypass_cache,
+            deadline=deadline,
+            session=session,
+        )
+    except (CircuitOpenError, AdmissionRejectedError, RateLimitedError) as e:
+        return {
+            "index": index,
+            "status": False,
+            "message": str(e),
+            "retry_after": math.ceil(e.retry_after),
+            "timestamp": str(current_time),
+        }
+    except DeadlineExceededError as e:
+        return {
+            "index": index,
+            "status": False,
+            "message": str(e),
+            "timestamp": str(current_time),
+        }
+    except Exception as e:
+        logger.exception("Error authenticating batch item %d.", index)
+        return {
+            "index": index,
+            "status": False,
+            "message": f"Error authenticating user: {e}",
+            "timestamp": str(current_time),
+        }
+    authentication_result["timestamp"] = str(current_time)
+    return {"index": index, **authentication_result}
+
+
+@app.route("/authenticate/batch", methods=["POST"])
+def authenticate_batch():
+    """
+    Authenticate a batch of users with their PESU credentials using PESU Academy.
+    Results are streamed back as newline-delimited JSON in the order the logins complete, each tagged with the index
+    of its credentials in the request.
+    ---
+    tags:
+      - Authentication
+    consumes:
+      - application/json
+    produces:
+      - application/x-ndjson
+    parameters:
+      - in: header
+        name: X-API-Key
+        type: string
+        required: false
+        description: API key that identifies the client for rate limiting. Only keys the server was started with are used.
+      - in: header
+        name: X-Request-Timeout
+        type: number
+        required: false
+        description: Seconds the caller is willing to wait, if the timeout field of the body is not used
+      - in: body
+        name: batch
+        required: true
+        description: List of PESU login credentials, each with the same keys as the /authenticate request body
+        schema:
+          type: object
+          required:
+            - credentials
+          properties:
+            credentials:
+              type: array
+              items:
+                type: object
+                required:
+                  - username
+                  - password
+                properties:
+                  username:
+                    type: string
+                    example: PES1UG20CS123
+                  password:
+                    type: string
+                    example: yourpassword
+                  profile:
+                    type: boolean
+                    default: false
+                  fields:
+                    type: array
+                    items:
+                      type: string
+                  bypass_cache:
+                    type: boolean
+                    default: false
+                  session:
+                    type: boolean
+                    default: false
+            timeout:
+              type: number
+              description: Seconds each login of the batch may take, counted from when the login starts. Defaults to the deadline of the server.
+    responses:
+      200:
+        description: One JSON authentication result per line, with an index field, in completion order
+      400:
+        description: Invalid batch
+    """
+    current_time = datetime.datetime.now(IST)
+    try:
+        payload = request.get_json(silent=True)
+        assert isinstance(payload, dict), "Request body should be a JSON object."
+        credentials = payload.get("credentials")
+        assert isinstance(credentials, list) and credentials, (
+            "Credentials should be a non-empty list."
+        )
+        assert len(credentials) <= batch_max_size, (
+            f"A batch can have at most {batch_max_size} credentials."
+        )
+        deadline = create_deadline(
+            payload.get("timeout"), request.headers.get("X-Request-Timeout")
+        )
+    except Exception as e:
+        logger.exception("Could not validate batch request data.")
+        return (
+            json.dumps(
+                {
+                    "status": False,
+                    "message": f"Could not validate request data: {e}",
+                    "timestamp": str(current_time),
+                }
+            ),
+            400,
             {"Content-Type": "application/json"},
         )
 
+    logger.info("Received batch of %d authentication requests.", len(credentials))
+    client = client_key(request.headers.get("X-API-Key"), request.remote_addr)
+
+    def stream():
+        executor = ThreadPoolExecutor(
+            max_workers=min(batch_concurrency, len(credentials)),
+            thread_name_prefix="authenticate-batch",
+        )
+        try:
+            futures = [
+                executor.submit(
+                    authenticate_batch_item,
+                    index,
+                    item,
+                    current_time,
+                    client,
+                    deadline.seconds,
+                )
+                for index, item in enumerate(credentials)
+            ]
+            for future in as_completed(futures):
+                yield json.dumps(future.result()) + "\n"
+        finally:
+            # Drop the logins that have not started if the client goes away
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return Response(stream(), 200, mimetype="application/x-ndjson")
+
+
+@app.route("/profile", methods=["POST"])
+def session_profile():
+    """
+    Fetch the profile of a user over the session kept from an earlier /authenticate call, without logging in again.
+    ---
+    tags:
+      - Authentication
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    parameters:
+      - in: header
+        name: X-Request-Timeout
+        type: number
+        required: false
+        description: Seconds the caller is willing to wait, if the timeout field of the body is not used
+      - in: body
+        name: session
+        required: true
+        description: Session token returned by /authenticate with session enabled, and optional flags
+        schema:
+          type: object
+          required:
+            - session_token
+          properties:
+            session_token:
+              type: string
+              description: The session_token returned by /authenticate
+            fields:
+              type: array
+              description: List of profile fields to return. Must be from the predefined set of allowed fields.
+              items:
+                type: string
+            timeout:
+              type: number
+              description: Seconds the caller is willing to wait. Defaults to the deadline of the server.
+    responses:
+      200:
+        description: Profile of the user
+        schema:
+          type: object
+          properties:
+            status:
+              type: boolean
+              example: true
+            profile:
+              type: object
+            timestamp:
+              type: string
+              format: date-time
+      400:
+        description: Invalid request data
+      401:
+        description: The session token is unknown or has expired. Log in again with /authenticate.
+      429:
+        description: Too many requests from this client. Retry after the number of seconds in the Retry-After header.
+      502:
+        description: PESU Academy did not return the profile. The session token can no longer be used.
+      503:
+        description: PESU Academy is degraded or the server is overloaded. Retry after the number of seconds in the Retry-After header.
+      504:
+        description: PESU Academy did not respond within the deadline of the request
+    """
+    current_time = datetime.datetime.now(IST)
+    timer = PhaseTimer()
+    try:
+        payload = request.get_json(silent=True)
+        assert isinstance(payload, dict), "Request body should be a JSON object."
+        token = payload.get("session_token")
+        assert isinstance(token, str) and token, "Session token not provided."
+        fields = payload.get("fields")
+        validate_fields(fields)
+        deadline = create_deadline(
+            payload.get("timeout"), request.headers.get("X-Request-Timeout")
+        )
+    except Exception as e:
+        logger.exception("Could not validate profile request data.")
+        return (
+            json.dumps(
+                {
+                    "status": False,
+                    "message": f"Could not validate request data: {e}",
+                    "timestamp": str(current_time),
+                }
+            ),
+            400,
+            {"Content-Type": "application/json"},
+        )
+
+    headers = {"Content-Type": "application/json"}
+    try:
+        check_rate_limits(
+            client_key(request.headers.get("X-API-Key"), request.remote_addr), None
+        )
+        with admit_login(timer, deadline):
+            profile = pesu_academy.get_session_profile(token, timer, deadline, fields)
+    except (CircuitOpenError, AdmissionRejectedError, RateLimitedError) as e:
+        headers["Retry-After"] = str(math.ceil(e.retry_after))
+        status, content = (
+            429 if isinstance(e, RateLimitedError) else 503,
+            {"status": False, "message": str(e)},
+        )
+    except DeadlineExceededError as e:
+        status, content = 504, {"status": False, "message": str(e)}
+    except Exception as e:
+        logger.exception("Error fetching the profile over a kept session.")
+        status, content = (
+            500,
+            {"status": False, "message": f"Error fetching profile: {e}"},
+        )
+    else:
+        if profile is None:
+            status, content = (
+                401,
+                {"status": False, "message": "Invalid or expired session token."},
+            )
+        elif "error" in profile:
+            status, content = (
+                502,
+                {
+                    "status": False,
+                    "message": "Unable to fetch profile data.",
+                    "error": profile["error"],
+                },
+            )
+        else:
+            if fields is not None:
+                profile = PESUAcademy.filter_profile_fields(profile, fields)
+            status, content = 200, {"status": True, "profile": profile}
+    content["timestamp"] = str(current_time)
+    headers["Server-Timing"] = timer.server_timing()
+    return json.dumps(content), status, headers
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """
+    Export authentication metrics in the Prometheus text format.
+    ---
+    tags:
+      - Monitoring
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Request counts and phase latency histograms by outcome, and cache, coalescing and session pool counters
+    """
+    output = authentication_metrics.render()
+    output += render_stats(
+        "pesu_auth_single_flight",
+        "Coalescing of identical concurrent authentication requests",
+        single_flight.stats(),
+        gauges=("in_flight",),
+    )
+    if authentication_cache is not None:
+        output += render_stats(
+            "pesu_auth_cache",
+            "Authentication result cache",
+            authentication_cache.stats(),
+            gauges=("size", "capacity"),
+        )
+    if pesu_academy.session_pool is not None:
+        output += render_stats(
+            "pesu_auth_session_pool",
+            "Pre-warmed anonymous session pool",
+            pesu_academy.session_pool.stats(),
+            gauges=("size", "capacity"),
+        )
+    if pesu_academy.session_store is not None:
+        output += render_stats(
+            "pesu_auth_session_store",
+            "Logged in sessions kept for session tokens",
+            pesu_academy.session_store.stats(),
+            gauges=("size", "capacity"),
+        )
+    if pesu_academy.circuit_breaker is not None:
+        output += render_stats(
+            "pesu_auth_circuit_breaker",
+            "Circuit breaker around PESU Academy (state: 0 closed, 1 open, 2 half open)",
+            pesu_academy.circuit_breaker.stats(),
+            gauges=(
+                "state",
+                "window_calls",
+                "window_failures",
+                "window_slow_calls",
+            ),
+        )
+    for name, limiter in (
+        ("client", client_rate_limiter),
+        ("username", username_rate_limiter),
+    ):
+        if limiter is not None:
+            output += render_stats(
+                f"pesu_auth_{name}_rate_limit",
+                f"Token bucket rate limiting per {name}",
+                limiter.stats(),
+                gauges=("keys",),
+            )
+    if admission_controller is not None:
+        output += render_stats(
+            "pesu_auth_admission",
+            "Adaptive admission control of upstream logins",
+            admission_controller.stats(),
+            gauges=("limit", "in_flight", "waiting"),
+        )
+    return output, 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+@app.route("/status")
+def status():
+    """
+    Report the health of the connection to PESU Academy.
+    ---
+    tags:
+      - Monitoring
+    produces:
+      - application/json
+    responses:
+      200:
+        description: State of the circuit breaker around PESU Academy and counters of the admission controller, each null if disabled
+    """
+    circuit_breaker = pesu_academy.circuit_breaker
+    return (
+        json.dumps(
+            {
+                "circuit_breaker": circuit_breaker.status()
+                if circuit_breaker is not None
+                else None,
+                "admission": admission_controller.stats()
+                if admission_controller is not None
+                else None,
+            }
+        ),
+        200,
+        {"Content-Type": "application/json"},
+    )
+
 
 if __name__ == "__main__":
     # Set up argument parser for command line arguments
@@ -303,43 +1269,333 @@ if __name__ == "__main__":
         action="store_true",
         help="Run the application in debug mode with detailed logging.",
     )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=100,
+        help="Maximum number of concurrent connections to PESU Academy. Default is 100",
+    )
+    parser.add_argument(
+        "--max-keepalive-connections",
+        type=int,
+        default=20,
+        help="Maximum number of idle keep-alive connections to PESU Academy. Default is 20",
+    )
+    parser.add_argument(
+        "--keepalive-expiry",
+        type=float,
+        default=30.0,
+        help="Seconds after which an idle connection to PESU Academy is closed. Default is 30",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 for connections to PESU Academy. Requires the httpx[http2] extra.",
+    )
+    parser.add_argument(
+        "--upstream-url",
+        type=str,
+        default=PESUAcademyConstants.BASE_URL,
+        help=f"Base URL of PESU Academy. Point this at a local stand-in for load testing. Default is {PESUAcademyConstants.BASE_URL}",
+    )
+    parser.add_argument(
+        "--session-pool-size",
+        type=int,
+        default=0,
+        help="Number of pre-warmed anonymous PESU Academy sessions to keep ready. Default is 0 (disabled)",
+    )
+    parser.add_argument(
+        "--session-max-age",
+        type=float,
+        default=300.0,
+        help="Seconds after which a pre-warmed anonymous session is discarded. Default is 300",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=0.0,
+        help="Seconds for which successful authentication results are cached. Default is 0 (disabled)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Maximum number of cached authentication results. Default is 1024",
+    )
+    parser.add_argument(
+        "--parser-backend",
+        choices=["modest", "lexbor"],
+        default="modest",
+        help="selectolax backend used to parse the student profile page. Default is modest",
+    )
+    parser.add_argument(
+        "--batch-concurrency",
+        type=int,
+        default=8,
+        help="Maximum number of logins of a /authenticate/batch request that run at the same time. Default is 8",
+    )
+    parser.add_argument(
+        "--batch-max-size",
+        type=int,
+        default=500,
+        help="Maximum number of credentials in a /authenticate/batch request. Default is 500",
+    )
+    parser.add_argument(
+        "--server",
+        choices=["development", "gunicorn"],
+        default="development",
+        help="Server to run the app on. gunicorn is a pre-forking production server that requires the server extra. "
+        "Default is development, the single-process Flask development server",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Number of gunicorn worker processes. Default is 2",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=8,
+        help="Number of request threads per gunicorn worker. Default is 8",
+    )
+    parser.add_argument(
+        "--keepalive",
+        type=int,
+        default=5,
+        help="Seconds gunicorn keeps an idle client connection open. Default is 5",
+    )
+    parser.add_argument(
+        "--backlog",
+        type=int,
+        default=2048,
+        help="Maximum number of pending connections gunicorn queues. Default is 2048",
+    )
+    parser.add_argument(
+        "--worker-timeout",
+        type=int,
+        default=60,
+        help="Seconds after which gunicorn restarts a worker that stopped responding. Default is 60",
+    )
+    parser.add_argument(
+        "--preload",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Set up Swagger and render the README once before forking the gunicorn workers, instead of in every "
+        "worker. Enabled by default",
+    )
+    parser.add_argument(
+        "--no-docs",
+        action="store_true",
+        help="Do not mount the Swagger UI and API specification, and do not render the README at startup, e.g. on "
+        "API-only nodes.",
+    )
+    parser.add_argument(
+        "--session-store-size",
+        type=int,
+        default=0,
+        help="Maximum number of logged in sessions kept for /profile requests with a session token. The oldest "
+        "sessions are ended first. Default is 0, which disables session tokens",
+    )
+    parser.add_argument(
+        "--session-ttl",
+        type=float,
+        default=300.0,
+        help="Seconds after the login for which a session token can be used. Default is 300",
+    )
+    parser.add_argument(
+        "--circuit-breaker",
+        action="store_true",
+        help="Fail calls to PESU Academy fast with a 503 while it is failing or too slow.",
+    )
+    parser.add_argument(
+        "--circuit-failure-rate",
+        type=float,
+        default=0.5,
+        help="Fraction of failed PESU Academy calls in the last 30 seconds that opens the circuit. Default is 0.5",
+    )
+    parser.add_argument(
+        "--circuit-slow-call-seconds",
+        type=float,
+        default=5.0,
+        help="Seconds from which a PESU Academy call counts as slow. The circuit opens when 80%% of the calls in the "
+        "last 30 seconds are slow. Default is 5",
+    )
+    parser.add_argument(
+        "--circuit-open-seconds",
+        type=float,
+        default=30.0,
+        help="Seconds the circuit stays open before probe calls are let through. Default is 30",
+    )
+    parser.add_argument(
+        "--admission-control",
+        action="store_true",
+        help="Limit the number of concurrent logins to PESU Academy, adapting the limit to its latency, and shed "
+        "requests with a 503 once too many are waiting.",
+    )
+    parser.add_argument(
+        "--admission-initial-limit",
+        type=int,
+        default=20,
+        help="Number of concurrent logins to PESU Academy allowed at startup. Default is 20",
+    )
+    parser.add_argument(
+        "--admission-max-limit",
+        type=int,
+        default=200,
+        help="Highest number of concurrent logins to PESU Academy the limit can grow to. Default is 200",
+    )
+    parser.add_argument(
+        "--admission-queue-size",
+        type=int,
+        default=100,
+        help="Maximum number of requests waiting for a login slot. Further requests get a 503. Default is 100",
+    )
+    parser.add_argument(
+        "--admission-queue-timeout",
+        type=float,
+        default=5.0,
+        help="Seconds a request waits for a login slot before it gets a 503. Default is 5",
+    )
+    parser.add_argument(
+        "--client-rate-limit",
+        type=float,
+        default=0,
+        help="Sustained number of logins per minute allowed per client address or API key. Clients over it get a "
+        "429. Default is 0, which disables the limit",
+    )
+    parser.add_argument(
+        "--client-burst",
+        type=int,
+        default=20,
+        help="Number of logins a client can make at once before --client-rate-limit applies. Default is 20",
+    )
+    parser.add_argument(
+        "--username-rate-limit",
+        type=float,
+        default=0,
+        help="Sustained number of logins per minute allowed per username, across all clients. Default is 0, which "
+        "disables the limit",
+    )
+    parser.add_argument(
+        "--username-burst",
+        type=int,
+        default=5,
+        help="Number of logins with a username allowed at once before --username-rate-limit applies. Default is 5",
+    )
+    parser.add_argument(
+        "--rate-limit-max-keys",
+        type=int,
+        default=100_000,
+        help="Maximum number of clients and of usernames tracked by the rate limiters. The least recently seen are "
+        "forgotten first. Default is 100000",
+    )
+    parser.add_argument(
+        "--api-key",
+        action="append",
+        default=[],
+        help="API key that identifies a client for rate limiting when sent in the X-API-Key header, in place of its "
+        "address. Repeatable.",
+    )
+    parser.add_argument(
+        "--default-deadline",
+        type=float,
+        default=10.0,
+        help="Seconds a request may take, across all its calls to PESU Academy, when the caller does not set a "
+        "timeout. Default is 10",
+    )
+    parser.add_argument(
+        "--max-deadline",
+        type=float,
+        default=30.0,
+        help="Longest timeout in seconds a caller can set with the timeout field or the X-Request-Timeout header. "
+        "Default is 30",
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=["text", "json"],
+        default="text",
+        help="Format of log lines. Default is text",
+    )
+    parser.add_argument(
+        "--async-logging",
+        action="store_true",
+        help="Format and write log records on a background thread, so that requests never block on log I/O.",
+    )
+    parser.add_argument(
+        "--log-sample",
+        action="append",
+        default=[],
+        metavar="LOGGER=RATE",
+        help="Keep only this fraction of the records below WARNING of a logger, e.g. app.pesu=0.1. Repeatable.",
+    )
     args = parser.parse_args()
 
-    swagger_config = {
-        "headers": [],
-        "specs": [
-            {
-                "endpoint": "v1",
-                "route": "/v1.json",
-                "rule_filter": lambda rule: True,
-                "model_filter": lambda tag: True,
-            }
-        ],
-        "static_url_path": "/flasgger_static",
-        "swagger_ui": True,
-        "specs_route": "/",
-    }
-    # TODO: Add version to the API
-    # TODO: Set host dynamically based on the machine's IP address or domain name
-    swagger_template = {
-        "swagger": "2.0",
-        "info": {
-            "title": "PESU Auth API",
-            "description": "A simple API to authenticate PESU credentials using PESU Academy",
-            # "version": "1.0.0"
-        },
-        # "host": "localhost:5000",
-        "basePath": "/",
-        "schemes": ["https", "http"],
-    }
-    swagger = Swagger(app, config=swagger_config, template=swagger_template)
-
     logging_level = logging.DEBUG if args.debug else logging.INFO
-    logging.basicConfig(
+    setup_logging(
         level=logging_level,
-        format="%(asctime)s - %(levelname)s - %(filename)s:%(funcName)s:%(lineno)d - %(message)s",
-        filemode="w",
+        json_format=args.log_format == "json",
+        background=args.async_logging,
+        sample_rates=parse_sample_rates(args.log_sample),
     )
 
-    # Run the app
-    app.run(host=args.host, port=args.port, debug=args.debug)
+    batch_concurrency = args.batch_concurrency
+    batch_max_size = args.batch_max_size
+    default_deadline = args.default_deadline
+    max_deadline = args.max_deadline
+    admission_controller = create_admission_controller(args)
+    client_rate_limiter, username_rate_limiter = create_rate_limiters(args)
+    api_keys = frozenset(args.api_key)
+    if args.cache_ttl > 0:
+        authentication_cache = AuthenticationCache(
+            ttl=args.cache_ttl, max_entries=args.cache_size
+        )
+    pesu_academy = PESUAcademy(
+        max_connections=args.max_connections,
+        max_keepalive_connections=args.max_keepalive_connections,
+        keepalive_expiry=args.keepalive_expiry,
+        http2=args.http2,
+        base_url=args.upstream_url,
+        parser_backend=args.parser_backend,
+        session_pool_size=args.session_pool_size,
+        session_max_age=args.session_max_age,
+        session_store_size=args.session_store_size,
+        session_ttl=args.session_ttl,
+        circuit_breaker=create_circuit_breaker(args),
+    )
+
+    def setup():
+        if args.no_docs:
+            # Keep startup lean. The README is still rendered on the first /readme request.
+            return
+        setup_swagger(app)
+        try:
+            load_readme()
+        except Exception:
+            logger.exception("Unable to convert README.md to HTML.")
+
+    def start_session_pool():
+        if pesu_academy.session_pool:
+            # Warm the anonymous session pool before the first request arrives
+            pesu_academy.session_pool.start()
+
+    if args.server == "gunicorn":
+        # Background threads and upstream connections do not survive a fork, so the session pool starts per worker
+        run_gunicorn(
+            app,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            threads=args.threads,
+            keepalive=args.keepalive,
+            backlog=args.backlog,
+            timeout=args.worker_timeout,
+            preload=args.preload,
+            setup=setup,
+            post_fork=start_session_pool,
+        )
+    else:
+        setup()
+        start_session_pool()
+        # Run the app on the Flask development server
+        app.run(host=args.host, port=args.port, debug=args.debug)
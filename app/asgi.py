@@ -0,0 +1,506 @@
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import math
+from typing import Any, Optional
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app.app as app_module
+from app import metrics
+from app.app import (
+    IST,
+    app,
+    authentication_metrics,
+    check_rate_limits,
+    client_key,
+    create_circuit_breaker,
+    create_deadline,
+    create_rate_limiters,
+    load_readme,
+    project_result,
+    setup_swagger,
+    upstream_fields,
+    validate_input,
+)
+from app.cache import AuthenticationCache
+from app.circuit_breaker import CircuitOpenError
+from app.constants import PESUAcademyConstants
+from app.deadline import Deadline, DeadlineExceededError
+from app.logging_config import parse_sample_rates, setup_logging
+from app.metrics import PhaseTimer
+from app.pesu import AsyncPESUAcademy, PESUAcademy
+from app.rate_limit import RateLimitedError
+from app.singleflight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+async_pesu_academy = AsyncPESUAcademy()
+# Concurrent identical authentication requests on the event loop share a single upstream login
+async_single_flight = AsyncSingleFlight()
+flask_application = WsgiToAsgi(app)
+
+
+async def read_body(receive) -> bytes:
+    """
+    Read the complete request body from the ASGI receive channel.
+    :param receive: The ASGI receive callable
+    :return: The request body
+    """
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def send_json(
+    send,
+    status: int,
+    content: dict,
+    headers: Optional[list[tuple[bytes, bytes]]] = None,
+):
+    """
+    Send a JSON response over the ASGI send channel.
+    :param send: The ASGI send callable
+    :param status: The HTTP status code
+    :param content: The JSON content to send
+    :param headers: Additional response headers
+    """
+    body = json.dumps(content).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *(headers or []),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def authenticate_user(
+    username: str,
+    password: str,
+    profile: bool,
+    fields: Optional[list[str]],
+    bypass_cache: bool = False,
+    timer: Optional[PhaseTimer] = None,
+    deadline: Optional[Deadline] = None,
+) -> dict[str, Any]:
+    """
+    Authenticate the user with AsyncPESUAcademy, through the same cache as the Flask app.
+    Concurrent requests with the same credentials and profile flag await one upstream login and share its result.
+    :param username: Username of the user
+    :param password: Password of the user
+    :param profile: Whether to fetch the profile information or not
+    :param fields: The fields to fetch from the profile. Defaults to all fields if not provided.
+    :param bypass_cache: Whether to skip the cache and always authenticate with PESU Academy
+    :param timer: Timings of the request. Only the request that performs the upstream login records phases in it.
+    :param deadline: End-to-end deadline of the request. Coalesced callers share the deadline of the first caller.
+    :return: The authentication result
+    :raises DeadlineExceededError: If the deadline ran out before the login completed
+    """
+    timer = PhaseTimer() if timer is None else timer
+    authentication_cache = app_module.authentication_cache
+    key = app_module.credential_hasher.hash(username, password)
+    if authentication_cache is not None and not bypass_cache:
+        if (result := authentication_cache.get(key, profile)) is not None:
+            logger.info("Serving cached authentication result for user=%s.", username)
+            return project_result(result, profile, fields)
+
+    fetch_fields = upstream_fields(username, profile, fields)
+
+    async def login() -> dict[str, Any]:
+        # Only the caller that performs the upstream login records its outcome, so coalesced callers are not counted
+        try:
+            return await async_pesu_academy.authenticate(
+                username,
+                password,
+                profile,
+                fetch_fields,
+                timer=timer,
+                deadline=deadline,
+            )
+        except Exception:
+            if timer.outcome is None:
+                timer.finish(metrics.UPSTREAM_ERROR)
+            raise
+        finally:
+            authentication_metrics.observe(timer)
+
+    # Only callers that need the same upstream pages can share a login
+    flight_fields = None if fetch_fields is None else tuple(fetch_fields)
+    result = await async_single_flight.do((key, profile, flight_fields), login)
+    if authentication_cache is not None:
+        authentication_cache.set(key, result)
+    return project_result(result, profile, fields)
+
+
+async def authenticate(scope, receive, send):
+    """
+    Authenticate a user with their PESU credentials using PESU Academy, without blocking a worker thread.
+    Accepts the same request body and returns the same responses as the /authenticate route of the Flask app.
+    :param scope: The ASGI connection scope
+    :param receive: The ASGI receive callable
+    :param send: The ASGI send callable
+    """
+    current_time = datetime.datetime.now(IST)
+    timer = PhaseTimer()
+    headers = dict(scope["headers"])
+    try:
+        payload = json.loads(await read_body(receive))
+        assert isinstance(payload, dict), "Request body should be a JSON object."
+        username = payload.get("username")
+        password = payload.get("password")
+        profile = payload.get("profile", False)
+        fields = payload.get("fields")
+        bypass_cache = payload.get("bypass_cache", False)
+        session = payload.get("session", False)
+        logger.info("Received authentication request. Beginning input validation...")
+        validate_input(username, password, profile, fields, bypass_cache, session)
+        timeout_header = headers.get(b"x-request-timeout")
+        deadline = create_deadline(
+            payload.get("timeout"),
+            timeout_header.decode("latin-1") if timeout_header is not None else None,
+        )
+    except Exception as e:
+        logger.exception("Could not validate request data.")
+        await send_json(
+            send,
+            400,
+            {
+                "status": False,
+                "message": f"Could not validate request data: {e}",
+                "timestamp": str(current_time),
+            },
+        )
+        return
+
+    api_key = headers.get(b"x-api-key")
+    headers = []
+    try:
+        check_rate_limits(
+            client_key(
+                api_key.decode("latin-1") if api_key is not None else None,
+                scope["client"][0] if scope.get("client") else None,
+            ),
+            username,
+        )
+        logger.info("Authenticating user=%s with PESU Academy...", username)
+        if session:
+            # Session tokens hold the cookie jar of a sync client, which the /profile route of the Flask app reuses
+            authentication_result = await asyncio.to_thread(
+                app_module.authenticate_user,
+                username,
+                password,
+                profile,
+                fields,
+                bypass_cache,
+                timer,
+                deadline,
+                session,
+            )
+        else:
+            authentication_result = await authenticate_user(
+                username, password, profile, fields, bypass_cache, timer, deadline
+            )
+        authentication_result["timestamp"] = str(current_time)
+        logger.info(
+            "Returning auth result for user=%s: status=%s",
+            username,
+            authentication_result["status"],
+        )
+        logger.debug("Auth result for user=%s: %s", username, authentication_result)
+        status, content = 200, authentication_result
+    except (CircuitOpenError, RateLimitedError) as e:
+        status = 429 if isinstance(e, RateLimitedError) else 503
+        content = {"status": False, "message": str(e), "timestamp": str(current_time)}
+        headers.append((b"retry-after", str(math.ceil(e.retry_after)).encode()))
+    except DeadlineExceededError as e:
+        status = 504
+        content = {"status": False, "message": str(e), "timestamp": str(current_time)}
+    except Exception as e:
+        logger.exception("Error authenticating user=%s.", username)
+        status = 500
+        content = {"status": False, "message": f"Error authenticating user: {e}"}
+    headers.append((b"server-timing", timer.server_timing().encode()))
+    await send_json(send, status, content, headers=headers)
+
+
+async def lifespan(receive, send):
+    """
+    Handle the ASGI lifespan protocol and close the upstream connection pool on shutdown.
+    :param receive: The ASGI receive callable
+    :param send: The ASGI send callable
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await async_pesu_academy.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """
+    ASGI entry point. /authenticate is served natively on the event loop by AsyncPESUAcademy, every other route
+    is delegated to the Flask app.
+    """
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif (
+        scope["type"] == "http"
+        and scope["path"] == "/authenticate"
+        and scope["method"] == "POST"
+    ):
+        await authenticate(scope, receive, send)
+    else:
+        await flask_application(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(
+        description="PESUAuth API - Serve the API from an ASGI server with the asyncio authentication engine."
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="0.0.0.0",
+        help="Host to run the ASGI application on. Default is 0.0.0.0",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=5000,
+        help="Port to run the ASGI application on. Default is 5000",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Run the application with detailed logging.",
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=100,
+        help="Maximum number of concurrent connections to PESU Academy. Default is 100",
+    )
+    parser.add_argument(
+        "--max-keepalive-connections",
+        type=int,
+        default=20,
+        help="Maximum number of idle keep-alive connections to PESU Academy. Default is 20",
+    )
+    parser.add_argument(
+        "--keepalive-expiry",
+        type=float,
+        default=30.0,
+        help="Seconds after which an idle connection to PESU Academy is closed. Default is 30",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 for connections to PESU Academy. Requires the httpx[http2] extra.",
+    )
+    parser.add_argument(
+        "--upstream-url",
+        type=str,
+        default=PESUAcademyConstants.BASE_URL,
+        help=f"Base URL of PESU Academy. Point this at a local stand-in for load testing. Default is {PESUAcademyConstants.BASE_URL}",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=0.0,
+        help="Seconds for which successful authentication results are cached. Default is 0 (disabled)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Maximum number of cached authentication results. Default is 1024",
+    )
+    parser.add_argument(
+        "--parser-backend",
+        choices=["modest", "lexbor"],
+        default="modest",
+        help="selectolax backend used to parse the student profile page. Default is modest",
+    )
+    parser.add_argument(
+        "--no-docs",
+        action="store_true",
+        help="Do not mount the Swagger UI and API specification, and do not render the README at startup, e.g. on "
+        "API-only nodes.",
+    )
+    parser.add_argument(
+        "--session-store-size",
+        type=int,
+        default=0,
+        help="Maximum number of logged in sessions kept for /profile requests with a session token. The oldest "
+        "sessions are ended first. Default is 0, which disables session tokens",
+    )
+    parser.add_argument(
+        "--session-ttl",
+        type=float,
+        default=300.0,
+        help="Seconds after the login for which a session token can be used. Default is 300",
+    )
+    parser.add_argument(
+        "--circuit-breaker",
+        action="store_true",
+        help="Fail calls to PESU Academy fast with a 503 while it is failing or too slow.",
+    )
+    parser.add_argument(
+        "--circuit-failure-rate",
+        type=float,
+        default=0.5,
+        help="Fraction of failed PESU Academy calls in the last 30 seconds that opens the circuit. Default is 0.5",
+    )
+    parser.add_argument(
+        "--circuit-slow-call-seconds",
+        type=float,
+        default=5.0,
+        help="Seconds from which a PESU Academy call counts as slow. The circuit opens when 80%% of the calls in the "
+        "last 30 seconds are slow. Default is 5",
+    )
+    parser.add_argument(
+        "--circuit-open-seconds",
+        type=float,
+        default=30.0,
+        help="Seconds the circuit stays open before probe calls are let through. Default is 30",
+    )
+    parser.add_argument(
+        "--client-rate-limit",
+        type=float,
+        default=0,
+        help="Sustained number of logins per minute allowed per client address or API key. Clients over it get a "
+        "429. Default is 0, which disables the limit",
+    )
+    parser.add_argument(
+        "--client-burst",
+        type=int,
+        default=20,
+        help="Number of logins a client can make at once before --client-rate-limit applies. Default is 20",
+    )
+    parser.add_argument(
+        "--username-rate-limit",
+        type=float,
+        default=0,
+        help="Sustained number of logins per minute allowed per username, across all clients. Default is 0, which "
+        "disables the limit",
+    )
+    parser.add_argument(
+        "--username-burst",
+        type=int,
+        default=5,
+        help="Number of logins with a username allowed at once before --username-rate-limit applies. Default is 5",
+    )
+    parser.add_argument(
+        "--rate-limit-max-keys",
+        type=int,
+        default=100_000,
+        help="Maximum number of clients and of usernames tracked by the rate limiters. The least recently seen are "
+        "forgotten first. Default is 100000",
+    )
+    parser.add_argument(
+        "--api-key",
+        action="append",
+        default=[],
+        help="API key that identifies a client for rate limiting when sent in the X-API-Key header, in place of its "
+        "address. Repeatable.",
+    )
+    parser.add_argument(
+        "--default-deadline",
+        type=float,
+        default=10.0,
+        help="Seconds a request may take, across all its calls to PESU Academy, when the caller does not set a "
+        "timeout. Default is 10",
+    )
+    parser.add_argument(
+        "--max-deadline",
+        type=float,
+        default=30.0,
+        help="Longest timeout in seconds a caller can set with the timeout field or the X-Request-Timeout header. "
+        "Default is 30",
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=["text", "json"],
+        default="text",
+        help="Format of log lines. Default is text",
+    )
+    parser.add_argument(
+        "--async-logging",
+        action="store_true",
+        help="Format and write log records on a background thread, so that requests never block on log I/O.",
+    )
+    parser.add_argument(
+        "--log-sample",
+        action="append",
+        default=[],
+        metavar="LOGGER=RATE",
+        help="Keep only this fraction of the records below WARNING of a logger, e.g. app.pesu=0.1. Repeatable.",
+    )
+    args = parser.parse_args()
+
+    logging_level = logging.DEBUG if args.debug else logging.INFO
+    setup_logging(
+        level=logging_level,
+        json_format=args.log_format == "json",
+        background=args.async_logging,
+        sample_rates=parse_sample_rates(args.log_sample),
+    )
+
+    if args.cache_ttl > 0:
+        app_module.authentication_cache = AuthenticationCache(
+            ttl=args.cache_ttl, max_entries=args.cache_size
+        )
+    app_module.client_rate_limiter, app_module.username_rate_limiter = (
+        create_rate_limiters(args)
+    )
+    app_module.api_keys = frozenset(args.api_key)
+    app_module.default_deadline = args.default_deadline
+    app_module.max_deadline = args.max_deadline
+    circuit_breaker = create_circuit_breaker(args)
+    async_pesu_academy = AsyncPESUAcademy(
+        max_connections=args.max_connections,
+        max_keepalive_connections=args.max_keepalive_connections,
+        keepalive_expiry=args.keepalive_expiry,
+        http2=args.http2,
+        base_url=args.upstream_url,
+        parser_backend=args.parser_backend,
+        circuit_breaker=circuit_breaker,
+    )
+    # The Flask routes, such as /authenticate/batch and /profile, call the same upstream with the sync client, so it
+    # shares the circuit breaker. It also keeps the sessions handed out as session tokens.
+    app_module.pesu_academy = PESUAcademy(
+        max_connections=args.max_connections,
+        max_keepalive_connections=args.max_keepalive_connections,
+        keepalive_expiry=args.keepalive_expiry,
+        http2=args.http2,
+        base_url=args.upstream_url,
+        parser_backend=args.parser_backend,
+        session_store_size=args.session_store_size,
+        session_ttl=args.session_ttl,
+        circuit_breaker=circuit_breaker,
+    )
+
+    if not args.no_docs:
+        setup_swagger(app)
+        try:
+            load_readme()
+        except Exception:
+            logger.exception("Unable to convert README.md to HTML.")
+
+    uvicorn.run(application, host=args.host, port=args.port)
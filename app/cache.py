@@ -0,0 +1,113 @@
+import copy
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.pesu import BasePESUAcademy
+
+
+class CredentialHasher:
+    """
+    Keyed BLAKE2b hash of a username and password pair, so that credentials never have to be stored in plaintext.
+    The key is random per process unless one is provided.
+    """
+
+    def __init__(self, key: Optional[bytes] = None):
+        """
+        Initialize the hasher.
+        :param key: Secret key for the hash. A random key is generated if not provided.
+        """
+        self.key = key if key is not None else secrets.token_bytes(32)
+
+    def hash(self, username: str, password: str) -> bytes:
+        """
+        Hash the credentials.
+        :param username: Username of the user
+        :param password: Password of the user
+        :return: The keyed hash of the credentials
+        """
+        digest = hashlib.blake2b(key=self.key, digest_size=32)
+        digest.update(username.encode())
+        digest.update(b"\0")
+        digest.update(password.encode())
+        return digest.digest()
+
+
+class AuthenticationCache:
+    """
+    In-memory TTL cache of successful authentication results with LRU eviction.
+    Entries are keyed by a credential hash and store the complete profile, so one entry can serve every field
+    projection.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024):
+        """
+        Initialize the cache.
+        :param ttl: Seconds for which a successful result is served from the cache
+        :param max_entries: Maximum number of cached results. The least recently used entry is evicted first.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes, profile: bool) -> Optional[dict[str, Any]]:
+        """
+        Get a cached authentication result.
+        :param key: The credential hash
+        :param profile: Whether the caller needs the profile information
+        :return: A copy of the cached result, or None if there is no fresh entry that satisfies the request
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self.entries[key]
+                entry = None
+            if entry is None or (profile and "profile" not in entry[1]):
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def set(self, key: bytes, result: dict[str, Any]):
+        """
+        Cache an authentication result. Only successful results with a complete profile, if any, are cached. A login
+        whose profile could not be fetched within the deadline is not cached either, so that later requests do not keep
+        getting its message.
+        :param key: The credential hash
+        :param result: The authentication result
+        """
+        if (
+            not result.get("status")
+            or "error" in result.get("profile", {})
+            or result.get("message") == BasePESUAcademy.PROFILE_DEADLINE_MESSAGE
+        ):
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(result))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the cache counters.
+        :return: The number of cached entries and the hit, miss and eviction counters
+        """
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "capacity": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
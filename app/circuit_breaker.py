@@ -0,0 +1,199 @@
+import math
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# States of the circuit breaker
+STATES = ("closed", "open", "half_open")
+CLOSED, OPEN, HALF_OPEN = range(len(STATES))
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling PESU Academy while the circuit breaker is open.
+    """
+
+    def __init__(self, retry_after: float):
+        """
+        Initialize the error.
+        :param retry_after: Seconds after which the caller should retry
+        """
+        super().__init__(
+            f"PESU Academy is unavailable. Retry after {math.ceil(retry_after)} seconds."
+        )
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that stops sending requests to PESU Academy while it is failing or too slow.
+    Outcomes are counted in a rolling window of one-second buckets. The circuit opens when the failure rate or the
+    slow call rate in the window crosses its threshold, and every call then fails fast until the open period is over.
+    The circuit then half-opens and lets a few probe calls through. It closes if they all succeed and opens again if
+    any of them fails.
+    """
+
+    def __init__(
+        self,
+        window: int = 30,
+        min_calls: int = 20,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the circuit breaker in the closed state.
+        :param window: Length in seconds of the rolling window of outcomes
+        :param min_calls: Minimum number of calls in the window before the rates are evaluated
+        :param failure_rate: Fraction of failed calls in the window that opens the circuit
+        :param slow_call_seconds: Duration in seconds from which a call counts as slow
+        :param slow_call_rate: Fraction of slow calls in the window that opens the circuit
+        :param open_seconds: Seconds the circuit stays open before letting probe calls through
+        :param half_open_probes: Number of successful probe calls needed to close the circuit again
+        :param clock: Monotonic clock, in seconds
+        """
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.opened_at = 0.0
+        # One bucket per second of the window: [second, calls, failures, slow calls]
+        self.buckets = [[-1, 0, 0, 0] for _ in range(window)]
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def window_counts(self, now: float) -> tuple[int, int, int]:
+        """
+        Sum the outcomes of the rolling window. Must be called with the lock held.
+        :param now: The current time
+        :return: The number of calls, failures and slow calls in the window
+        """
+        oldest = int(now) - self.window
+        calls = failures = slow = 0
+        for second, bucket_calls, bucket_failures, bucket_slow in self.buckets:
+            if second > oldest:
+                calls += bucket_calls
+                failures += bucket_failures
+                slow += bucket_slow
+        return calls, failures, slow
+
+    def trip(self, now: float):
+        """
+        Open the circuit. Must be called with the lock held.
+        :param now: The current time
+        """
+        self.state = OPEN
+        self.opened_at = now
+        self.opened += 1
+
+    def acquire(self) -> bool:
+        """
+        Ask for permission to call PESU Academy.
+        :return: Whether the call is a probe of a half-open circuit
+        :raises CircuitOpenError: If the circuit is open, or half-open with all probes already in flight
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                return False
+            now = self.clock()
+            if self.state == OPEN:
+                remaining = self.opened_at + self.open_seconds - now
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(remaining)
+                self.state = HALF_OPEN
+                self.probes_in_flight = 0
+                self.probe_successes = 0
+            if self.probes_in_flight + self.probe_successes >= self.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError(1.0)
+            self.probes_in_flight += 1
+            return True
+
+    def record(self, probe: bool, failed: bool, duration: float):
+        """
+        Record the outcome of a call to PESU Academy.
+        :param probe: Whether the call was a probe of a half-open circuit, as returned by acquire()
+        :param failed: Whether the call failed because of PESU Academy
+        :param duration: Duration of the call in seconds
+        """
+        slow = duration >= self.slow_call_seconds
+        with self.lock:
+            now = self.clock()
+            if probe:
+                self.probes_in_flight -= 1
+                if self.state != HALF_OPEN:
+                    return
+                if failed or slow:
+                    self.trip(now)
+                    return
+                self.probe_successes += 1
+                if self.probe_successes >= self.half_open_probes:
+                    self.state = CLOSED
+                    for bucket in self.buckets:
+                        bucket[:] = [-1, 0, 0, 0]
+                return
+            if self.state != CLOSED:
+                # Calls admitted before the circuit opened do not count towards the next window
+                return
+            second = int(now)
+            bucket = self.buckets[second % self.window]
+            if bucket[0] != second:
+                bucket[:] = [second, 0, 0, 0]
+            bucket[1] += 1
+            bucket[2] += failed
+            bucket[3] += slow
+            calls, failures, slow_calls = self.window_counts(now)
+            if calls >= self.min_calls and (
+                failures >= self.failure_rate * calls
+                or slow_calls >= self.slow_call_rate * calls
+            ):
+                self.trip(now)
+
+    def status(self) -> dict[str, Any]:
+        """
+        Get the state of the circuit and the rates of the rolling window.
+        :return: The state, the number of calls and the failure and slow call rates in the window, and the seconds
+            until probe calls are let through if the circuit is open
+        """
+        with self.lock:
+            now = self.clock()
+            calls, failures, slow = self.window_counts(now)
+            retry_after: Optional[float] = None
+            if self.state == OPEN:
+                retry_after = max(self.opened_at + self.open_seconds - now, 0.0)
+            return {
+                "state": STATES[self.state],
+                "calls": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+                "slow_call_rate": slow / calls if calls else 0.0,
+                "retry_after": retry_after,
+            }
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the circuit breaker counters.
+        :return: The state as an index into STATES, the number of calls, failures and slow calls in the rolling window,
+            and the number of times the circuit opened and calls were rejected
+        """
+        with self.lock:
+            calls, failures, slow = self.window_counts(self.clock())
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "window_failures": failures,
+                "window_slow_calls": slow,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
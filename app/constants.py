@@ -1,4 +1,6 @@
 class PESUAcademyConstants:
+    BASE_URL: str = "https://www.pesuacademy.com"
+
     DEFAULT_FIELDS: list[str] = [
         "name",
         "prn",
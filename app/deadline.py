@@ -0,0 +1,56 @@
+import time
+from typing import Callable
+
+
+class DeadlineExceededError(Exception):
+    """
+    Raised when the time budget of a request runs out before PESU Academy answered.
+    """
+
+    def __init__(self, seconds: float):
+        """
+        Initialize the error.
+        :param seconds: The time budget of the request
+        """
+        super().__init__(
+            f"PESU Academy did not respond within the deadline of {seconds:g} seconds."
+        )
+        self.seconds = seconds
+
+
+class Deadline:
+    """
+    End-to-end time budget of a request, shared by every upstream call made for it.
+    Each call gets a share of what is left of the budget as its timeout, so the time saved by a fast call carries over
+    to the next ones, and a slow call cannot make the request as a whole run over.
+    """
+
+    __slots__ = ("seconds", "expires_at", "clock")
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Start the deadline.
+        :param seconds: The time budget, from now
+        :param clock: Monotonic clock, in seconds
+        """
+        self.seconds = seconds
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - self.clock(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, share: float = 1.0) -> float:
+        """
+        Get the timeout of the next upstream call.
+        :param share: Fraction of the remaining budget the call may use, leaving the rest for the calls after it
+        :return: The timeout in seconds
+        :raises DeadlineExceededError: If the budget has run out
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError(self.seconds)
+        return remaining * share
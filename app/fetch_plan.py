@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.constants import PESUAcademyConstants
+
+# Fields read from the profile details at the top of the student profile page
+DETAIL_FIELDS = frozenset(
+    [
+        "name",
+        "prn",
+        "srn",
+        "program",
+        "branch_short_code",
+        "branch",
+        "semester",
+        "section",
+    ]
+)
+# Fields read from the inputs of the update contact form further down the profile page
+CONTACT_FIELDS = frozenset(["email", "phone"])
+# Fields derived from the campus digit of the PRN
+CAMPUS_FIELDS = frozenset(["campus_code", "campus"])
+
+# A PRN username, e.g. PES1201800001. The digit after PES is the campus code.
+PRN_PATTERN = re.compile(r"PES(\d)\d{9}", re.IGNORECASE)
+
+
+def campus_from_prn(prn: str) -> dict[str, Any]:
+    """
+    Derive the campus fields from a PRN. Usernames starting with PES1 are from the RR campus, PES2 from the EC campus.
+    :param prn: The PRN of the user
+    :return: The campus code and campus, or an empty dict if the PRN does not carry a campus code
+    """
+    if campus_code_match := re.match(r"PES(\d)", prn):
+        campus_code = campus_code_match.group(1)
+        return {
+            "campus_code": int(campus_code),
+            "campus": "RR" if campus_code == "1" else "EC",
+        }
+    return {}
+
+
+@dataclass(frozen=True)
+class FetchPlan:
+    """
+    What has to be fetched and extracted from PESU Academy to produce the requested profile fields.
+    """
+
+    # Whether the profile details have to be extracted from the profile page
+    details: bool
+    # Whether the contact inputs have to be extracted from the profile page
+    contact: bool
+    # Campus fields derived from the username, so that they need neither the profile page nor the PRN on it
+    campus: Optional[dict[str, Any]] = None
+
+    @property
+    def fetch_profile_page(self) -> bool:
+        return self.details or self.contact
+
+    def fields(self) -> list[str]:
+        """
+        Get every field the plan produces, which can be more than were requested, since pages are fetched whole.
+        :return: The fields, in the order of PESUAcademyConstants.DEFAULT_FIELDS
+        """
+        produced = set()
+        if self.details:
+            produced |= DETAIL_FIELDS | CAMPUS_FIELDS
+        if self.contact:
+            produced |= CONTACT_FIELDS
+        if self.campus is not None:
+            produced |= CAMPUS_FIELDS
+        return [
+            field for field in PESUAcademyConstants.DEFAULT_FIELDS if field in produced
+        ]
+
+
+# Plan of a request for every field, matching the full scrape of the profile page
+FULL_PLAN = FetchPlan(details=True, contact=True)
+
+
+def plan_profile_fetch(username: str, fields: Optional[list[str]]) -> FetchPlan:
+    """
+    Map the requested profile fields to the upstream page and extraction steps that produce them.
+    The campus fields come from the PRN, so a PRN username can have them without fetching the profile page. Otherwise
+    they need the PRN from the profile details.
+    :param username: Username the user logged in with
+    :param fields: The requested profile fields. Defaults to all fields if not provided.
+    :return: The fetch plan
+    """
+    requested = set(PESUAcademyConstants.DEFAULT_FIELDS if fields is None else fields)
+    campus = None
+    needs_prn = False
+    if requested & CAMPUS_FIELDS:
+        if prn_match := PRN_PATTERN.fullmatch(username):
+            campus = campus_from_prn(prn_match.group(0).upper())
+        else:
+            needs_prn = True
+    return FetchPlan(
+        details=needs_prn or bool(requested & DETAIL_FIELDS),
+        contact=bool(requested & CONTACT_FIELDS),
+        campus=campus,
+    )
@@ -0,0 +1,155 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = (
+    "%(asctime)s - %(levelname)s - %(filename)s:%(funcName)s:%(lineno)d - %(message)s"
+)
+
+# Background thread that formats and writes the queued log records, if logging in the background
+queue_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format log records as one JSON object per line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "location": f"{record.filename}:{record.funcName}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records of the given loggers. Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        """
+        Initialize the sampling filter.
+        :param rates: Fraction of records to keep, by logger name. A rate applies to the logger and its children.
+        """
+        super().__init__()
+        self.rates = rates
+        self.random = random.Random()
+
+    def rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        return rate >= 1.0 or self.random.random() < rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread.
+    The stock QueueHandler merges the message and arguments in the logging thread before enqueueing the record.
+    Log arguments must therefore not be mutated after the logging call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_sample_rates(values: list[str]) -> dict[str, float]:
+    """
+    Parse logger sampling rates from the command line.
+    :param values: Rates in the form logger=rate, e.g. app.pesu=0.1
+    :return: The sampling rates by logger name
+    """
+    rates = dict()
+    for value in values:
+        name, _, rate = value.partition("=")
+        rates[name] = float(rate)
+        assert 0.0 <= rates[name] <= 1.0, f"Invalid sampling rate for {name}: {rate}"
+    return rates
+
+
+def stop_logging():
+    """
+    Stop the background logging thread, if any, after it has written all queued records.
+    """
+    global queue_listener
+    if queue_listener:
+        queue_listener.stop()
+        queue_listener = None
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    json_format: bool = False,
+    background: bool = False,
+    sample_rates: Optional[dict[str, float]] = None,
+    stream=None,
+):
+    """
+    Configure the root logger.
+    :param level: The logging level
+    :param json_format: Whether to write structured JSON lines instead of plain text
+    :param background: Whether to hand records to a queue that a background thread formats and writes, so that
+        request threads never block on log I/O
+    :param sample_rates: Fraction of records below WARNING to keep, by logger name
+    :param stream: The stream to write to. Defaults to stderr.
+    """
+    global queue_listener
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(
+        JSONFormatter() if json_format else logging.Formatter(LOG_FORMAT)
+    )
+
+    stop_logging()
+    root = logging.getLogger()
+    for existing_handler in list(root.handlers):
+        root.removeHandler(existing_handler)
+    root.setLevel(level)
+
+    if background:
+        log_queue = queue.SimpleQueue()
+        queue_listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        queue_listener.start()
+        handler = DeferredQueueHandler(log_queue)
+    if sample_rates:
+        # Sampled out records are dropped before they are queued or formatted
+        handler.addFilter(SamplingFilter(sample_rates))
+    root.addHandler(handler)
+
+
+def after_fork():
+    """
+    Restart the background logging thread in a forked child process, since threads do not survive a fork.
+    """
+    global queue_listener
+    if queue_listener:
+        log_queue = queue.SimpleQueue()
+        queue_listener = QueueListener(
+            log_queue, *queue_listener.handlers, respect_handler_level=True
+        )
+        queue_listener.start()
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, DeferredQueueHandler):
+                handler.queue = log_queue
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=after_fork)
@@ -0,0 +1,203 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Optional
+
+# Phases of an authentication request, in the order they run
+PHASES = ("queue", "csrf", "login", "profile", "parse")
+QUEUE, CSRF, LOGIN, PROFILE, PARSE = range(len(PHASES))
+
+# Outcomes of an authentication request
+OUTCOMES = (
+    "success",
+    "invalid_credentials",
+    "csrf_failure",
+    "upstream_error",
+    "circuit_open",
+    "load_shed",
+    "deadline_exceeded",
+)
+(
+    SUCCESS,
+    INVALID_CREDENTIALS,
+    CSRF_FAILURE,
+    UPSTREAM_ERROR,
+    CIRCUIT_OPEN,
+    LOAD_SHED,
+    DEADLINE_EXCEEDED,
+) = range(len(OUTCOMES))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PhaseTimer:
+    """
+    Per-request timings of each authentication phase.
+    Phases and outcomes are indices into preallocated slots, so recording a phase does not build any strings or dicts.
+    """
+
+    __slots__ = ("start", "end", "durations", "outcome")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.durations: list[Optional[float]] = [None] * len(PHASES)
+        self.outcome: Optional[int] = None
+
+    def record(self, phase: int, start: float):
+        """
+        Record the duration of a phase.
+        :param phase: Index of the phase in PHASES
+        :param start: perf_counter() value taken when the phase started
+        """
+        self.durations[phase] = time.perf_counter() - start
+
+    def finish(self, outcome: int):
+        """
+        Mark the request as complete.
+        :param outcome: Index of the outcome in OUTCOMES
+        """
+        self.end = time.perf_counter()
+        self.outcome = outcome
+
+    def total(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def server_timing(self) -> str:
+        """
+        Format the timings as a Server-Timing header value, in milliseconds.
+        :return: The header value
+        """
+        metrics = [
+            f"{phase};dur={duration * 1000:.1f}"
+            for phase, duration in zip(PHASES, self.durations)
+            if duration is not None
+        ]
+        metrics.append(f"total;dur={self.total() * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Buckets are preallocated, so an observation only increments counters.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list[str]:
+        """
+        Render the histogram in the Prometheus text exposition format.
+        :param name: The metric name
+        :param labels: The labels of the series, formatted as key="value" pairs
+        :return: The exposition lines
+        """
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class AuthenticationMetrics:
+    """
+    Aggregate authentication metrics, broken down by outcome and phase, exported in the Prometheus text format.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.lock = threading.Lock()
+        self.requests = [0] * len(OUTCOMES)
+        self.request_duration = [Histogram(buckets) for _ in OUTCOMES]
+        self.phase_duration = [[Histogram(buckets) for _ in OUTCOMES] for _ in PHASES]
+
+    def observe(self, timer: PhaseTimer):
+        """
+        Record the timings of a completed authentication request.
+        :param timer: The timings of the request
+        """
+        outcome = timer.outcome
+        if outcome is None:
+            return
+        total = timer.total()
+        durations = timer.durations
+        with self.lock:
+            self.requests[outcome] += 1
+            self.request_duration[outcome].observe(total)
+            for phase in range(len(PHASES)):
+                if durations[phase] is not None:
+                    self.phase_duration[phase][outcome].observe(durations[phase])
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        :return: The exposition text
+        """
+        lines = [
+            "# HELP pesu_auth_requests_total Authentication requests sent to PESU Academy, by outcome.",
+            "# TYPE pesu_auth_requests_total counter",
+        ]
+        with self.lock:
+            for outcome, count in zip(OUTCOMES, self.requests):
+                lines.append(f'pesu_auth_requests_total{{outcome="{outcome}"}} {count}')
+            lines.append(
+                "# HELP pesu_auth_request_duration_seconds Duration of authentication requests, by outcome."
+            )
+            lines.append("# TYPE pesu_auth_request_duration_seconds histogram")
+            for outcome, histogram in zip(OUTCOMES, self.request_duration):
+                lines.extend(
+                    histogram.render(
+                        "pesu_auth_request_duration_seconds", f'outcome="{outcome}"'
+                    )
+                )
+            lines.append(
+                "# HELP pesu_auth_phase_duration_seconds Duration of each authentication phase, by outcome."
+            )
+            lines.append("# TYPE pesu_auth_phase_duration_seconds histogram")
+            for phase, histograms in zip(PHASES, self.phase_duration):
+                for outcome, histogram in zip(OUTCOMES, histograms):
+                    if histogram.count:
+                        lines.extend(
+                            histogram.render(
+                                "pesu_auth_phase_duration_seconds",
+                                f'phase="{phase}",outcome="{outcome}"',
+                            )
+                        )
+        return "\n".join(lines) + "\n"
+
+
+def render_stats(
+    name: str, description: str, stats: dict[str, int], gauges: tuple[str, ...]
+) -> str:
+    """
+    Render the counters of a component in the Prometheus text exposition format.
+    :param name: Prefix of the metric names
+    :param description: Description of the component
+    :param stats: The counters of the component
+    :param gauges: Keys of the stats that are gauges. All other keys are exported as counters.
+    :return: The exposition text
+    """
+    lines = []
+    for key, value in stats.items():
+        if key in gauges:
+            metric, metric_type = f"{name}_{key}", "gauge"
+        else:
+            metric, metric_type = f"{name}_{key}_total", "counter"
+        lines.append(f"# HELP {metric} {description}: {key.replace('_', ' ')}.")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
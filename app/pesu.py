@@ -1,75 +1,311 @@
+import codecs
 import logging
-import re
+import time
 import traceback
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Optional, Union
 
 import httpx
 from selectolax.parser import HTMLParser
+from app import metrics
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.constants import PESUAcademyConstants
+from app.deadline import Deadline, DeadlineExceededError
+from app.fetch_plan import FULL_PLAN, FetchPlan, campus_from_prn, plan_profile_fetch
+from app.metrics import PhaseTimer
+from app.profile_parser import ProfilePageParser, parse_html
+from app.session_pool import AnonymousSession, AnonymousSessionPool
+from app.session_store import SessionStore
+from app.streaming import (
+    CSRF_MARKERS,
+    LOGIN_MARKERS,
+    PAGE_MARKERS,
+    AsyncScannedStream,
+    PageMarkers,
+    ScannedStream,
+    scan_response,
+)
 
+logger = logging.getLogger(__name__)
 
-class PESUAcademy:
+
+class SharedTransport(httpx.BaseTransport):
     """
-    Class to interact with the PESU Academy website.
+    Transport wrapper that lets many short-lived clients share one pooled transport.
+    Closing a client that uses this transport does not close the underlying connection pool. Requests that carry page
+    markers get a body that ends as soon as the markers have been read, see app.streaming.
     """
 
+    def __init__(self, transport: httpx.BaseTransport):
+        """
+        Wrap the given transport so that it can be shared across clients.
+        :param transport: The pooled transport to share
+        """
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.transport.handle_request(request)
+        return scan_response(request, response, ScannedStream)
+
+    def close(self) -> None:
+        # Clients close their transport on exit. The shared pool outlives them, so this is a no-op.
+        pass
+
+    def shutdown(self) -> None:
+        """
+        Close the underlying transport and all pooled connections.
+        """
+        self.transport.close()
+
+
+class AsyncSharedTransport(httpx.AsyncBaseTransport):
+    """
+    Async counterpart of SharedTransport for clients built on httpx.AsyncClient.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        """
+        Wrap the given async transport so that it can be shared across clients.
+        :param transport: The pooled async transport to share
+        """
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        return scan_response(request, response, AsyncScannedStream)
+
+    async def aclose(self) -> None:
+        # Clients close their transport on exit. The shared pool outlives them, so this is a no-op.
+        pass
+
+    async def shutdown(self) -> None:
+        """
+        Close the underlying transport and all pooled connections.
+        """
+        await self.transport.aclose()
+
+
+class BasePESUAcademy:
+    """
+    Parsing and result handling shared by the sync and async PESU Academy clients.
+    Only the network calls differ between the two, so their behaviour cannot drift.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        base_url: str = PESUAcademyConstants.BASE_URL,
+        parser_backend: str = "modest",
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize the upstream URLs and the connection pool limits shared by every request made through this instance.
+        :param max_connections: Maximum number of concurrent upstream connections
+        :param max_keepalive_connections: Maximum number of idle connections kept alive in the pool
+        :param keepalive_expiry: Seconds after which an idle pooled connection is closed
+        :param http2: Whether to negotiate HTTP/2 with the upstream. Requires the httpx[http2] extra.
+        :param base_url: Base URL of PESU Academy, or of a local stand-in for testing
+        :param parser_backend: The selectolax backend to parse the profile page with, either modest or lexbor
+        :param circuit_breaker: Circuit breaker that fails calls fast while PESU Academy is degraded. Disabled if None.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.home_url = f"{self.base_url}/Academy/"
+        self.login_url = f"{self.base_url}/Academy/j_spring_security_check"
+        self.profile_url = f"{self.base_url}/Academy/s/studentProfilePESUAdmin"
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.profile_parser = ProfilePageParser(parser_backend)
+        self.circuit_breaker = circuit_breaker
+
+    def admit_upstream_call(self, timer: PhaseTimer) -> bool:
+        """
+        Ask the circuit breaker for permission to authenticate with PESU Academy.
+        :param timer: Timings of the request, finished with the circuit_open outcome if the call is rejected
+        :return: Whether the call is a probe of a half-open circuit
+        :raises CircuitOpenError: If the circuit is open
+        """
+        if self.circuit_breaker is None:
+            return False
+        try:
+            return self.circuit_breaker.acquire()
+        except CircuitOpenError as e:
+            timer.finish(metrics.CIRCUIT_OPEN)
+            logger.warning("Circuit breaker is open. Rejecting the call: %s", e)
+            raise
+
+    def record_upstream_call(self, probe: bool, timer: PhaseTimer, start: float):
+        """
+        Record the outcome of an authentication with PESU Academy in the circuit breaker.
+        Wrong credentials are a healthy response. Failed CSRF and login requests and unexpected errors are failures.
+        Running out of the deadline of the caller is not, since a slow upstream already counts as a slow call.
+        :param probe: Whether the call was a probe of a half-open circuit
+        :param timer: Timings of the request, with the outcome of the call
+        :param start: perf_counter() value taken when the call started
+        """
+        if self.circuit_breaker is not None:
+            failed = timer.outcome not in (
+                metrics.SUCCESS,
+                metrics.INVALID_CREDENTIALS,
+                metrics.DEADLINE_EXCEEDED,
+            )
+            self.circuit_breaker.record(probe, failed, time.perf_counter() - start)
+
+    # Share of the remaining deadline the CSRF request may use, so that the login always keeps the other half
+    CSRF_DEADLINE_SHARE = 0.5
+    # Message of a successful login whose profile could not be fetched before the deadline
+    PROFILE_DEADLINE_MESSAGE = (
+        "Login successful. The profile could not be fetched within the deadline."
+    )
+
+    @staticmethod
+    def call_timeout(deadline: Optional[Deadline], share: float = 1.0) -> Any:
+        """
+        Get the timeout of an upstream call.
+        :param deadline: The deadline of the request, or None to use the timeout of the client
+        :param share: Fraction of the remaining budget the call may use
+        :return: The timeout to pass to httpx
+        :raises DeadlineExceededError: If the deadline has passed
+        """
+        if deadline is None:
+            return httpx.USE_CLIENT_DEFAULT
+        return deadline.timeout(share)
+
+    @staticmethod
+    def deadline_exceeded(error: Exception, deadline: Optional[Deadline]) -> bool:
+        """
+        Check whether an upstream call failed because the deadline of the request ran out.
+        :param error: The error raised by the call
+        :param deadline: The deadline of the request, or None if it has none
+        :return: Whether the error is a timeout bounded by the deadline
+        """
+        return deadline is not None and isinstance(
+            error, (DeadlineExceededError, httpx.TimeoutException)
+        )
+
+    # Whether the deprecation warning of the branch short code mapping has been logged
+    branch_short_code_warned = False
+
     @staticmethod
     def map_branch_to_short_code(branch: str) -> Optional[str]:
         """
-        Map the branch name to its short code.
+        Map the branch name to its short code. The deprecation warning is logged once per process.
         :param branch: Branch name
         :return: Short code of the branch
         """
-        logging.warning(
-            "Branch short code mapping will be deprecated in future versions. If you require acronyms, please do it application-side."
-        )
+        if not BasePESUAcademy.branch_short_code_warned:
+            BasePESUAcademy.branch_short_code_warned = True
+            logger.warning(
+                "Branch short code mapping will be deprecated in future versions. If you require acronyms, please do it application-side."
+            )
         return PESUAcademyConstants.BRANCH_SHORT_CODES.get(branch)
 
-    def get_profile_information(
-        self, client: httpx.Client, username: str
+    @staticmethod
+    def get_profile_query() -> dict[str, str]:
+        """
+        Build the query parameters for the student profile page.
+        :return: The query parameters
+        """
+        return {
+            "menuId": "670",
+            "url": "studentProfilePESUAdmin",
+            "controllerMode": "6414",
+            "actionType": "5",
+            "id": "0",
+            "selectedData": "0",
+            "_": str(int(datetime.now().timestamp() * 1000)),
+        }
+
+    @staticmethod
+    def response_markup(response: httpx.Response) -> Union[str, bytes]:
+        """
+        Get the body of an upstream response to parse.
+        Bodies in UTF-8, or in ASCII, which is a subset of it, are parsed from the raw bytes, so that no decoded copy of
+        the document is made. Bodies in any other declared encoding are decoded first.
+        :param response: The upstream response
+        :return: The raw body, or the decoded body
+        """
+        if codecs.lookup(response.encoding).name in ("utf-8", "ascii"):
+            return response.content
+        return response.text
+
+    def redirected_from_profile(self, response: httpx.Response) -> bool:
+        """
+        Check whether a request for the profile page was redirected elsewhere, which PESU Academy does once the session
+        has ended.
+        :param response: The response of the profile request, after following redirects
+        :return: True if the response is not the profile page
+        """
+        return bool(response.history) and (
+            response.url.path != httpx.URL(self.profile_url).path
+        )
+
+    @staticmethod
+    def extract_csrf_token(soup: HTMLParser) -> Optional[str]:
+        """
+        Extract the CSRF token from the meta tag of a PESU Academy page.
+        :param soup: The parsed page
+        :return: The CSRF token, or None if the page does not have one
+        """
+        if csrf_node := soup.css_first("meta[name='csrf-token']"):
+            return csrf_node.attributes.get("content")
+        return None
+
+    def parse_csrf_response(self, response: httpx.Response) -> str:
+        """
+        Parse the CSRF token from the home page response.
+        :param response: The home page response
+        :return: The CSRF token
+        """
+        csrf_token = self.extract_csrf_token(parse_html(self.response_markup(response)))
+        if csrf_token is None:
+            raise ValueError("CSRF token not found in the response.")
+        logger.debug("CSRF token fetched: %s", csrf_token)
+        return csrf_token
+
+    def parse_login_response(self, response: httpx.Response) -> bool:
+        """
+        Check whether the login attempt was successful.
+        :param response: The response of the login request
+        :return: True if the user was authenticated, False otherwise
+        """
+        soup = parse_html(self.response_markup(response))
+        # If class login-form is present, login failed
+        if soup.css_first("div.login-form"):
+            return False
+        # Get the newly authenticated csrf token
+        if csrf_token := self.extract_csrf_token(soup):
+            logger.debug("Authenticated CSRF token: %s", csrf_token)
+        else:
+            logger.exception("CSRF token not found in the authenticated response.")
+        return True
+
+    def parse_profile_response(
+        self, response: httpx.Response, username: str, plan: FetchPlan = FULL_PLAN
     ) -> dict[str, Any]:
         """
-        Get the profile information of the user.
-        :param client: The httpx client session to use for making requests
+        Parse the profile information from the student profile page.
+        :param response: The profile page response
         :param username: The username of the user
+        :param plan: Which parts of the page to extract. Defaults to the complete profile.
         :return: The profile information
         """
-        try:
-            # Fetch the profile data from the student profile page
-            logging.info(
-                f"Fetching profile data for user={username} from the student profile page..."
-            )
-            profile_url = (
-                "https://www.pesuacademy.com/Academy/s/studentProfilePESUAdmin"
+        page = self.profile_parser.extract(
+            self.response_markup(response), plan.details, plan.contact
+        )
+        if page.login_form:
+            raise ValueError(
+                "Profile page not accessible. PESU Academy returned the login page."
             )
-            query = {
-                "menuId": "670",
-                "url": "studentProfilePESUAdmin",
-                "controllerMode": "6414",
-                "actionType": "5",
-                "id": "0",
-                "selectedData": "0",
-                "_": str(int(datetime.now().timestamp() * 1000)),
-            }
-            response = client.get(profile_url, params=query)
-            # If the status code is not 200, raise an exception because the profile page is not accessible
-            if response.status_code != 200:
-                raise Exception(
-                    "Unable to fetch profile data. Profile page not accessible."
-                )
-            logging.debug("Profile data fetched successfully.")
-            # Parse the response text
-            soup = HTMLParser(response.text)
-
-        except Exception:
-            logging.exception("Unable to fetch profile data.")
-            return {"error": f"Unable to fetch profile data: {traceback.format_exc()}"}
-
         profile = dict()
-        for div in soup.css("div.form-group")[:7]:
-            text = div.text().strip()
-            logging.debug(f"Processing profile element: {text}")
+        for text in page.form_groups:
+            text = text.strip()
             if text.startswith("PESU Id"):
                 key = "pesu_id"
                 value = text.split()[-1]
@@ -77,7 +313,6 @@ class PESUAcademy:
                 key, value = text.split(" ", 1)
                 key = "_".join(key.split()).lower()
             value = value.strip()
-            logging.debug(f"Extracted key: '{key}' with value: '{value}'")
             if key in [
                 "name",
                 "srn",
@@ -92,28 +327,240 @@ class PESUAcademy:
                 ):
                     profile["branch_short_code"] = branch_short_code
                 key = "prn" if key == "pesu_id" else key
-                logging.debug(f"Adding key: '{key}', value: '{value}' to profile...")
                 profile[key] = value
 
-        # Get the email and phone number from the profile page
-        if email_node := soup.css_first("#updateMail"):
-            if email_value := email_node.attributes.get("value"):
+        # Get the email and phone number from the profile page. Lexbor reads an empty value attribute as an empty
+        # string, which is taken as None like Modest does.
+        if "updateMail" in page.contact_inputs:
+            if email_value := page.contact_inputs["updateMail"] or None:
                 email_value = email_value.strip()
             profile["email"] = email_value
-        if phone_node := soup.css_first("#updateContact"):
-            if phone_value := phone_node.attributes.get("value"):
+        if "updateContact" in page.contact_inputs:
+            if phone_value := page.contact_inputs["updateContact"] or None:
                 phone_value = phone_value.strip()
             profile["phone"] = phone_value
 
-        # if username starts with PES1, then they are from RR campus, else if it is PES2, then EC campus
-        if campus_code_match := re.match(r"PES(\d)", profile["prn"]):
-            campus_code = campus_code_match.group(1)
-            profile["campus_code"] = int(campus_code)
-            profile["campus"] = "RR" if campus_code == "1" else "EC"
+        # The campus is derived from the PRN on the page, or from the username if the profile details were not needed
+        if plan.details:
+            profile.update(campus_from_prn(profile["prn"]))
+        elif plan.campus is not None:
+            profile.update(plan.campus)
+
+        logger.info("Complete profile information retrieved for user=%s.", username)
+        logger.debug("Profile of user=%s: %s", username, profile)
+        return profile
+
+    @staticmethod
+    def filter_profile_fields(
+        profile: dict[str, Any], fields: list[str]
+    ) -> dict[str, Any]:
+        """
+        Keep only the requested fields of the profile.
+        :param profile: The profile information
+        :param fields: The fields to keep
+        :return: The filtered profile information
+        """
+        return {key: value for key, value in profile.items() if key in fields}
+
 
-        logging.info(
-            f"Complete profile information retrieved for user={username}: {profile}"
+class PESUAcademy(BasePESUAcademy):
+    """
+    Class to interact with the PESU Academy website.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        session_pool_size: int = 0,
+        session_max_age: float = 300.0,
+        session_store_size: int = 0,
+        session_ttl: float = 300.0,
+        base_url: str = PESUAcademyConstants.BASE_URL,
+        parser_backend: str = "modest",
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize the PESU Academy client with a pooled upstream transport.
+        The transport is shared by every authentication request made through this instance, so TCP and TLS
+        connections to PESU Academy are reused. Each request still gets its own client and cookie jar.
+        :param max_connections: Maximum number of concurrent upstream connections
+        :param max_keepalive_connections: Maximum number of idle connections kept alive in the pool
+        :param keepalive_expiry: Seconds after which an idle pooled connection is closed
+        :param http2: Whether to negotiate HTTP/2 with the upstream. Requires the httpx[http2] extra.
+        :param session_pool_size: Number of pre-warmed anonymous sessions to keep ready. Disabled if 0.
+        :param session_max_age: Seconds after which a pre-warmed anonymous session is discarded
+        :param session_store_size: Maximum number of logged in sessions kept for reuse with a session token. Disabled if
+            0.
+        :param session_ttl: Seconds after the login for which a kept session can be used
+        :param base_url: Base URL of PESU Academy, or of a local stand-in for testing
+        :param parser_backend: The selectolax backend to parse the profile page with, either modest or lexbor
+        :param circuit_breaker: Circuit breaker that fails calls fast while PESU Academy is degraded. Disabled if None.
+        """
+        super().__init__(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            http2=http2,
+            base_url=base_url,
+            parser_backend=parser_backend,
+            circuit_breaker=circuit_breaker,
         )
+        self.transport = SharedTransport(
+            httpx.HTTPTransport(limits=self.limits, http2=http2)
+        )
+        self.session_pool = (
+            AnonymousSessionPool(
+                self.create_anonymous_session,
+                size=session_pool_size,
+                max_age=session_max_age,
+            )
+            if session_pool_size > 0
+            else None
+        )
+        self.session_store = (
+            SessionStore(ttl=session_ttl, max_sessions=session_store_size)
+            if session_store_size > 0
+            else None
+        )
+
+    def create_client(self) -> httpx.Client:
+        """
+        Create a new client session backed by the shared connection pool.
+        The client has its own cookie jar, so sessions never leak between users.
+        :return: The httpx client session
+        """
+        return httpx.Client(
+            transport=self.transport,
+            follow_redirects=True,
+            timeout=httpx.Timeout(10.0),
+        )
+
+    def close(self) -> None:
+        """
+        Stop the anonymous session pool, end the kept sessions and close the shared connection pool.
+        """
+        if self.session_pool:
+            self.session_pool.stop()
+        if self.session_store:
+            self.session_store.clear()
+        self.transport.shutdown()
+
+    def fetch_csrf_token(
+        self, client: httpx.Client, timeout: Any = httpx.USE_CLIENT_DEFAULT
+    ) -> str:
+        """
+        Load the home page to get the CSRF token assigned to the client session.
+        :param client: The httpx client session to use for making requests
+        :param timeout: Timeout of the request. Defaults to the timeout of the client.
+        :return: The CSRF token
+        """
+        response = client.get(
+            self.home_url, timeout=timeout, extensions={PAGE_MARKERS: CSRF_MARKERS}
+        )
+        return self.parse_csrf_response(response)
+
+    def create_anonymous_session(self) -> AnonymousSession:
+        """
+        Create a new anonymous session that is ready to log in, for the pre-warmed session pool.
+        :return: The session cookies and CSRF token
+        """
+        with self.create_client() as client:
+            csrf_token = self.fetch_csrf_token(client)
+            return AnonymousSession(
+                cookies=httpx.Cookies(client.cookies), csrf_token=csrf_token
+            )
+
+    def login(
+        self,
+        client: httpx.Client,
+        csrf_token: str,
+        username: str,
+        password: str,
+        timeout: Any = httpx.USE_CLIENT_DEFAULT,
+    ) -> httpx.Response:
+        """
+        Submit the login form.
+        :param client: The httpx client session to use for making requests
+        :param csrf_token: The CSRF token of the client session
+        :param username: Username of the user
+        :param password: Password of the user
+        :param timeout: Timeout of the request. Defaults to the timeout of the client.
+        :return: The response of the login request
+        """
+        # Prepare the login data for auth call
+        data = {
+            "_csrf": csrf_token,
+            "j_username": username,
+            "j_password": password,
+        }
+        return client.post(
+            self.login_url,
+            data=data,
+            timeout=timeout,
+            extensions={PAGE_MARKERS: LOGIN_MARKERS},
+        )
+
+    def get_profile_information(
+        self,
+        client: httpx.Client,
+        username: str,
+        timer: Optional[PhaseTimer] = None,
+        deadline: Optional[Deadline] = None,
+        plan: FetchPlan = FULL_PLAN,
+    ) -> dict[str, Any]:
+        """
+        Get the profile information of the user.
+        :param client: The httpx client session to use for making requests
+        :param username: The username of the user
+        :param timer: Timings of the request, to record the profile fetch and parse phases in
+        :param deadline: Deadline of the request. The profile request uses whatever is left of it.
+        :param plan: Which pages and extraction steps the requested fields need. Defaults to the complete profile.
+        :return: The profile information
+        :raises DeadlineExceededError: If the deadline ran out before the profile page was fetched
+        """
+        if not plan.fetch_profile_page:
+            logger.info(
+                "Requested profile fields of user=%s do not need the profile page.",
+                username,
+            )
+            return dict(plan.campus or {})
+        timer = PhaseTimer() if timer is None else timer
+        start = time.perf_counter()
+        try:
+            # Fetch the profile data from the student profile page
+            logger.info(
+                "Fetching profile data for user=%s from the student profile page...",
+                username,
+            )
+            response = client.get(
+                self.profile_url,
+                params=self.get_profile_query(),
+                timeout=self.call_timeout(deadline),
+                extensions={
+                    PAGE_MARKERS: PageMarkers.for_profile(plan.details, plan.contact)
+                },
+            )
+            timer.record(metrics.PROFILE, start)
+            # If the status code is not 200, or the request was redirected to the login page because the session has
+            # ended, raise an exception because the profile page is not accessible
+            if response.status_code != 200 or self.redirected_from_profile(response):
+                raise Exception(
+                    "Unable to fetch profile data. Profile page not accessible."
+                )
+            logger.debug("Profile data fetched successfully.")
+        except Exception as e:
+            timer.record(metrics.PROFILE, start)
+            if self.deadline_exceeded(e, deadline):
+                raise DeadlineExceededError(deadline.seconds) from e
+            logger.exception("Unable to fetch profile data.")
+            return {"error": f"Unable to fetch profile data: {traceback.format_exc()}"}
+
+        start = time.perf_counter()
+        profile = self.parse_profile_response(response, username, plan)
+        timer.record(metrics.PARSE, start)
         return profile
 
     def authenticate(
@@ -122,6 +569,9 @@ class PESUAcademy:
         password: str,
         profile: bool = False,
         fields: Optional[list[str]] = None,
+        timer: Optional[PhaseTimer] = None,
+        deadline: Optional[Deadline] = None,
+        keep_session: bool = False,
     ) -> dict[str, Any]:
         """
         Authenticate the user with the provided username and password.
@@ -129,33 +579,89 @@ class PESUAcademy:
         :param password: Password of the user
         :param profile: Whether to fetch the profile information or not
         :param fields: The fields to fetch from the profile and know your class and section data. Defaults to all fields if not provided.
+        :param timer: Timings of the request, to record each phase and the outcome in
+        :param deadline: End-to-end deadline of the request, split across the upstream calls. Without one, each call
+            gets the timeout of the client.
+        :param keep_session: Whether to keep the logged in session and return a token for it, if the session store is
+            enabled
         :return: The authentication result
+        :raises CircuitOpenError: If the circuit breaker is open
+        :raises DeadlineExceededError: If the deadline ran out before the login completed
         """
-        # Create a new client session
-        client = httpx.Client(follow_redirects=True, timeout=httpx.Timeout(10.0))
+        timer = PhaseTimer() if timer is None else timer
+        probe = self.admit_upstream_call(timer)
+        start = time.perf_counter()
+        try:
+            return self.authenticate_upstream(
+                username, password, profile, fields, timer, deadline, keep_session
+            )
+        finally:
+            self.record_upstream_call(probe, timer, start)
+
+    def authenticate_upstream(
+        self,
+        username: str,
+        password: str,
+        profile: bool,
+        fields: Optional[list[str]],
+        timer: PhaseTimer,
+        deadline: Optional[Deadline] = None,
+        keep_session: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Log in to PESU Academy and fetch the profile, without going through the circuit breaker.
+        :param username: Username of the user
+        :param password: Password of the user
+        :param profile: Whether to fetch the profile information or not
+        :param fields: The fields to fetch from the profile. Defaults to all fields if not provided.
+        :param timer: Timings of the request, to record each phase and the outcome in
+        :param deadline: End-to-end deadline of the request, or None to use the timeout of the client for each call
+        :param keep_session: Whether to keep the logged in session and return a token for it, if the session store is
+            enabled
+        :return: The authentication result
+        :raises DeadlineExceededError: If the deadline ran out before the login completed
+        """
+        # Create a new client session on top of the shared connection pool
+        client = self.create_client()
         # Default fields to fetch if fields is not provided
         fields = PESUAcademyConstants.DEFAULT_FIELDS if fields is None else fields
         # check if fields is not the default fields and enable field filtering
         field_filtering = fields != PESUAcademyConstants.DEFAULT_FIELDS
 
-        logging.info(
-            f"Connecting to PESU Academy with user={username}, profile={profile}, fields={fields} ..."
+        logger.info(
+            "Connecting to PESU Academy with user=%s, profile=%s, fields=%s ...",
+            username,
+            profile,
+            fields,
         )
+        # Use a pre-warmed anonymous session if one is available, to skip loading the home page
+        session = self.session_pool.acquire() if self.session_pool else None
+        start = time.perf_counter()
         try:
-            # Get the initial csrf token assigned to the user session when the home page is loaded
-            logging.debug("Fetching CSRF token from the home page...")
-            home_url = "https://www.pesuacademy.com/Academy/"
-            response = client.get(home_url)
-            soup = HTMLParser(response.text)
-            # extract the csrf token from the meta tag
-            if csrf_node := soup.css_first("meta[name='csrf-token']"):
-                csrf_token = csrf_node.attributes.get("content")
-                logging.debug(f"CSRF token fetched: {csrf_token}")
+            if session:
+                logger.debug("Using a pre-warmed anonymous session from the pool...")
+                client.cookies = session.cookies
+                csrf_token = session.csrf_token
             else:
-                raise ValueError("CSRF token not found in the response.")
+                # Get the initial csrf token assigned to the user session when the home page is loaded
+                logger.debug("Fetching CSRF token from the home page...")
+                csrf_token = self.fetch_csrf_token(
+                    client, self.call_timeout(deadline, self.CSRF_DEADLINE_SHARE)
+                )
+                timer.record(metrics.CSRF, start)
         except Exception as e:
             # Log the error and return the error message
-            logging.exception("Unable to fetch csrf token.")
+            timer.record(metrics.CSRF, start)
+            if self.deadline_exceeded(e, deadline):
+                timer.finish(metrics.DEADLINE_EXCEEDED)
+                logger.warning(
+                    "Deadline exceeded while fetching the CSRF token for user=%s.",
+                    username,
+                )
+                client.close()
+                raise DeadlineExceededError(deadline.seconds) from e
+            timer.finish(metrics.CSRF_FAILURE)
+            logger.exception("Unable to fetch csrf token.")
             client.close()
             return {
                 "status": False,
@@ -163,23 +669,44 @@ class PESUAcademy:
                 "error": str(e),
             }
 
-        # Prepare the login data for auth call
-        data = {
-            "_csrf": csrf_token,
-            "j_username": username,
-            "j_password": password,
-        }
-
+        start = time.perf_counter()
         try:
-            logging.debug("Attempting to authenticate user...")
+            logger.debug("Attempting to authenticate user...")
             # Make a post request to authenticate the user
-            auth_url = "https://www.pesuacademy.com/Academy/j_spring_security_check"
-            response = client.post(auth_url, data=data)
-            soup = HTMLParser(response.text)
-            logging.debug("Authentication response received.")
+            response = self.login(
+                client, csrf_token, username, password, self.call_timeout(deadline)
+            )
+            authenticated = self.parse_login_response(response)
+            if session and response.status_code == 403:
+                # PESU Academy rejects a stale pooled CSRF token with a 403. Retry once with a fresh token. A login page
+                # means a wrong password, which is not retried, so that failed logins cost no more than without the
+                # pool.
+                logger.warning(
+                    "Pre-warmed session was rejected. Retrying with a fresh CSRF token..."
+                )
+                self.session_pool.record_stale()
+                client.cookies.clear()
+                csrf_token = self.fetch_csrf_token(
+                    client, self.call_timeout(deadline, self.CSRF_DEADLINE_SHARE)
+                )
+                response = self.login(
+                    client, csrf_token, username, password, self.call_timeout(deadline)
+                )
+                authenticated = self.parse_login_response(response)
+            # Drop the login page before the profile page is fetched, so that one document is alive at a time
+            del response
+            logger.debug("Authentication response received.")
+            timer.record(metrics.LOGIN, start)
         except Exception as e:
             # Log the error and return the error message
-            logging.exception("Unable to authenticate.")
+            timer.record(metrics.LOGIN, start)
+            if self.deadline_exceeded(e, deadline):
+                timer.finish(metrics.DEADLINE_EXCEEDED)
+                logger.warning("Deadline exceeded while logging in user=%s.", username)
+                client.close()
+                raise DeadlineExceededError(deadline.seconds) from e
+            timer.finish(metrics.UPSTREAM_ERROR)
+            logger.exception("Unable to authenticate.")
             client.close()
             return {
                 "status": False,
@@ -187,10 +714,10 @@ class PESUAcademy:
                 "error": str(e),
             }
 
-        # If class login-form is present, login failed
-        if soup.css_first("div.login-form"):
+        if not authenticated:
             # Log the error and return the error message
-            logging.error("Login unsuccessful. Invalid username or password.")
+            timer.finish(metrics.INVALID_CREDENTIALS)
+            logger.error("Login unsuccessful. Invalid username or password.")
             client.close()
             return {
                 "status": False,
@@ -198,37 +725,390 @@ class PESUAcademy:
             }
 
         # If the user is successfully authenticated
-        logging.info(f"Login successful for user={username}.")
-        status = True
-        # Get the newly authenticated csrf token
-        if csrf_node := soup.css_first("meta[name='csrf-token']"):
-            csrf_token = csrf_node.attributes.get("content")
-            logging.debug(f"Authenticated CSRF token: {csrf_token}")
-        else:
-            logging.exception("CSRF token not found in the authenticated response.")
-
-        result = {"status": status, "message": "Login successful."}
+        logger.info("Login successful for user=%s.", username)
+        result = {"status": True, "message": "Login successful."}
 
         if profile:
-            logging.info(
-                f"Profile data requested for user={username}. Fetching profile data..."
+            logger.info(
+                "Profile data requested for user=%s. Fetching profile data...",
+                username,
             )
-            # Fetch the profile information
-            result["profile"] = self.get_profile_information(client, username)
+            try:
+                # Fetch the profile information
+                result["profile"] = self.get_profile_information(
+                    client,
+                    username,
+                    timer,
+                    deadline,
+                    plan_profile_fetch(username, fields),
+                )
+            except DeadlineExceededError:
+                # The login itself succeeded, so report it without the profile rather than failing the request
+                logger.warning(
+                    "Deadline exceeded while fetching the profile of user=%s. Returning without the profile.",
+                    username,
+                )
+                result["message"] = self.PROFILE_DEADLINE_MESSAGE
             # Filter the fields if field filtering is enabled
-            if field_filtering:
-                result["profile"] = {
-                    key: value
-                    for key, value in result["profile"].items()
-                    if key in fields
-                }
-                logging.info(
-                    f"Field filtering enabled. Filtered profile data for user={username}: {result['profile']}"
+            if field_filtering and "profile" in result:
+                result["profile"] = self.filter_profile_fields(
+                    result["profile"], fields
+                )
+                logger.debug(
+                    "Field filtering enabled. Filtered profile data for user=%s: %s",
+                    username,
+                    result["profile"],
                 )
 
-        logging.info(
-            f"Authentication process for user={username} completed successfully."
+        logger.info(
+            "Authentication process for user=%s completed successfully.", username
         )
+        timer.finish(metrics.SUCCESS)
+        if keep_session and self.session_store is not None:
+            # The store closes the client session once the token expires
+            result["session_token"] = self.session_store.create(username, client)
+            result["session_expires_in"] = int(self.session_store.ttl)
+            return result
         # Close the client session and return the result
         client.close()
         return result
+
+    def get_session_profile(
+        self,
+        token: str,
+        timer: Optional[PhaseTimer] = None,
+        deadline: Optional[Deadline] = None,
+        fields: Optional[list[str]] = None,
+    ) -> Optional[dict[str, Any]]:
+        """
+        Fetch the profile information over a session kept from an earlier login, without logging in again.
+        :param token: The session token returned by authenticate()
+        :param timer: Timings of the request, to record the profile phases and the outcome in
+        :param deadline: Deadline of the request, or None to use the timeout of the client
+        :param fields: The profile fields to fetch. Defaults to all fields if not provided.
+        :return: The profile information, or None if the token is unknown or has expired
+        :raises CircuitOpenError: If the circuit breaker is open
+        :raises DeadlineExceededError: If the deadline ran out before the profile page was fetched
+        """
+        session = self.session_store.get(token) if self.session_store else None
+        if session is None:
+            return None
+        timer = PhaseTimer() if timer is None else timer
+        probe = self.admit_upstream_call(timer)
+        start = time.perf_counter()
+        try:
+            try:
+                profile = self.get_profile_information(
+                    session.client,
+                    session.username,
+                    timer,
+                    deadline,
+                    plan_profile_fetch(session.username, fields),
+                )
+            except DeadlineExceededError:
+                timer.finish(metrics.DEADLINE_EXCEEDED)
+                raise
+            except Exception:
+                # PESU Academy answers with the login page once it has ended the session
+                logger.exception("Unable to parse profile data.")
+                profile = {
+                    "error": f"Unable to fetch profile data: {traceback.format_exc()}"
+                }
+            if "error" in profile:
+                timer.finish(metrics.UPSTREAM_ERROR)
+                # The session may no longer be accepted, so do not hand it out again
+                self.session_store.remove(token)
+            else:
+                timer.finish(metrics.SUCCESS)
+            return profile
+        finally:
+            self.record_upstream_call(probe, timer, start)
+
+
+class AsyncPESUAcademy(BasePESUAcademy):
+    """
+    Asyncio twin of PESUAcademy built on httpx.AsyncClient.
+    It makes the same CSRF, login and profile requests and returns the same results, without blocking a thread
+    for each in-flight login.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        base_url: str = PESUAcademyConstants.BASE_URL,
+        parser_backend: str = "modest",
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize the async PESU Academy client with a pooled upstream transport.
+        :param max_connections: Maximum number of concurrent upstream connections
+        :param max_keepalive_connections: Maximum number of idle connections kept alive in the pool
+        :param keepalive_expiry: Seconds after which an idle pooled connection is closed
+        :param http2: Whether to negotiate HTTP/2 with the upstream. Requires the httpx[http2] extra.
+        :param base_url: Base URL of PESU Academy, or of a local stand-in for testing
+        :param parser_backend: The selectolax backend to parse the profile page with, either modest or lexbor
+        :param circuit_breaker: Circuit breaker that fails calls fast while PESU Academy is degraded. Disabled if None.
+        """
+        super().__init__(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            http2=http2,
+            base_url=base_url,
+            parser_backend=parser_backend,
+            circuit_breaker=circuit_breaker,
+        )
+        self.transport = AsyncSharedTransport(
+            httpx.AsyncHTTPTransport(limits=self.limits, http2=http2)
+        )
+
+    def create_client(self) -> httpx.AsyncClient:
+        """
+        Create a new async client session backed by the shared connection pool.
+        The client has its own cookie jar, so sessions never leak between users.
+        :return: The httpx async client session
+        """
+        return httpx.AsyncClient(
+            transport=self.transport,
+            follow_redirects=True,
+            timeout=httpx.Timeout(10.0),
+        )
+
+    async def close(self) -> None:
+        """
+        Close the shared connection pool.
+        """
+        await self.transport.shutdown()
+
+    async def get_profile_information(
+        self,
+        client: httpx.AsyncClient,
+        username: str,
+        timer: Optional[PhaseTimer] = None,
+        deadline: Optional[Deadline] = None,
+        plan: FetchPlan = FULL_PLAN,
+    ) -> dict[str, Any]:
+        """
+        Get the profile information of the user.
+        :param client: The httpx async client session to use for making requests
+        :param username: The username of the user
+        :param timer: Timings of the request, to record the profile fetch and parse phases in
+        :param deadline: Deadline of the request. The profile request uses whatever is left of it.
+        :param plan: Which pages and extraction steps the requested fields need. Defaults to the complete profile.
+        :return: The profile information
+        :raises DeadlineExceededError: If the deadline ran out before the profile page was fetched
+        """
+        if not plan.fetch_profile_page:
+            logger.info(
+                "Requested profile fields of user=%s do not need the profile page.",
+                username,
+            )
+            return dict(plan.campus or {})
+        timer = PhaseTimer() if timer is None else timer
+        start = time.perf_counter()
+        try:
+            logger.info(
+                "Fetching profile data for user=%s from the student profile page...",
+                username,
+            )
+            response = await client.get(
+                self.profile_url,
+                params=self.get_profile_query(),
+                timeout=self.call_timeout(deadline),
+                extensions={
+                    PAGE_MARKERS: PageMarkers.for_profile(plan.details, plan.contact)
+                },
+            )
+            timer.record(metrics.PROFILE, start)
+            if response.status_code != 200 or self.redirected_from_profile(response):
+                raise Exception(
+                    "Unable to fetch profile data. Profile page not accessible."
+                )
+            logger.debug("Profile data fetched successfully.")
+        except Exception as e:
+            timer.record(metrics.PROFILE, start)
+            if self.deadline_exceeded(e, deadline):
+                raise DeadlineExceededError(deadline.seconds) from e
+            logger.exception("Unable to fetch profile data.")
+            return {"error": f"Unable to fetch profile data: {traceback.format_exc()}"}
+
+        start = time.perf_counter()
+        profile = self.parse_profile_response(response, username, plan)
+        timer.record(metrics.PARSE, start)
+        return profile
+
+    async def authenticate(
+        self,
+        username: str,
+        password: str,
+        profile: bool = False,
+        fields: Optional[list[str]] = None,
+        timer: Optional[PhaseTimer] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> dict[str, Any]:
+        """
+        Authenticate the user with the provided username and password.
+        :param username: Username of the user, usually their PRN/email/phone number
+        :param password: Password of the user
+        :param profile: Whether to fetch the profile information or not
+        :param fields: The fields to fetch from the profile and know your class and section data. Defaults to all fields if not provided.
+        :param timer: Timings of the request, to record each phase and the outcome in
+        :param deadline: End-to-end deadline of the request, split across the upstream calls. Without one, each call
+            gets the timeout of the client.
+        :return: The authentication result
+        :raises CircuitOpenError: If the circuit breaker is open
+        :raises DeadlineExceededError: If the deadline ran out before the login completed
+        """
+        timer = PhaseTimer() if timer is None else timer
+        probe = self.admit_upstream_call(timer)
+        start = time.perf_counter()
+        try:
+            return await self.authenticate_upstream(
+                username, password, profile, fields, timer, deadline
+            )
+        finally:
+            self.record_upstream_call(probe, timer, start)
+
+    async def authenticate_upstream(
+        self,
+        username: str,
+        password: str,
+        profile: bool,
+        fields: Optional[list[str]],
+        timer: PhaseTimer,
+        deadline: Optional[Deadline] = None,
+    ) -> dict[str, Any]:
+        """
+        Log in to PESU Academy and fetch the profile, without going through the circuit breaker.
+        :param username: Username of the user
+        :param password: Password of the user
+        :param profile: Whether to fetch the profile information or not
+        :param fields: The fields to fetch from the profile. Defaults to all fields if not provided.
+        :param timer: Timings of the request, to record each phase and the outcome in
+        :param deadline: End-to-end deadline of the request, or None to use the timeout of the client for each call
+        :return: The authentication result
+        :raises DeadlineExceededError: If the deadline ran out before the login completed
+        """
+        fields = PESUAcademyConstants.DEFAULT_FIELDS if fields is None else fields
+        field_filtering = fields != PESUAcademyConstants.DEFAULT_FIELDS
+
+        logger.info(
+            "Connecting to PESU Academy with user=%s, profile=%s, fields=%s ...",
+            username,
+            profile,
+            fields,
+        )
+        async with self.create_client() as client:
+            start = time.perf_counter()
+            try:
+                logger.debug("Fetching CSRF token from the home page...")
+                response = await client.get(
+                    self.home_url,
+                    timeout=self.call_timeout(deadline, self.CSRF_DEADLINE_SHARE),
+                    extensions={PAGE_MARKERS: CSRF_MARKERS},
+                )
+                csrf_token = self.parse_csrf_response(response)
+                # Drop the home page before the login request, so that one document is alive at a time
+                del response
+                timer.record(metrics.CSRF, start)
+            except Exception as e:
+                timer.record(metrics.CSRF, start)
+                if self.deadline_exceeded(e, deadline):
+                    timer.finish(metrics.DEADLINE_EXCEEDED)
+                    logger.warning(
+                        "Deadline exceeded while fetching the CSRF token for user=%s.",
+                        username,
+                    )
+                    raise DeadlineExceededError(deadline.seconds) from e
+                timer.finish(metrics.CSRF_FAILURE)
+                logger.exception("Unable to fetch csrf token.")
+                return {
+                    "status": False,
+                    "message": "Unable to fetch csrf token.",
+                    "error": str(e),
+                }
+
+            data = {
+                "_csrf": csrf_token,
+                "j_username": username,
+                "j_password": password,
+            }
+
+            start = time.perf_counter()
+            try:
+                logger.debug("Attempting to authenticate user...")
+                response = await client.post(
+                    self.login_url,
+                    data=data,
+                    timeout=self.call_timeout(deadline),
+                    extensions={PAGE_MARKERS: LOGIN_MARKERS},
+                )
+                logger.debug("Authentication response received.")
+                authenticated = self.parse_login_response(response)
+                # Drop the login page before the profile page is fetched
+                del response
+                timer.record(metrics.LOGIN, start)
+            except Exception as e:
+                timer.record(metrics.LOGIN, start)
+                if self.deadline_exceeded(e, deadline):
+                    timer.finish(metrics.DEADLINE_EXCEEDED)
+                    logger.warning(
+                        "Deadline exceeded while logging in user=%s.", username
+                    )
+                    raise DeadlineExceededError(deadline.seconds) from e
+                timer.finish(metrics.UPSTREAM_ERROR)
+                logger.exception("Unable to authenticate.")
+                return {
+                    "status": False,
+                    "message": "Unable to authenticate.",
+                    "error": str(e),
+                }
+
+            if not authenticated:
+                timer.finish(metrics.INVALID_CREDENTIALS)
+                logger.error("Login unsuccessful. Invalid username or password.")
+                return {
+                    "status": False,
+                    "message": "Invalid username or password, or the user does not exist.",
+                }
+
+            logger.info("Login successful for user=%s.", username)
+            result = {"status": True, "message": "Login successful."}
+
+            if profile:
+                logger.info(
+                    "Profile data requested for user=%s. Fetching profile data...",
+                    username,
+                )
+                try:
+                    result["profile"] = await self.get_profile_information(
+                        client,
+                        username,
+                        timer,
+                        deadline,
+                        plan_profile_fetch(username, fields),
+                    )
+                except DeadlineExceededError:
+                    logger.warning(
+                        "Deadline exceeded while fetching the profile of user=%s. Returning without the profile.",
+                        username,
+                    )
+                    result["message"] = self.PROFILE_DEADLINE_MESSAGE
+                if field_filtering and "profile" in result:
+                    result["profile"] = self.filter_profile_fields(
+                        result["profile"], fields
+                    )
+                    logger.debug(
+                        "Field filtering enabled. Filtered profile data for user=%s: %s",
+                        username,
+                        result["profile"],
+                    )
+
+        timer.finish(metrics.SUCCESS)
+        logger.info(
+            "Authentication process for user=%s completed successfully.", username
+        )
+        return result
@@ -0,0 +1,105 @@
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from selectolax.lexbor import LexborHTMLParser
+from selectolax.parser import HTMLParser
+
+# selectolax parser backends that the profile page can be parsed with
+BACKENDS = {"modest": HTMLParser, "lexbor": LexborHTMLParser}
+
+# Number of div.form-group elements at the top of the profile page that hold the profile details
+PROFILE_FORM_GROUPS = 7
+# IDs of the inputs of the update contact form that hold the email address and phone number
+CONTACT_INPUT_IDS = ("updateMail", "updateContact")
+
+
+def parse_html(
+    markup: Union[str, bytes], backend: str = "modest"
+) -> Union[HTMLParser, LexborHTMLParser]:
+    """
+    Parse a document with a selectolax backend.
+    Bytes are read as UTF-8 by both backends. Modest would otherwise guess the encoding from the markup, while the
+    encoding declared by the upstream has already been checked by the caller.
+    :param markup: The document, either decoded or as UTF-8 bytes
+    :param backend: The selectolax backend to parse the document with, either modest or lexbor
+    :return: The parsed document
+    """
+    if backend == "modest" and isinstance(markup, bytes):
+        return HTMLParser(markup, detect_encoding=False)
+    return BACKENDS[backend](markup)
+
+
+@dataclass
+class ProfilePage:
+    """
+    The raw profile details extracted from the student profile page.
+    """
+
+    # Text of the first div.form-group elements, in document order
+    form_groups: list[str] = field(default_factory=list)
+    # Value attribute of each contact input that is present on the page, keyed by the input ID
+    contact_inputs: dict[str, Optional[str]] = field(default_factory=dict)
+    # Whether the page is the login page, which PESU Academy serves in place of the profile once the session has ended
+    login_form: bool = False
+
+
+class ProfilePageParser:
+    """
+    Single-pass extractor for the student profile page.
+    Walks the document once in order and stops as soon as the profile details and both contact inputs are found,
+    instead of materializing every div.form-group match and rescanning the document for each contact input.
+    """
+
+    def __init__(self, backend: str = "modest"):
+        """
+        Initialize the profile page parser.
+        :param backend: The selectolax backend to parse the page with, either modest or lexbor
+        """
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Invalid parser backend: '{backend}'. Valid backends are: {list(BACKENDS)}."
+            )
+        self.backend = backend
+
+    def extract(
+        self, html: Union[str, bytes], details: bool = True, contact: bool = True
+    ) -> ProfilePage:
+        """
+        Extract the profile details from the student profile page.
+        :param html: The profile page HTML, either decoded or as UTF-8 bytes
+        :param details: Whether to extract the profile details. If not, no div.form-group text is collected.
+        :param contact: Whether to extract the contact inputs. If not, the walk stops after the profile details.
+        :return: The text of the profile detail elements, the values of the contact inputs and whether the page is
+            the login page
+        """
+        page = ProfilePage()
+        form_groups = page.form_groups
+        contact_inputs = page.contact_inputs
+        wanted_form_groups = PROFILE_FORM_GROUPS if details else 0
+        wanted_contact_inputs = len(CONTACT_INPUT_IDS) if contact else 0
+        for node in parse_html(html, self.backend).root.traverse():
+            tag = node.tag
+            if tag == "div":
+                classes = node.attributes.get("class")
+                if not classes:
+                    continue
+                classes = classes.split()
+                if "login-form" in classes:
+                    page.login_form = True
+                    break
+                if len(form_groups) < wanted_form_groups and "form-group" in classes:
+                    form_groups.append(node.text())
+                else:
+                    continue
+            elif tag == "input" and contact:
+                node_id = node.id
+                if node_id in CONTACT_INPUT_IDS and node_id not in contact_inputs:
+                    contact_inputs[node_id] = node.attributes.get("value")
+            else:
+                continue
+            if (
+                len(form_groups) == wanted_form_groups
+                and len(contact_inputs) == wanted_contact_inputs
+            ):
+                break
+        return page
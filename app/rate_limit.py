@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class RateLimitedError(Exception):
+    """
+    Raised when a client or username has used up its token bucket.
+    """
+
+    def __init__(self, subject: str, retry_after: float):
+        """
+        Initialize the error.
+        :param subject: What was rate limited, e.g. "client" or "username"
+        :param retry_after: Seconds after which the next request would be allowed
+        """
+        super().__init__(
+            f"Too many requests for this {subject}. Retry after {math.ceil(retry_after)} seconds."
+        )
+        self.retry_after = retry_after
+
+
+class TokenBucketShard:
+    """
+    One shard of a TokenBucketLimiter: its own lock, buckets and counters, so that keys of other shards never wait on it.
+    """
+
+    __slots__ = ("lock", "buckets", "allowed", "limited", "evicted")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Key -> [tokens, time of the last refill], least recently used first
+        self.buckets: OrderedDict[Hashable, list[float]] = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket rate limiter for many keys, such as client addresses or usernames.
+    Each key gets a bucket of up to burst tokens that refills at rate tokens per second, and every request takes one
+    token. Buckets are refilled lazily when their key is seen, so idle keys cost nothing. Keys are spread over
+    independently locked shards, and each shard keeps at most max_keys / shards buckets, evicting the least recently
+    used one. An evicted key comes back with a full bucket, which is what it would have after being idle for
+    burst / rate seconds.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_keys: int = 100_000,
+        shards: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the rate limiter.
+        :param rate: Tokens added to each bucket per second
+        :param burst: Capacity of each bucket, i.e. the number of requests a key can make at once
+        :param max_keys: Maximum number of keys tracked across all shards
+        :param shards: Number of independently locked shards
+        :param clock: Monotonic clock, in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.shard_capacity = max(1, max_keys // shards)
+        self.shards = [TokenBucketShard() for _ in range(shards)]
+        self.clock = clock
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        Take a token from the bucket of a key.
+        :param key: The key to rate limit
+        :return: 0 if the request is allowed, otherwise the seconds until the bucket has a token again
+        """
+        shard = self.shards[hash(key) % len(self.shards)]
+        now = self.clock()
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                if len(shard.buckets) >= self.shard_capacity:
+                    shard.buckets.popitem(last=False)
+                    shard.evicted += 1
+                bucket = shard.buckets[key] = [float(self.burst), now]
+            else:
+                shard.buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                shard.allowed += 1
+                return 0.0
+            shard.limited += 1
+            return (1.0 - bucket[0]) / self.rate
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the rate limiter counters, summed over the shards.
+        :return: The number of tracked keys, and the number of requests allowed and limited and of keys evicted
+        """
+        stats = {"keys": 0, "allowed": 0, "limited": 0, "evicted": 0}
+        for shard in self.shards:
+            with shard.lock:
+                stats["keys"] += len(shard.buckets)
+                stats["allowed"] += shard.allowed
+                stats["limited"] += shard.limited
+                stats["evicted"] += shard.evicted
+        return stats
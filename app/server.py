@@ -0,0 +1,67 @@
+import logging
+from typing import Callable, Optional
+
+from flask import Flask
+
+logger = logging.getLogger(__name__)
+
+
+def run_gunicorn(
+    flask_app: Flask,
+    host: str,
+    port: int,
+    workers: int = 2,
+    threads: int = 8,
+    keepalive: int = 5,
+    backlog: int = 2048,
+    timeout: int = 60,
+    preload: bool = True,
+    setup: Optional[Callable[[], None]] = None,
+    post_fork: Optional[Callable[[], None]] = None,
+):
+    """
+    Serve the Flask app with gunicorn, a pre-forking production WSGI server. Requires the server extra.
+    :param flask_app: The Flask app to serve
+    :param host: The host to bind to
+    :param port: The port to bind to
+    :param workers: Number of worker processes
+    :param threads: Number of request threads per worker process
+    :param keepalive: Seconds to keep an idle client connection open
+    :param backlog: Maximum number of pending connections in the listen queue
+    :param timeout: Seconds after which a worker that stopped responding is killed and restarted
+    :param preload: Whether to run the setup once in the master process before forking the workers, instead of once
+        in every worker
+    :param setup: One-time application setup, e.g. mounting Swagger and rendering the README
+    :param post_fork: Called in every worker process after it is forked, e.g. to start background threads
+    """
+    # Imported here, since gunicorn is an optional dependency that the development server does not need
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            # The threaded worker keeps idle keep-alive connections out of the request threads
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("keepalive", keepalive)
+            self.cfg.set("backlog", backlog)
+            self.cfg.set("timeout", timeout)
+            self.cfg.set("preload_app", preload)
+            if post_fork:
+                self.cfg.set("post_worker_init", lambda worker: post_fork())
+
+        def load(self) -> Flask:
+            if setup:
+                setup()
+            return flask_app
+
+    logger.info(
+        "Starting gunicorn on %s:%s with %s workers and %s threads each, preload=%s",
+        host,
+        port,
+        workers,
+        threads,
+        preload,
+    )
+    Application().run()
@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AnonymousSession:
+    """
+    An unauthenticated PESU Academy session that is ready to log in.
+    """
+
+    cookies: httpx.Cookies
+    csrf_token: str
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class AnonymousSessionPool:
+    """
+    Bounded pool of pre-warmed anonymous sessions, kept full by a background refiller thread.
+    Taking a session from the pool lets a login start directly with the POST to j_spring_security_check instead of
+    first loading the home page for a CSRF token.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], AnonymousSession],
+        size: int,
+        max_age: float = 300.0,
+        refill_interval: float = 1.0,
+    ):
+        """
+        Initialize the session pool. Call start() at application startup to begin filling the pool.
+        :param factory: Callable that creates a new anonymous session by loading the home page
+        :param size: Maximum number of sessions kept in the pool
+        :param max_age: Seconds after which a pooled session is considered expired and discarded
+        :param refill_interval: Seconds the refiller waits between checks once the pool is full, or after a failure
+        """
+        self.factory = factory
+        self.size = size
+        self.max_age = max_age
+        self.refill_interval = refill_interval
+        self.sessions: deque[AnonymousSession] = deque()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.pid: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stale = 0
+
+    def start(self):
+        """
+        Start the background refiller thread if it is not already running in this process.
+        Threads do not survive a fork, so the refiller is also restarted in every forked worker process.
+        """
+        with self.lock:
+            if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+                return
+            if self.pid is None:
+                os.register_at_fork(after_in_child=self.after_fork)
+            self.pid = os.getpid()
+            self.sessions.clear()
+            self.stopped.clear()
+            self.thread = threading.Thread(
+                target=self.refill, name="anonymous-session-refiller", daemon=True
+            )
+            self.thread.start()
+
+    def after_fork(self):
+        """
+        Restart the refiller in a forked child process, so worker processes start with a warm pool.
+        Sessions inherited from the parent are dropped, since the parent may hand out the same sessions.
+        """
+        if self.stopped.is_set():
+            return
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.start()
+
+    def stop(self):
+        """
+        Stop the background refiller thread.
+        """
+        self.stopped.set()
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join()
+
+    def is_expired(self, session: AnonymousSession) -> bool:
+        return time.monotonic() - session.created_at >= self.max_age
+
+    def refill(self):
+        """
+        Keep the pool topped up with fresh sessions until the pool is stopped.
+        """
+        while not self.stopped.is_set():
+            with self.lock:
+                while self.sessions and self.is_expired(self.sessions[0]):
+                    self.sessions.popleft()
+                    self.expired += 1
+                missing = self.size - len(self.sessions)
+            if missing <= 0:
+                self.wakeup.wait(self.refill_interval)
+                self.wakeup.clear()
+                continue
+            try:
+                session = self.factory()
+            except Exception:
+                logger.exception("Unable to create an anonymous session for the pool.")
+                self.stopped.wait(self.refill_interval)
+                continue
+            with self.lock:
+                self.sessions.append(session)
+
+    def acquire(self) -> Optional[AnonymousSession]:
+        """
+        Take a fresh session from the pool.
+        :return: A ready-to-use anonymous session, or None if the pool is empty
+        """
+        self.start()
+        with self.lock:
+            while self.sessions:
+                session = self.sessions.popleft()
+                if self.is_expired(session):
+                    self.expired += 1
+                    continue
+                self.hits += 1
+                self.wakeup.set()
+                return session
+            self.misses += 1
+        self.wakeup.set()
+        return None
+
+    def record_stale(self):
+        """
+        Record that a pooled session was rejected by PESU Academy because its CSRF token was stale.
+        """
+        with self.lock:
+            self.stale += 1
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the pool counters, used to size the pool.
+        :return: The number of pooled sessions and the hit, miss, expiry and stale counters
+        """
+        with self.lock:
+            return {
+                "size": len(self.sessions),
+                "capacity": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "stale": self.stale,
+            }
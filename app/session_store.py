@@ -0,0 +1,147 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import httpx
+
+
+@dataclass
+class AuthenticatedSession:
+    """
+    A logged in PESU Academy session kept for later requests of the same user.
+    """
+
+    username: str
+    client: httpx.Client
+    expires_at: float
+
+
+class SessionStore:
+    """
+    In-memory store of authenticated PESU Academy sessions, looked up by opaque tokens handed out to the callers.
+    Sessions expire a fixed time after the login, and the oldest session is evicted once the store is full. The client
+    of a session is closed as soon as the session expires or is evicted.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_sessions: int = 1000,
+        close: Callable[[httpx.Client], None] = httpx.Client.close,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the session store.
+        :param ttl: Seconds after the login for which a session can be used
+        :param max_sessions: Maximum number of stored sessions. The oldest session is evicted first.
+        :param close: Callable that releases the upstream resources of a session's client
+        :param clock: Monotonic clock, in seconds
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.close = close
+        self.clock = clock
+        # Sessions by token. All sessions live for the same time, so insertion order is also expiry order.
+        self.sessions: OrderedDict[str, AuthenticatedSession] = OrderedDict()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def pop_expired(self, now: float) -> list[AuthenticatedSession]:
+        """
+        Remove the expired sessions. Must be called with the lock held.
+        :param now: The current time
+        :return: The removed sessions, to be closed once the lock is released
+        """
+        removed = []
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.expires_at > now:
+                break
+            self.sessions.popitem(last=False)
+            self.expired += 1
+            removed.append(session)
+        return removed
+
+    def release(self, sessions: list[AuthenticatedSession]):
+        for session in sessions:
+            self.close(session.client)
+
+    def create(self, username: str, client: httpx.Client) -> str:
+        """
+        Store a logged in session. The store takes ownership of the client and closes it when the session ends.
+        :param username: Username the session is logged in with
+        :param client: The client holding the authenticated cookies
+        :return: The token of the session
+        """
+        token = secrets.token_urlsafe(32)
+        now = self.clock()
+        with self.lock:
+            removed = self.pop_expired(now)
+            self.sessions[token] = AuthenticatedSession(
+                username, client, now + self.ttl
+            )
+            self.created += 1
+            while len(self.sessions) > self.max_sessions:
+                removed.append(self.sessions.popitem(last=False)[1])
+                self.evictions += 1
+        self.release(removed)
+        return token
+
+    def get(self, token: str) -> Optional[AuthenticatedSession]:
+        """
+        Look up a session.
+        :param token: The token of the session
+        :return: The session, or None if the token is unknown or the session has expired
+        """
+        with self.lock:
+            removed = self.pop_expired(self.clock())
+            session = self.sessions.get(token)
+            if session is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self.release(removed)
+        return session
+
+    def remove(self, token: str):
+        """
+        End a session before it expires, e.g. when PESU Academy no longer accepts it.
+        :param token: The token of the session
+        """
+        with self.lock:
+            session = self.sessions.pop(token, None)
+        if session is not None:
+            self.release([session])
+
+    def clear(self):
+        """
+        End every session.
+        """
+        with self.lock:
+            removed = list(self.sessions.values())
+            self.sessions.clear()
+        self.release(removed)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the session store counters.
+        :return: The number of stored sessions, the capacity, and the number of sessions created, found, not found,
+            expired and evicted
+        """
+        with self.lock:
+            return {
+                "size": len(self.sessions),
+                "capacity": self.max_sessions,
+                "created": self.created,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,118 @@
+import asyncio
+import copy
+import threading
+from collections.abc import Hashable
+from typing import Any, Awaitable, Callable, Optional
+
+
+class Call:
+    """
+    An in-flight call that other callers with the same key can wait on.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into a single execution.
+    The first caller runs the function, every concurrent caller with the same key waits for it and shares its result.
+    """
+
+    def __init__(self):
+        self.calls: dict[Hashable, Call] = dict()
+        self.lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Run the function, unless a call with the same key is already in flight, in which case wait for its result.
+        :param key: The key that identifies identical calls
+        :param function: The function to run
+        :return: A private copy of the result, so callers can modify it independently
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = Call()
+                leader = True
+                self.executed += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = function()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the coalescing counters.
+        :return: The number of calls in flight, executed and coalesced into another call
+        """
+        with self.lock:
+            return {
+                "in_flight": len(self.calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+            }
+
+
+class AsyncSingleFlight:
+    """
+    Asyncio twin of SingleFlight. Calls are coalesced on the event loop, so no lock is needed.
+    """
+
+    def __init__(self):
+        self.calls: dict[Hashable, asyncio.Future] = dict()
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await the coroutine function, unless a call with the same key is already in flight, in which case wait for
+        its result.
+        :param key: The key that identifies identical calls
+        :param function: The coroutine function to run
+        :return: A private copy of the result, so callers can modify it independently
+        """
+        future = self.calls.get(key)
+        if future is None:
+            future = self.calls[key] = asyncio.get_running_loop().create_future()
+            self.executed += 1
+            try:
+                future.set_result(await function())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                del self.calls[key]
+        else:
+            self.coalesced += 1
+        return copy.deepcopy(await asyncio.shield(future))
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the coalescing counters.
+        :return: The number of calls in flight, executed and coalesced into another call
+        """
+        return {
+            "in_flight": len(self.calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
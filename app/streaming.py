@@ -0,0 +1,326 @@
+import re
+import zlib
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional, Union
+
+import httpx
+
+from app.profile_parser import CONTACT_INPUT_IDS, PROFILE_FORM_GROUPS
+
+# Request extension that carries the PageMarkers of the page being requested
+PAGE_MARKERS = "pesu_auth.page_markers"
+# Once the markers are found, a response with at most this many bytes left is still read to the end, so that its
+# connection goes back to the pool. Larger remainders cost more to download than a new connection does.
+DRAIN_LIMIT = 64 * 1024
+
+# Comments, scripts and styles are skipped whole, so that markup inside them is never mistaken for a marker. An
+# unterminated one matches up to the end of what has been received so far.
+TAG_PATTERN = re.compile(
+    rb"<!--.*?(?:(?P<comment_end>-->)|\Z)"
+    rb"|<(?P<raw>script|style)\b.*?(?:(?P<raw_end></(?P=raw)\s*>)|\Z)"
+    rb"|<(?P<end>/?)(?P<tag>div|input|meta)\b(?P<attributes>[^>]*)>",
+    re.DOTALL | re.IGNORECASE,
+)
+ATTRIBUTE_PATTERN = re.compile(
+    rb"""(?:^|\s)(?P<name>class|id|name)\s*=\s*(?:"(?P<double>[^"]*)"|'(?P<single>[^']*)'|(?P<bare>[^\s"'>]+))""",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class PageMarkers:
+    """
+    The markers of an upstream page that decide what it parses to. Once they are found, the rest of the page is not
+    needed.
+    """
+
+    # Whether the CSRF meta tag is needed
+    csrf_token: bool = False
+    # Whether the page is settled as soon as the login form is found, which means that the login failed
+    login_form: bool = False
+    # Number of div.form-group elements that have to be complete, counted in document order
+    form_groups: int = 0
+    # IDs of the inputs that are needed
+    contact_inputs: tuple[str, ...] = ()
+
+    @classmethod
+    def for_profile(cls, details: bool, contact: bool) -> "PageMarkers":
+        """
+        Get the markers of the student profile page.
+        :param details: Whether the profile details are needed
+        :param contact: Whether the contact inputs are needed
+        :return: The markers
+        """
+        # The login page is served in place of the profile once the session has ended, and settles the page at once
+        return cls(
+            login_form=True,
+            form_groups=PROFILE_FORM_GROUPS if details else 0,
+            contact_inputs=CONTACT_INPUT_IDS if contact else (),
+        )
+
+    @property
+    def required(self) -> bool:
+        return self.csrf_token or self.form_groups > 0 or bool(self.contact_inputs)
+
+
+CSRF_MARKERS = PageMarkers(csrf_token=True)
+LOGIN_MARKERS = PageMarkers(login_form=True)
+
+
+def get_attributes(attributes: bytes) -> dict[bytes, bytes]:
+    """
+    Get the class, id and name attributes of a tag.
+    :param attributes: The bytes of the tag between its name and the closing >
+    :return: The attribute values by lowercase attribute name
+    """
+    values = {}
+    for match in ATTRIBUTE_PATTERN.finditer(attributes):
+        value = match.group("double", "single", "bare")
+        values.setdefault(
+            match.group("name").lower(), next(v for v in value if v is not None)
+        )
+    return values
+
+
+class PageScanner:
+    """
+    Incremental scanner that watches a page arrive chunk by chunk and tells when all of its markers have been seen.
+    Only the bytes after the last complete tag are kept between chunks.
+    """
+
+    def __init__(self, markers: PageMarkers):
+        """
+        Initialize the scanner.
+        :param markers: The markers to look for
+        """
+        self.markers = markers
+        self.pending = bytearray()
+        self.csrf_token = False
+        self.login_form = False
+        # Whether each open div is one of the counted form groups, innermost last
+        self.open_divs: list[bool] = []
+        self.form_groups = 0
+        self.open_form_groups = 0
+        self.contact_inputs: set[str] = set()
+        self.done = False
+
+    def visit(self, end: bool, tag: bytes, attributes: bytes):
+        """
+        Update the markers found with a complete tag.
+        :param end: Whether it is an end tag
+        :param tag: The lowercase tag name
+        :param attributes: The bytes of the tag between its name and the closing >
+        """
+        markers = self.markers
+        if tag == b"div":
+            if end:
+                if self.open_divs and self.open_divs.pop():
+                    self.open_form_groups -= 1
+                return
+            classes = get_attributes(attributes).get(b"class", b"").split()
+            counted = (
+                self.form_groups < markers.form_groups and b"form-group" in classes
+            )
+            if counted:
+                self.form_groups += 1
+                self.open_form_groups += 1
+            if markers.login_form and b"login-form" in classes:
+                self.login_form = True
+            if not attributes.rstrip().endswith(b"/"):
+                self.open_divs.append(counted)
+        elif tag == b"input" and markers.contact_inputs:
+            node_id = get_attributes(attributes).get(b"id", b"").decode("latin-1")
+            if node_id in markers.contact_inputs:
+                self.contact_inputs.add(node_id)
+        elif tag == b"meta" and markers.csrf_token:
+            if get_attributes(attributes).get(b"name") == b"csrf-token":
+                self.csrf_token = True
+
+    def settled(self) -> bool:
+        markers = self.markers
+        if self.login_form:
+            return True
+        return (
+            markers.required
+            and (self.csrf_token or not markers.csrf_token)
+            and self.form_groups == markers.form_groups
+            and self.open_form_groups == 0
+            and len(self.contact_inputs) == len(markers.contact_inputs)
+        )
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Scan the next chunk of the page.
+        :param chunk: The bytes received since the last call
+        :return: Whether every marker has been found
+        """
+        pending = self.pending
+        pending += chunk
+        position = 0
+        while not self.done:
+            match = TAG_PATTERN.search(pending, position)
+            if match is None:
+                # Keep a tag that may still be incomplete for the next chunk
+                start = pending.rfind(b"<", position)
+                position = len(pending) if start == -1 else start
+                break
+            if match.group("tag") is not None:
+                self.visit(
+                    bool(match.group("end")),
+                    match.group("tag").lower(),
+                    match.group("attributes"),
+                )
+                self.done = self.settled()
+            elif match.group("comment_end") is None and match.group("raw_end") is None:
+                # An unterminated comment or script, scanned again once more of it has arrived
+                position = match.start()
+                break
+            position = match.end()
+        del pending[:position]
+        return self.done
+
+
+class ChunkDecoder:
+    """
+    Decompresses a gzip or deflate encoded body chunk by chunk, so that the scanner sees the markup while the encoded
+    chunks are passed on to httpx, which decodes them itself.
+    """
+
+    # Content encodings that can be scanned, and the zlib window bits of each
+    WBITS = {
+        "identity": None,
+        "gzip": zlib.MAX_WBITS | 16,
+        "x-gzip": zlib.MAX_WBITS | 16,
+        "deflate": zlib.MAX_WBITS,
+    }
+
+    def __init__(self, encoding: str):
+        """
+        Initialize the decoder.
+        :param encoding: The content encoding of the body, one of WBITS
+        """
+        wbits = self.WBITS[encoding]
+        self.decompressor = None if wbits is None else zlib.decompressobj(wbits)
+        self.deflate = encoding == "deflate"
+        self.first = True
+        self.failed = False
+
+    def decode(self, chunk: bytes) -> bytes:
+        """
+        Decode the next chunk of the body.
+        :param chunk: The encoded bytes received since the last call
+        :return: The decoded bytes, or nothing if the body cannot be decoded, in which case it is read to the end and
+            httpx reports the error
+        """
+        if self.decompressor is None:
+            return chunk
+        if self.failed:
+            return b""
+        first, self.first = self.first, False
+        try:
+            return self.decompressor.decompress(chunk)
+        except zlib.error:
+            if first and self.deflate:
+                # Like httpx, fall back to a raw deflate stream without the zlib header
+                self.decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                return self.decode(chunk)
+            self.failed = True
+            return b""
+
+
+def remaining_bytes(response: httpx.Response, received: int) -> Optional[int]:
+    """
+    Get the number of bytes of a response body that have not been received yet.
+    :param response: The response
+    :param received: Bytes of the body received so far
+    :return: The bytes left, or None if the response does not declare its length
+    """
+    length = response.headers.get("Content-Length")
+    if length is None or not length.isdigit():
+        return None
+    return int(length) - received
+
+
+class ScannedStream(httpx.SyncByteStream):
+    """
+    Response body that ends as soon as the scanner has found every marker of the page. The rest of the page is then
+    only read if it is small enough to keep the connection for reuse. Otherwise the connection is closed at once.
+    """
+
+    def __init__(
+        self, response: httpx.Response, scanner: PageScanner, decoder: ChunkDecoder
+    ):
+        self.response = response
+        self.scanner = scanner
+        self.decoder = decoder
+
+    def __iter__(self) -> Iterator[bytes]:
+        received = 0
+        chunks = iter(self.response.stream)
+        for chunk in chunks:
+            received += len(chunk)
+            yield chunk
+            if self.scanner.feed(self.decoder.decode(chunk)):
+                remaining = remaining_bytes(self.response, received)
+                if remaining is not None and remaining <= DRAIN_LIMIT:
+                    for _ in chunks:
+                        pass
+                break
+
+    def close(self) -> None:
+        self.response.close()
+
+
+class AsyncScannedStream(httpx.AsyncByteStream):
+    """
+    Async counterpart of ScannedStream.
+    """
+
+    def __init__(
+        self, response: httpx.Response, scanner: PageScanner, decoder: ChunkDecoder
+    ):
+        self.response = response
+        self.scanner = scanner
+        self.decoder = decoder
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        received = 0
+        chunks = aiter(self.response.stream)
+        async for chunk in chunks:
+            received += len(chunk)
+            yield chunk
+            if self.scanner.feed(self.decoder.decode(chunk)):
+                remaining = remaining_bytes(self.response, received)
+                if remaining is not None and remaining <= DRAIN_LIMIT:
+                    async for _ in chunks:
+                        pass
+                break
+
+    async def aclose(self) -> None:
+        await self.response.aclose()
+
+
+def scan_response(
+    request: httpx.Request,
+    response: httpx.Response,
+    stream_type: Union[type[ScannedStream], type[AsyncScannedStream]],
+) -> httpx.Response:
+    """
+    Wrap the body of a response in a scanned stream, if its request carries page markers.
+    gzip and deflate bodies are scanned as they are decoded. Bodies in any other encoding are passed through whole,
+    since the markers can only be found in the decoded bytes.
+    :param request: The request
+    :param response: The response of the transport
+    :param stream_type: ScannedStream for sync transports, AsyncScannedStream for async ones
+    :return: The response with the scanned body, or the response as is
+    """
+    markers = request.extensions.get(PAGE_MARKERS)
+    encoding = response.headers.get("Content-Encoding", "identity").strip().lower()
+    if markers is None or encoding not in ChunkDecoder.WBITS:
+        return response
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response.headers,
+        stream=stream_type(response, PageScanner(markers), ChunkDecoder(encoding)),
+        extensions=response.extensions,
+    )
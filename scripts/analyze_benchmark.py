@@ -1,8 +1,79 @@
 import argparse
-import csv
-import statistics
+import sys
+from typing import Optional
+
 import numpy as np
 
+PERCENTILES = (50, 90, 95, 99)
+# Maximum number of resampled request times held in memory at once while bootstrapping
+BOOTSTRAP_BATCH_VALUES = 10_000_000
+
+
+def load_run(csv_file: str) -> dict[str, np.ndarray]:
+    """
+    Load a benchmark CSV into one NumPy array per column.
+    Rows whose status or time cannot be read are skipped. CSVs written before the start and end columns were recorded
+    are still loaded, without them.
+    Args:
+        csv_file (str): Path to the benchmark CSV file.
+    Returns:
+        dict[str, np.ndarray]: The columns of the valid rows, keyed by column name.
+    """
+    data = np.genfromtxt(
+        csv_file, delimiter=",", names=True, dtype=float, invalid_raise=False, ndmin=1
+    )
+    if data.size == 0 or data.dtype.names is None:
+        return {"status": np.empty(0), "time": np.empty(0)}
+    columns = {name: data[name] for name in data.dtype.names}
+    valid = ~(np.isnan(columns["status"]) | np.isnan(columns["time"]))
+    skipped = int((~valid).sum())
+    if skipped:
+        print(f"Skipping {skipped} row(s) that could not be read in {csv_file}")
+    return {name: column[valid] for name, column in columns.items()}
+
+
+def wall_time(run: dict[str, np.ndarray]) -> tuple[float, bool]:
+    """
+    Get the wall-clock duration of a run, from the start of its first request to the end of its last one.
+    Runs without start and end timestamps fall back to the sum of the request times, which is only the wall-clock
+    duration if the requests were sent one after another.
+    Args:
+        run (dict[str, np.ndarray]): The run, as returned by load_run.
+    Returns:
+        tuple[float, bool]: The duration in seconds, and whether it was measured from the timestamps.
+    """
+    if "start" in run and "end" in run and run["start"].size:
+        return float(run["end"].max() - run["start"].min()), True
+    return float(run["time"].sum()), False
+
+
+def summarize(run: dict[str, np.ndarray]) -> dict[str, float]:
+    """
+    Compute the summary statistics of a run.
+    Args:
+        run (dict[str, np.ndarray]): The run, as returned by load_run.
+    Returns:
+        dict[str, float]: The summary statistics, with times in seconds.
+    """
+    times = run["time"]
+    success = run["status"] == 1
+    duration, _ = wall_time(run)
+    total = times.size
+    summary = {
+        "total": total,
+        "success": int(success.sum()),
+        "success_rate": float(success.mean() * 100),
+        "avg": float(times.mean()),
+        "avg_success": float(times[success].mean()) if success.any() else float("nan"),
+        "min": float(times.min()),
+        "max": float(times.max()),
+        "wall_time": duration,
+        "throughput": total / duration if duration else float("inf"),
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(times, PERCENTILES)):
+        summary[f"p{percentile}"] = float(value)
+    return summary
+
 
 def analyze_benchmark(csv_file: str):
     """
@@ -10,66 +81,231 @@ def analyze_benchmark(csv_file: str):
     Args:
         csv_file (str): Path to the benchmark CSV file.
     """
-    success = []
-    times = []
-
-    with open(csv_file, newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                status = int(row["status"])
-                time_taken = float(row["time"])
-                success.append(status)
-                times.append(time_taken)
-            except Exception as e:
-                print(f"Skipping row due to error: {e}")
-    if not times:
+    run = load_run(csv_file)
+    if not run["time"].size:
         print("No valid benchmark data found.")
         return
 
-    total_requests = len(times)
-    success_count = sum(success)
-    failed_count = total_requests - success_count
-    success_rate = (success_count / total_requests) * 100
-
-    avg_time = sum(times) / total_requests
-    successful_times = [t for s, t in zip(success, times) if s == 1]
-    avg_success_time = (
-        sum(successful_times) / len(successful_times)
-        if successful_times
-        else float("nan")
+    summary = summarize(run)
+    _, timestamped = wall_time(run)
+    print("📊 Benchmark Summary")
+    print("-" * 40)
+    print(f"🔢 Total requests       : {summary['total']}")
+    print(f"✅ Successful requests  : {summary['success']}")
+    print(f"❌ Failed requests      : {summary['total'] - summary['success']}")
+    print(f"📈 Success rate         : {summary['success_rate']:.2f}%")
+    print(f"⏱️  Avg time/request    : {summary['avg']:.3f} sec")
+    print(f"⏱️  Avg time/successful : {summary['avg_success']:.3f} sec")
+    print(f"🔽 Min time             : {summary['min']:.3f} sec")
+    print(f"🔼 Max time             : {summary['max']:.3f} sec")
+    print(f"⏳ Median time          : {summary['p50']:.3f} sec")
+    print(f"🚀 Throughput           : {summary['throughput']:.2f} requests/sec")
+    print(f"⏰ Total time taken     : {summary['wall_time']:.3f} sec")
+    if not timestamped:
+        print(
+            "⚠️  No start/end timestamps: the total time is the sum of the request times, so the throughput of a "
+            "parallel run is underestimated"
+        )
+    print(f"📊 90th percentile time : {summary['p90']:.3f} sec")
+    print(f"📊 95th percentile time : {summary['p95']:.3f} sec")
+    print(f"📊 99th percentile time : {summary['p99']:.3f} sec")
+
+
+def resampled_percentiles(
+    times: np.ndarray, percentile: float, resamples: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Compute a percentile of bootstrap resamples of the request times.
+    Resamples are drawn in batches, so that large runs do not hold every resample in memory at once.
+    Args:
+        times (np.ndarray): Request times of the run.
+        percentile (float): The percentile to compute, between 0 and 100.
+        resamples (int): Number of bootstrap resamples.
+        rng (np.random.Generator): Random number generator.
+    Returns:
+        np.ndarray: The percentile of each resample.
+    """
+    batch = max(1, BOOTSTRAP_BATCH_VALUES // times.size)
+    return np.concatenate(
+        [
+            np.percentile(
+                rng.choice(times, size=(min(batch, resamples - start), times.size)),
+                percentile,
+                axis=1,
+            )
+            for start in range(0, resamples, batch)
+        ]
+    )
+
+
+def bootstrap_delta(
+    baseline: np.ndarray,
+    candidate: np.ndarray,
+    percentile: float,
+    resamples: int = 2000,
+    confidence: float = 0.95,
+    rng: Optional[np.random.Generator] = None,
+) -> tuple[float, float, float]:
+    """
+    Estimate the relative change of a latency percentile between two runs, with a bootstrap confidence interval.
+    Both runs are resampled with replacement, and the interval is taken from the percentiles of the resampled changes.
+    Args:
+        baseline (np.ndarray): Request times of the baseline run.
+        candidate (np.ndarray): Request times of the candidate run.
+        percentile (float): The latency percentile to compare, between 0 and 100.
+        resamples (int): Number of bootstrap resamples.
+        confidence (float): Confidence level of the interval.
+        rng (Optional[np.random.Generator]): Random number generator, for reproducible intervals.
+    Returns:
+        tuple[float, float, float]: The relative change, and the lower and upper bounds of its interval.
+    """
+    rng = rng or np.random.default_rng()
+    before = np.percentile(baseline, percentile)
+    after = np.percentile(candidate, percentile)
+    deltas = (
+        resampled_percentiles(candidate, percentile, resamples, rng)
+        / resampled_percentiles(baseline, percentile, resamples, rng)
+        - 1
     )
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(deltas, [tail, 100 - tail])
+    return float(after / before - 1), float(lower), float(upper)
 
-    min_time = min(times)
-    max_time = max(times)
-    median_time = statistics.median(times)
-    total_time = sum(times)
-    throughput = total_requests / total_time if total_time else float("inf")
 
-    p90 = np.percentile(times, 90)
-    p95 = np.percentile(times, 95)
-    p99 = np.percentile(times, 99)
+def compare_runs(
+    baseline_file: str,
+    candidate_file: str,
+    threshold: float = 0.1,
+    gate_percentiles: tuple[float, ...] = (95, 99),
+    resamples: int = 2000,
+    confidence: float = 0.95,
+    rng: Optional[np.random.Generator] = None,
+) -> list[float]:
+    """
+    Compare a candidate run with a baseline run and print the change of each percentile and of the throughput.
+    A gated percentile regresses if it slowed down by more than the threshold and the whole confidence interval of the
+    change is above zero, so that noise alone does not fail a run.
+    Args:
+        baseline_file (str): Path to the benchmark CSV file of the baseline run.
+        candidate_file (str): Path to the benchmark CSV file of the candidate run.
+        threshold (float): Relative slowdown above which a gated percentile regresses, such as 0.1 for 10%.
+        gate_percentiles (tuple[float, ...]): The percentiles that can fail the comparison.
+        resamples (int): Number of bootstrap resamples.
+        confidence (float): Confidence level of the intervals.
+        rng (Optional[np.random.Generator]): Random number generator, for reproducible intervals.
+    Returns:
+        list[float]: The gated percentiles that regressed.
+    """
+    baseline, candidate = load_run(baseline_file), load_run(candidate_file)
+    if not baseline["time"].size or not candidate["time"].size:
+        print("No valid benchmark data found.")
+        return list(gate_percentiles)
+    rng = rng or np.random.default_rng()
+    percentiles = sorted(set(PERCENTILES) | set(gate_percentiles))
+    level = f"{confidence:.0%} CI"
 
-    print("📊 Benchmark Summary")
-    print("-" * 40)
-    print(f"🔢 Total requests       : {total_requests}")
-    print(f"✅ Successful requests  : {success_count}")
-    print(f"❌ Failed requests      : {failed_count}")
-    print(f"📈 Success rate         : {success_rate:.2f}%")
-    print(f"⏱️  Avg time/request    : {avg_time:.3f} sec")
-    print(f"⏱️  Avg time/successful : {avg_success_time:.3f} sec")
-    print(f"🔽 Min time             : {min_time:.3f} sec")
-    print(f"🔼 Max time             : {max_time:.3f} sec")
-    print(f"⏳ Median time          : {median_time:.3f} sec")
-    print(f"🚀 Throughput           : {throughput:.2f} requests/sec")
-    print(f"⏰ Total time taken     : {total_time:.3f} sec")
-    print(f"📊 90th percentile time : {p90:.3f} sec")
-    print(f"📊 95th percentile time : {p95:.3f} sec")
-    print(f"📊 99th percentile time : {p99:.3f} sec")
+    print(f"🔍 {candidate_file} vs {baseline_file}")
+    print("-" * 72)
+    print(
+        f"{'metric':<12} {'baseline':>10} {'candidate':>10} {'change':>9} {level:>20}"
+    )
+    regressions = []
+    for percentile in percentiles:
+        delta, lower, upper = bootstrap_delta(
+            baseline["time"],
+            candidate["time"],
+            percentile,
+            resamples,
+            confidence,
+            rng,
+        )
+        gated = percentile in gate_percentiles
+        regressed = gated and delta > threshold and lower > 0
+        if regressed:
+            regressions.append(percentile)
+        print(
+            f"{f'p{percentile:g}':<12} {np.percentile(baseline['time'], percentile):>9.3f}s "
+            f"{np.percentile(candidate['time'], percentile):>9.3f}s {delta:>+8.1%} "
+            f"[{lower:>+7.1%}, {upper:>+7.1%}]{' ❌' if regressed else ''}"
+        )
+    before, after = summarize(baseline), summarize(candidate)
+    print(
+        f"{'throughput':<12} {before['throughput']:>8.2f}/s {after['throughput']:>8.2f}/s "
+        f"{after['throughput'] / before['throughput'] - 1:>+8.1%}"
+    )
+    print(
+        f"{'success':<12} {before['success_rate']:>9.2f}% {after['success_rate']:>9.2f}% "
+        f"{after['success_rate'] - before['success_rate']:>+7.2f}pp"
+    )
+    return regressions
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Analyze benchmark CSV output.")
-    parser.add_argument("--file", help="Path to the benchmark CSV file")
+    parser = argparse.ArgumentParser(
+        description="Analyze benchmark CSV output. Given more than one file, every run is compared with the first one, "
+        "and the exit code is non-zero if a gated percentile regressed."
+    )
+    parser.add_argument(
+        "--file",
+        nargs="+",
+        required=True,
+        help="Path to the benchmark CSV file, or the baseline followed by the runs to compare with it",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown of a gated percentile that counts as a regression (default: 0.1)",
+    )
+    parser.add_argument(
+        "--gate-percentiles",
+        type=str,
+        default="95,99",
+        help="Comma-separated percentiles that fail the comparison when they regress (default: 95,99)",
+    )
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=2000,
+        help="Number of bootstrap resamples of each confidence interval (default: 2000)",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level of the bootstrap intervals (default: 0.95)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the bootstrap resampling, for reproducible intervals",
+    )
     args = parser.parse_args()
-    analyze_benchmark(args.file)
+
+    if len(args.file) == 1:
+        analyze_benchmark(args.file[0])
+        sys.exit(0)
+
+    gate_percentiles = tuple(float(p) for p in args.gate_percentiles.split(","))
+    rng = np.random.default_rng(args.seed)
+    failed = False
+    baseline_file, *candidate_files = args.file
+    for candidate_file in candidate_files:
+        regressions = compare_runs(
+            baseline_file,
+            candidate_file,
+            args.threshold,
+            gate_percentiles,
+            args.resamples,
+            args.confidence,
+            rng,
+        )
+        if regressions:
+            failed = True
+            print(
+                f"Regression: {', '.join(f'p{p:g}' for p in regressions)} slowed down by more than "
+                f"{args.threshold:.0%}"
+            )
+        print()
+    sys.exit(1 if failed else 0)
@@ -1,36 +1,319 @@
+import math
 import os
 import time
+from typing import Optional
 
 import httpx
 import argparse
+import asyncio
 import logging
+import random
 from tqdm.auto import tqdm
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 load_dotenv()
 
+# Timeout of each request in open-loop mode, in seconds
+OPEN_LOOP_TIMEOUT = 30.0
 
-def make_request(profile: bool = True) -> tuple[dict, float]:
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear latency histogram.
+    Values are recorded in microseconds with 3 significant digits of precision over the whole range, using a fixed
+    amount of memory per power of two regardless of the number of recorded values.
+    """
+
+    SUB_BUCKET_BITS = 11
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+    def __init__(self):
+        self.counts: dict[int, int] = dict()
+        self.total = 0
+        self.sum = 0
+        self.min: Optional[int] = None
+        self.max = 0
+
+    def index(self, value: int) -> int:
+        if value < self.SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - self.SUB_BUCKET_BITS
+        sub_bucket = value >> shift
+        return (
+            self.SUB_BUCKET_COUNT
+            + (shift - 1) * self.SUB_BUCKET_HALF
+            + (sub_bucket - self.SUB_BUCKET_HALF)
+        )
+
+    def highest_equivalent_value(self, index: int) -> int:
+        if index < self.SUB_BUCKET_COUNT:
+            return index
+        shift, offset = divmod(index - self.SUB_BUCKET_COUNT, self.SUB_BUCKET_HALF)
+        shift += 1
+        return ((offset + self.SUB_BUCKET_HALF + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        """
+        Record a latency.
+        :param seconds: The latency in seconds
+        """
+        value = max(0, round(seconds * 1_000_000))
+        index = self.index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Get the latency at the given percentile.
+        :param percentile: The percentile, between 0 and 100
+        :return: The latency in seconds
+        """
+        if not self.total:
+            return float("nan")
+        target = max(1, round(percentile / 100 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.highest_equivalent_value(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def mean(self) -> float:
+        return self.sum / self.total / 1_000_000 if self.total else float("nan")
+
+
+def make_request(
+    profile: bool = True,
+    url: str = "http://localhost:5000/authenticate",
+    username: Optional[str] = None,
+    password: Optional[str] = None,
+    client: Optional[httpx.Client] = None,
+) -> tuple[dict, float, float, float]:
     """
     Make a request to the authentication endpoint and return the response and elapsed time.
     :param profile: Whether to fetch the profile information or not
-    :return: Tuple of response JSON and elapsed time in seconds
+    :param url: URL of the authentication endpoint
+    :param username: Username to authenticate with. Defaults to the TEST_PRN environment variable.
+    :param password: Password to authenticate with. Defaults to the TEST_PASSWORD environment variable.
+    :param client: Pooled client to send the request with. A new client is created if not provided.
+    :return: Tuple of response JSON, elapsed time in seconds, and the start and end times on the perf_counter clock
     """
     data = {
-        "username": os.getenv("TEST_PRN"),
-        "password": os.getenv("TEST_PASSWORD"),
+        "username": username or os.getenv("TEST_PRN"),
+        "password": password or os.getenv("TEST_PASSWORD"),
         "profile": profile,
     }
-    with httpx.Client(follow_redirects=True, timeout=httpx.Timeout(10.0)) as client:
-        start_time = time.time()
-        response = client.post(
-            "http://localhost:5000/authenticate",
-            json=data,
-            follow_redirects=True,
+    if client is None:
+        with httpx.Client(
+            follow_redirects=True, timeout=httpx.Timeout(10.0)
+        ) as new_client:
+            return make_request(profile, url, username, password, new_client)
+    start_time = time.perf_counter()
+    response = client.post(url, json=data)
+    end_time = time.perf_counter()
+    return response.json(), end_time - start_time, start_time, end_time
+
+
+async def run_open_loop(
+    rate: float,
+    duration: float,
+    profile: bool,
+    url: str,
+    username: Optional[str],
+    password: Optional[str],
+    poisson: bool = False,
+) -> list[tuple[int, float, float, float, float]]:
+    """
+    Send requests at a fixed arrival rate, regardless of how long earlier requests take.
+    Latency is measured from the time each request was scheduled to be sent, not from when it was actually sent, so
+    a stalled service is charged for the requests it delayed and the results do not suffer from coordinated omission.
+    The connection pool is sized for every request that can be in flight before it times out, so requests do not
+    queue behind the load generator's own pool. Any remaining client-side delay before a request gets a connection
+    is reported separately as its queueing time.
+    :param rate: Target arrival rate in requests per second
+    :param duration: How long to send requests for, in seconds
+    :param profile: Whether to fetch the profile information or not
+    :param url: URL of the authentication endpoint
+    :param username: Username to authenticate with
+    :param password: Password to authenticate with
+    :param poisson: Use exponentially distributed gaps between requests instead of a constant interval
+    :return: List of (status, latency, intended start time, end time, queueing time) tuples, times on the
+        perf_counter clock
+    """
+    data = {
+        "username": username or os.getenv("TEST_PRN"),
+        "password": password or os.getenv("TEST_PASSWORD"),
+        "profile": profile,
+    }
+    # By Little's law, at most rate * timeout requests are in flight before the oldest ones time out
+    max_connections = max(1, math.ceil(rate * OPEN_LOOP_TIMEOUT))
+    limits = httpx.Limits(
+        max_connections=max_connections, max_keepalive_connections=max_connections
+    )
+    results = []
+
+    async with httpx.AsyncClient(
+        limits=limits,
+        timeout=httpx.Timeout(OPEN_LOOP_TIMEOUT),
+        follow_redirects=True,
+    ) as client:
+
+        async def send(intended_start: float):
+            dispatched = None
+
+            async def trace(event_name: str, info: dict):
+                nonlocal dispatched
+                # The request has a connection once it starts connecting or sending on a pooled connection
+                if dispatched is None and event_name.endswith(
+                    (".connect_tcp.started", ".send_request_headers.started")
+                ):
+                    dispatched = time.perf_counter()
+
+            try:
+                response = await client.post(
+                    url, json=data, extensions={"trace": trace}
+                )
+                status = 1 if response.json().get("status") else 0
+            except Exception as e:
+                logging.error(f"Request failed: {e}")
+                status = 0
+            end_time = time.perf_counter()
+            queue_time = (dispatched or end_time) - intended_start
+            results.append(
+                (
+                    status,
+                    end_time - intended_start,
+                    intended_start,
+                    end_time,
+                    queue_time,
+                )
+            )
+
+        tasks = []
+        start_time = time.perf_counter()
+        intended_start = start_time
+        while intended_start < start_time + duration:
+            delay = intended_start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(intended_start)))
+            intended_start += random.expovariate(rate) if poisson else 1 / rate
+        await asyncio.gather(*tasks)
+    return results
+
+
+def write_results(filename: str, results: list[tuple[int, float, float, float, float]]):
+    """
+    Write per-request results to a CSV file.
+    :param filename: Path of the CSV file
+    :param results: List of (status, latency, start time, end time, queueing time) tuples
+    """
+    with open(filename, "w") as f:
+        f.write("status,time,start,end,queue\n")
+        for status, elapsed, start_time, end_time, queue_time in results:
+            f.write(f"{status},{elapsed},{start_time},{end_time},{queue_time}\n")
+
+
+def summarize(
+    rate: float, results: list[tuple[int, float, float, float, float]]
+) -> dict[str, float]:
+    """
+    Summarize an open-loop run.
+    :param rate: Target arrival rate in requests per second
+    :param results: List of (status, latency, start time, end time, queueing time) tuples
+    :return: Summary of the run
+    """
+    histogram = LatencyHistogram()
+    queue_histogram = LatencyHistogram()
+    for _, elapsed, _, _, queue_time in results:
+        histogram.record(elapsed)
+        queue_histogram.record(queue_time)
+    if results:
+        wall_time = max(r[3] for r in results) - min(r[2] for r in results)
+        throughput = len(results) / wall_time if wall_time else float("inf")
+        success_rate = sum(r[0] for r in results) / len(results) * 100
+    else:
+        throughput = success_rate = float("nan")
+    return {
+        "rate": rate,
+        "throughput": throughput,
+        "success_rate": success_rate,
+        "mean": histogram.mean(),
+        "p50": histogram.percentile(50),
+        "p90": histogram.percentile(90),
+        "p99": histogram.percentile(99),
+        "p999": histogram.percentile(99.9),
+        "max": histogram.max / 1_000_000,
+        "queue_p99": queue_histogram.percentile(99),
+    }
+
+
+def run_rate_steps(args: argparse.Namespace):
+    """
+    Run the open-loop benchmark at each of the requested arrival rates and report the saturation knee.
+    :param args: The parsed command line arguments
+    """
+    profile = not args.no_profile
+    rates = sorted(float(rate) for rate in args.rates.split(","))
+    summaries = []
+    for rate in rates:
+        logging.info(
+            f"Running open-loop benchmark at {rate} requests/sec for {args.duration} seconds..."
+        )
+        results = asyncio.run(
+            run_open_loop(
+                rate,
+                args.duration,
+                profile,
+                args.url,
+                args.username,
+                args.password,
+                args.poisson,
+            )
+        )
+        write_results(
+            f"benchmark_[open_loop]_[rate={rate:g}]_[duration={args.duration:g}].csv",
+            results,
+        )
+        summaries.append(summarize(rate, results))
+
+    print(
+        f"{'rate':>8} {'achieved':>9} {'success':>8} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} "
+        f"{'max':>9} {'queue p99':>10}"
+    )
+    for summary in summaries:
+        print(
+            f"{summary['rate']:>8g} {summary['throughput']:>9.2f} {summary['success_rate']:>7.1f}% "
+            + " ".join(
+                f"{summary[key] * 1000:>7.1f}ms"
+                for key in ("mean", "p50", "p90", "p99", "p999", "max")
+            )
+            + f" {summary['queue_p99'] * 1000:>8.1f}ms"
         )
-    elapsed_time = time.time() - start_time
-    return response.json(), elapsed_time
+    baseline_p99 = summaries[0]["p99"]
+    knee = next(
+        (
+            summary
+            for summary in summaries
+            if summary["p99"] > args.knee_factor * baseline_p99
+            or summary["throughput"] < 0.9 * summary["rate"]
+        ),
+        None,
+    )
+    if knee is None:
+        print(f"No saturation knee found up to {rates[-1]:g} requests/sec.")
+    else:
+        print(f"Saturation knee reached at {knee['rate']:g} requests/sec.")
+        if knee["queue_p99"] > 0.1 * knee["p99"]:
+            print(
+                "Warning: requests spent a large share of their latency queued in the load generator, so the knee "
+                "may be a limit of this client rather than of the service."
+            )
 
 
 if __name__ == "__main__":
@@ -41,7 +324,7 @@ if __name__ == "__main__":
         "--max-workers",
         type=int,
         default=10,
-        help="Maximum number of concurrent workers (default: 10)",
+        help="Maximum number of concurrent workers in closed-loop mode (default: 10)",
     )
     parser.add_argument(
         "--num-requests",
@@ -59,6 +342,55 @@ if __name__ == "__main__":
         action="store_true",
         help="Run the benchmark in parallel using threads",
     )
+    parser.add_argument(
+        "--url",
+        type=str,
+        default="http://localhost:5000/authenticate",
+        help="URL of the authentication endpoint (default: http://localhost:5000/authenticate)",
+    )
+    parser.add_argument(
+        "--username",
+        type=str,
+        default=None,
+        help="Username to authenticate with (default: TEST_PRN environment variable). "
+        "Use PES1201800001 when the service is pointed at scripts/pesu_stand_in.py",
+    )
+    parser.add_argument(
+        "--password",
+        type=str,
+        default=None,
+        help="Password to authenticate with (default: TEST_PASSWORD environment variable). "
+        "Use 'password' when the service is pointed at scripts/pesu_stand_in.py",
+    )
+    parser.add_argument(
+        "--open-loop",
+        action="store_true",
+        help="Send requests at a fixed arrival rate instead of waiting for each response before sending the next",
+    )
+    parser.add_argument(
+        "--rates",
+        type=str,
+        default="10",
+        help="Comma-separated arrival rates in requests/sec to step through in open-loop mode (default: 10)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=30.0,
+        help="Seconds to run each arrival rate for in open-loop mode (default: 30)",
+    )
+    parser.add_argument(
+        "--poisson",
+        action="store_true",
+        help="Use Poisson arrivals instead of a constant interval in open-loop mode",
+    )
+    parser.add_argument(
+        "--knee-factor",
+        type=float,
+        default=3.0,
+        help="Report the saturation knee at the first rate whose p99 exceeds this multiple of the p99 at the lowest "
+        "rate, or whose throughput falls below 90%% of the target (default: 3)",
+    )
     args = parser.parse_args()
 
     max_workers = args.max_workers
@@ -66,49 +398,76 @@ if __name__ == "__main__":
     profile = not args.no_profile
     parallel = args.parallel
 
-    success = []
-    times = []
-    if parallel:
-        logging.info(
-            f"Running benchmark with max {max_workers} workers and {num_requests} requests in parallel..."
-        )
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(make_request, profile=profile)
-                for _ in range(num_requests)
-            ]
-            for future in as_completed(futures):
-                try:
-                    response, elapsed = future.result()
-                    times.append(elapsed)
-                    logging.debug(response)
-                    if response.get("status"):
-                        success.append(1)
-                    else:
-                        success.append(0)
-                except Exception as e:
-                    logging.error(f"Request failed: {e}")
+    if args.open_loop:
+        run_rate_steps(args)
     else:
-        logging.info(f"Running benchmark with {num_requests} requests sequentially...")
-        for _ in tqdm(range(num_requests), desc="Processing requests"):
-            response, elapsed = make_request(profile=profile)
-            times.append(elapsed)
-            logging.debug(response)
-            if response.get("status"):
-                success.append(1)
-            else:
-                success.append(0)
-
-    with open(
-        f"benchmark_[num_requests={num_requests}]_[max_workers={max_workers}]_[parallel={parallel}].csv",
-        "w",
-    ) as f:
-        f.write("status,time\n")
-        for s, t in zip(success, times):
-            f.write(f"{s},{t}\n")
+        success = []
+        times = []
+        results = []
+        # One connection per worker, so requests never queue for a connection and their queueing time is zero
+        client = httpx.Client(
+            follow_redirects=True,
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=max_workers),
+        )
+        if parallel:
+            logging.info(
+                f"Running benchmark with max {max_workers} workers and {num_requests} requests in parallel..."
+            )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        make_request,
+                        profile=profile,
+                        url=args.url,
+                        username=args.username,
+                        password=args.password,
+                        client=client,
+                    )
+                    for _ in range(num_requests)
+                ]
+                for future in as_completed(futures):
+                    try:
+                        response, elapsed, start_time, end_time = future.result()
+                        times.append(elapsed)
+                        logging.debug(response)
+                        if response.get("status"):
+                            success.append(1)
+                        else:
+                            success.append(0)
+                        results.append(
+                            (success[-1], elapsed, start_time, end_time, 0.0)
+                        )
+                    except Exception as e:
+                        logging.error(f"Request failed: {e}")
+        else:
+            logging.info(
+                f"Running benchmark with {num_requests} requests sequentially..."
+            )
+            for _ in tqdm(range(num_requests), desc="Processing requests"):
+                response, elapsed, start_time, end_time = make_request(
+                    profile=profile,
+                    url=args.url,
+                    username=args.username,
+                    password=args.password,
+                    client=client,
+                )
+                times.append(elapsed)
+                logging.debug(response)
+                if response.get("status"):
+                    success.append(1)
+                else:
+                    success.append(0)
+                results.append((success[-1], elapsed, start_time, end_time, 0.0))
+        client.close()
 
-    print(
-        f"Benchmark completed. Successful requests: {sum(success)} out of {len(success)}"
-    )
-    print(f"Average time per request: {sum(times) / len(times):.2f} seconds")
-    print(f"Total time taken: {sum(times):.2f} seconds")
+        write_results(
+            f"benchmark_[num_requests={num_requests}]_[max_workers={max_workers}]_[parallel={parallel}].csv",
+            results,
+        )
+
+        print(
+            f"Benchmark completed. Successful requests: {sum(success)} out of {len(success)}"
+        )
+        print(f"Average time per request: {sum(times) / len(times):.2f} seconds")
+        print(f"Total time taken: {sum(times):.2f} seconds")
@@ -0,0 +1,94 @@
+import argparse
+import statistics
+import time
+
+import httpx
+import numpy as np
+from selectolax.parser import HTMLParser
+
+from app.pesu import PESUAcademy
+from scripts.pesu_stand_in import DEFAULT_PROFILE, StandInConfig, StandInServer
+
+USERNAME = DEFAULT_PROFILE["prn"]
+PASSWORD = StandInConfig().users[USERNAME]
+
+
+def login_flow(client: httpx.Client, base_url: str):
+    """
+    Replay the request pattern of a login with profile: CSRF GET, login POST and profile GET.
+    :param client: The client session to use for making requests
+    :param base_url: Base URL of the stand-in upstream
+    """
+    response = client.get(f"{base_url}/Academy/")
+    csrf_token = PESUAcademy.extract_csrf_token(HTMLParser(response.text))
+    client.post(
+        f"{base_url}/Academy/j_spring_security_check",
+        data={"_csrf": csrf_token, "j_username": USERNAME, "j_password": PASSWORD},
+    )
+    client.get(f"{base_url}/Academy/s/studentProfilePESUAdmin")
+
+
+def run_fresh_clients(base_url: str, num_requests: int) -> list[float]:
+    """
+    Time login flows where every flow creates and closes its own httpx.Client.
+    :param base_url: Base URL of the stand-in upstream
+    :param num_requests: Number of login flows to time
+    :return: Per-flow latencies in seconds
+    """
+    times = []
+    for _ in range(num_requests):
+        start_time = time.perf_counter()
+        client = httpx.Client(follow_redirects=True, timeout=httpx.Timeout(10.0))
+        login_flow(client, base_url)
+        client.close()
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+def run_pooled_clients(base_url: str, num_requests: int) -> list[float]:
+    """
+    Time login flows where every flow uses a client backed by the shared connection pool.
+    :param base_url: Base URL of the stand-in upstream
+    :param num_requests: Number of login flows to time
+    :return: Per-flow latencies in seconds
+    """
+    pesu_academy = PESUAcademy()
+    times = []
+    for _ in range(num_requests):
+        start_time = time.perf_counter()
+        client = pesu_academy.create_client()
+        login_flow(client, base_url)
+        client.close()
+        times.append(time.perf_counter() - start_time)
+    pesu_academy.close()
+    return times
+
+
+def summarize(label: str, times: list[float]):
+    print(
+        f"{label:<16}: mean={statistics.mean(times) * 1000:.3f} ms, "
+        f"median={statistics.median(times) * 1000:.3f} ms, "
+        f"p95={np.percentile(times, 95) * 1000:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark fresh httpx clients against the shared connection pool."
+    )
+    parser.add_argument(
+        "--num-requests",
+        type=int,
+        default=200,
+        help="Number of login flows to time for each mode (default: 200)",
+    )
+    args = parser.parse_args()
+
+    with StandInServer() as server:
+        fresh_times = run_fresh_clients(server.base_url, args.num_requests)
+        pooled_times = run_pooled_clients(server.base_url, args.num_requests)
+
+    summarize("Fresh client", fresh_times)
+    summarize("Pooled client", pooled_times)
+    saved = statistics.mean(fresh_times) - statistics.mean(pooled_times)
+    print(f"Latency saved per request: {saved * 1000:.3f} ms")
@@ -0,0 +1,98 @@
+import argparse
+import logging
+import os
+import statistics
+import time
+
+import numpy as np
+
+from app.logging_config import setup_logging, stop_logging
+from app.pesu import PESUAcademy
+from scripts.pesu_stand_in import DEFAULT_PROFILE, StandInConfig, StandInServer
+
+USERNAME = DEFAULT_PROFILE["prn"]
+PASSWORD = StandInConfig().users[USERNAME]
+
+# Logging configurations to compare: label, level, JSON output, background thread and sampling rates
+CONFIGURATIONS = [
+    ("disabled", logging.WARNING, False, False, None),
+    ("sync text", None, False, False, None),
+    ("sync json", None, True, False, None),
+    ("async text", None, False, True, None),
+    ("async json", None, True, True, None),
+    ("async sampled", None, True, True, {"app": 0.1}),
+]
+
+
+def run_authentications(
+    pesu_academy: PESUAcademy, num_requests: int
+) -> tuple[list[float], list[float]]:
+    """
+    Authenticate with profile repeatedly and time each request on the calling thread.
+    :param pesu_academy: The PESUAcademy instance pointed at the stand-in
+    :param num_requests: Number of authentications to time
+    :return: Per-request CPU times of the calling thread and wall-clock latencies, in seconds
+    """
+    cpu_times, latencies = [], []
+    for _ in range(num_requests):
+        start_cpu, start_time = time.thread_time(), time.perf_counter()
+        result = pesu_academy.authenticate(USERNAME, PASSWORD, profile=True)
+        cpu_times.append(time.thread_time() - start_cpu)
+        latencies.append(time.perf_counter() - start_time)
+        assert result["status"], result
+    return cpu_times, latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the request-thread cost of the logging configurations against a local stand-in."
+    )
+    parser.add_argument(
+        "--num-requests",
+        type=int,
+        default=300,
+        help="Number of authentications to time for each configuration (default: 300)",
+    )
+    parser.add_argument(
+        "--level",
+        choices=["DEBUG", "INFO"],
+        default="INFO",
+        help="Logging level of the enabled configurations (default: INFO)",
+    )
+    args = parser.parse_args()
+
+    level = getattr(logging, args.level)
+    # Log lines are written to the null device, so that terminal speed does not skew the results
+    devnull = open(os.devnull, "w")
+    with StandInServer() as server:
+        pesu_academy = PESUAcademy(base_url=server.base_url)
+        # Warm up the connection pool and the parser before timing
+        run_authentications(pesu_academy, 10)
+
+        print(
+            f"{'configuration':<14} {'cpu/request':>12} {'p50 latency':>12} {'p99 latency':>12}"
+        )
+        for (
+            label,
+            config_level,
+            json_format,
+            background,
+            sample_rates,
+        ) in CONFIGURATIONS:
+            setup_logging(
+                level=config_level or level,
+                json_format=json_format,
+                background=background,
+                sample_rates=sample_rates,
+                stream=devnull,
+            )
+            cpu_times, latencies = run_authentications(pesu_academy, args.num_requests)
+            # Drain the queue, so that its backlog does not spill into the next configuration
+            stop_logging()
+            print(
+                f"{label:<14} {statistics.mean(cpu_times) * 1e6:>10.1f}us "
+                f"{np.percentile(latencies, 50) * 1000:>10.3f}ms "
+                f"{np.percentile(latencies, 99) * 1000:>10.3f}ms"
+            )
+        pesu_academy.close()
+    devnull.close()
@@ -0,0 +1,98 @@
+import argparse
+import gc
+import os
+import resource
+import statistics
+import tracemalloc
+from typing import Optional
+from unittest.mock import patch
+
+from app.pesu import BasePESUAcademy, PESUAcademy
+from scripts.pesu_stand_in import DEFAULT_PROFILE, StandInConfig, StandInServer
+
+USERNAME = DEFAULT_PROFILE["prn"]
+PASSWORD = StandInConfig().users[USERNAME]
+
+
+def current_rss_kib() -> Optional[int]:
+    """
+    Get the resident set size of the process.
+    :return: The RSS in KiB, or None where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return None
+
+
+def measure(
+    pesu_academy: PESUAcademy, authentications: int
+) -> tuple[float, float, Optional[int]]:
+    """
+    Measure the Python memory of authentications with profile.
+    tracemalloc sees Python objects, such as response bodies and decoded documents, but not the C allocations of the
+    parser, which only show up in the RSS.
+    :param pesu_academy: The client to authenticate with
+    :param authentications: Number of measured authentications
+    :return: Median peak and median retained KiB per authentication, and RSS growth over all of them in KiB
+    """
+    # Warm up the connection pool and the lazily created objects, so that they are not counted as retained
+    pesu_academy.authenticate(USERNAME, PASSWORD, profile=True)
+    gc.collect()
+    rss_before = current_rss_kib()
+    peaks, retained = [], []
+    tracemalloc.start()
+    for _ in range(authentications):
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = pesu_academy.authenticate(USERNAME, PASSWORD, profile=True)
+        peak = tracemalloc.get_traced_memory()[1]
+        del result
+        gc.collect()
+        peaks.append((peak - before) / 1024)
+        retained.append((tracemalloc.get_traced_memory()[0] - before) / 1024)
+    tracemalloc.stop()
+    rss_after = current_rss_kib()
+    rss_growth = (
+        None if rss_before is None or rss_after is None else rss_after - rss_before
+    )
+    return statistics.median(peaks), statistics.median(retained), rss_growth
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the peak and retained memory of an authentication with profile."
+    )
+    parser.add_argument(
+        "--padding-bytes",
+        type=int,
+        default=200_000,
+        help="Filler markup after the content of every stand-in page (default: 200000)",
+    )
+    parser.add_argument(
+        "--authentications",
+        type=int,
+        default=50,
+        help="Number of measured authentications in each mode (default: 50)",
+    )
+    args = parser.parse_args()
+
+    config = StandInConfig(padding_bytes=args.padding_bytes)
+    modes = {
+        "raw bytes": BasePESUAcademy.__dict__["response_markup"],
+        # The previous parsing path, which decoded every document to a str first
+        "decoded text": staticmethod(lambda response: response.text),
+    }
+    print(f"{'mode':<14} {'peak/auth':>11} {'retained/auth':>14} {'RSS growth':>11}")
+    with StandInServer(config) as server:
+        for label, response_markup in modes.items():
+            with patch.object(BasePESUAcademy, "response_markup", response_markup):
+                pesu_academy = PESUAcademy(base_url=server.base_url)
+                peak, retained, rss_growth = measure(pesu_academy, args.authentications)
+                pesu_academy.close()
+            rss = "n/a" if rss_growth is None else f"{rss_growth}KiB"
+            print(f"{label:<14} {peak:>8.1f}KiB {retained:>11.1f}KiB {rss:>11}")
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"Maximum RSS of the process: {max_rss}KiB")
@@ -0,0 +1,211 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+import httpx
+import selectolax
+
+from app.pesu import PESUAcademy
+from app.profile_parser import BACKENDS
+from scripts.page_corpus import large_page, load_corpus, load_manifest
+
+# Parser of each kind of page, and the name it is reported under
+OPERATIONS = {
+    "home": "csrf extraction",
+    "login": "login form check",
+    "profile": "profile parsing",
+}
+
+
+def parser_for(pesu_academy: PESUAcademy, kind: str) -> Callable[[httpx.Response], Any]:
+    """
+    Get the parser of a kind of page.
+    :param pesu_academy: The client whose parsers to use
+    :param kind: The kind of the page, one of home, login or profile
+    :return: Callable that parses a response of that kind
+    """
+    if kind == "home":
+        return pesu_academy.parse_csrf_response
+    if kind == "login":
+        return pesu_academy.parse_login_response
+    return lambda response: pesu_academy.parse_profile_response(response, "user")
+
+
+def measure(
+    parse: Callable[[httpx.Response], Any], html: bytes, rounds: int, iterations: int
+) -> list[float]:
+    """
+    Time a parser over a page.
+    :param parse: Callable that parses the response
+    :param html: The page
+    :param rounds: Number of timed rounds
+    :param iterations: Number of parses in each round
+    :return: CPU time per parse of each round, in seconds
+    """
+    response = httpx.Response(
+        200, content=html, headers={"Content-Type": "text/html;charset=UTF-8"}
+    )
+    parse(response)
+    times = []
+    for _ in range(rounds):
+        start = time.process_time()
+        for _ in range(iterations):
+            parse(response)
+        times.append((time.process_time() - start) / iterations)
+    return times
+
+
+def run(padding_bytes: list[int], rounds: int, iterations: int) -> dict[str, Any]:
+    """
+    Benchmark the page parsers over the corpus, grown by each amount of filler markup.
+    :param padding_bytes: Bytes of filler markup to add after the content of each page
+    :param rounds: Number of timed rounds of each case
+    :param iterations: Number of parses in each round
+    :return: The results, with the metadata of the run
+    """
+    manifest = load_manifest()
+    corpus = load_corpus()
+    results = []
+    for backend in BACKENDS:
+        pesu_academy = PESUAcademy(parser_backend=backend)
+        for name, entry in manifest.items():
+            parse = parser_for(pesu_academy, entry["kind"])
+            for padding in padding_bytes:
+                html = large_page(corpus[name], padding)
+                times = measure(parse, html, rounds, iterations)
+                results.append(
+                    {
+                        "operation": OPERATIONS[entry["kind"]],
+                        "page": name,
+                        "padding_bytes": padding,
+                        "backend": backend,
+                        "page_bytes": len(html),
+                        "median_us": statistics.median(times) * 1e6,
+                        "min_us": min(times) * 1e6,
+                        "times_us": [t * 1e6 for t in times],
+                    }
+                )
+        pesu_academy.close()
+    return {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "selectolax": selectolax.__version__,
+            "rounds": rounds,
+            "iterations": iterations,
+        },
+        "results": results,
+    }
+
+
+def case_key(result: dict[str, Any]) -> tuple:
+    return result["page"], result["padding_bytes"], result["backend"]
+
+
+def compare(
+    report: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[dict[str, Any]]:
+    """
+    Compare a run with a baseline run, case by case.
+    Medians are compared, since a run's minimum is too sensitive to a single lucky round.
+    :param report: The results of this run
+    :param baseline: The results of the baseline run
+    :param threshold: Relative slowdown of the median above which a case is a regression, such as 0.1 for 10%
+    :return: The cases that regressed
+    """
+    baseline_results = {case_key(result): result for result in baseline["results"]}
+    regressions = []
+    print(
+        f"{'operation':<17} {'page':<32} {'padding':>8} {'backend':<7} {'baseline':>10} {'now':>10} {'change':>8}"
+    )
+    for result in report["results"]:
+        before = baseline_results.get(case_key(result))
+        if before is None:
+            continue
+        change = result["median_us"] / before["median_us"] - 1
+        flag = " !" if change > threshold else ""
+        print(
+            f"{result['operation']:<17} {result['page']:<32} {result['padding_bytes']:>8} {result['backend']:<7} "
+            f"{before['median_us']:>8.1f}us {result['median_us']:>8.1f}us {change:>+7.1%}{flag}"
+        )
+        if change > threshold:
+            regressions.append(result)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark CSRF extraction, the login form check and profile parsing over the recorded page corpus."
+    )
+    parser.add_argument(
+        "--padding-bytes",
+        type=str,
+        default="0,200000",
+        help="Comma-separated filler sizes added after the content of each page (default: 0,200000)",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=7,
+        help="Number of timed rounds of each case (default: 7)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=50,
+        help="Number of parses in each timed round (default: 50)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write the results of the run to this JSON file",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="JSON results of an earlier run to compare this run with",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown of a median that counts as a regression against the baseline (default: 0.1)",
+    )
+    args = parser.parse_args()
+
+    report = run(
+        [int(size) for size in args.padding_bytes.split(",")],
+        args.rounds,
+        args.iterations,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline: Optional[dict[str, Any]] = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if baseline is None:
+        print(
+            f"{'operation':<17} {'page':<32} {'padding':>8} {'backend':<7} {'median':>10} {'min':>10}"
+        )
+        for result in report["results"]:
+            print(
+                f"{result['operation']:<17} {result['page']:<32} {result['padding_bytes']:>8} "
+                f"{result['backend']:<7} {result['median_us']:>8.1f}us {result['min_us']:>8.1f}us"
+            )
+    elif regressions := compare(report, baseline, args.threshold):
+        print(
+            f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}."
+        )
+        sys.exit(1)
@@ -0,0 +1,111 @@
+import argparse
+import time
+import tracemalloc
+
+from app.profile_parser import BACKENDS, ProfilePage, ProfilePageParser
+from scripts.pesu_stand_in import DEFAULT_PROFILE, PADDING_BLOCK, PROFILE_PAGE
+
+
+def legacy_extract(html: str, backend: str = "modest") -> ProfilePage:
+    """
+    Extract the profile details the way PESUAcademy did before ProfilePageParser, as the baseline.
+    Every div.form-group match is materialized before slicing, and each contact input is found with its own scan.
+    :param html: The profile page HTML
+    :param backend: The selectolax backend to parse the page with
+    :return: The extracted profile details
+    """
+    soup = BACKENDS[backend](html)
+    page = ProfilePage(
+        form_groups=[div.text() for div in soup.css("div.form-group")[:7]]
+    )
+    for input_id in ("updateMail", "updateContact"):
+        if node := soup.css_first(f"#{input_id}"):
+            page.contact_inputs[input_id] = node.attributes.get("value")
+    return page
+
+
+def stand_in_page(padding_bytes: int) -> str:
+    """
+    Render the stand-in profile page with the given amount of filler markup after the profile details.
+    :param padding_bytes: Bytes of filler markup
+    :return: The profile page HTML
+    """
+    padding = (PADDING_BLOCK * (padding_bytes // len(PADDING_BLOCK) + 1))[
+        :padding_bytes
+    ]
+    return PROFILE_PAGE.format(padding=padding, **DEFAULT_PROFILE)
+
+
+def measure(extract, html: str, iterations: int) -> tuple[float, float]:
+    """
+    Measure the CPU time and peak Python memory of an extractor.
+    Memory is traced with tracemalloc, which sees Python objects but not the parser's own C allocations.
+    :param extract: Callable that extracts the profile details from the HTML
+    :param html: The profile page HTML
+    :param iterations: Number of times to run the extractor in each of the timed rounds
+    :return: CPU time per call in seconds and peak traced KiB
+    """
+    extract(html)
+    # Take the best of a few rounds, so that noise from other processes does not favour either parser
+    cpu_time = float("inf")
+    for _ in range(5):
+        start = time.process_time()
+        for _ in range(iterations):
+            extract(html)
+        cpu_time = min(cpu_time, (time.process_time() - start) / iterations)
+
+    tracemalloc.start()
+    extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_time, peak / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the single-pass profile page parser against the previous css() based extraction."
+    )
+    parser.add_argument(
+        "--pages",
+        nargs="*",
+        default=[],
+        help="Recorded profile pages to benchmark. Stand-in pages are used if none are given.",
+    )
+    parser.add_argument(
+        "--padding-bytes",
+        type=str,
+        default="0,20000,200000",
+        help="Comma-separated filler sizes of the stand-in pages (default: 0,20000,200000)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=200,
+        help="Number of parses per timed round for each page and parser (default: 200)",
+    )
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = {path: open(path, encoding="utf-8").read() for path in args.pages}
+    else:
+        pages = {
+            f"stand-in +{int(size)}B": stand_in_page(int(size))
+            for size in args.padding_bytes.split(",")
+        }
+
+    print(
+        f"{'page':<22} {'backend':<8} {'parser':<12} {'cpu/parse':>11} {'peak mem':>10}"
+    )
+    for name, html in pages.items():
+        for backend in BACKENDS:
+            profile_parser = ProfilePageParser(backend)
+            assert profile_parser.extract(html) == legacy_extract(html, backend)
+            for label, extract in (
+                ("css() scans", lambda page: legacy_extract(page, backend)),
+                ("single-pass", profile_parser.extract),
+            ):
+                cpu_time, peak = measure(extract, html, args.iterations)
+                print(
+                    f"{name:<22} {backend:<8} {label:<12} {cpu_time * 1e6:>9.1f}us "
+                    f"{peak:>7.1f}KiB"
+                )
@@ -0,0 +1,157 @@
+import argparse
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from scripts.pesu_stand_in import DEFAULT_PROFILE, StandInConfig, StandInServer
+
+USERNAME = DEFAULT_PROFILE["prn"]
+PASSWORD = StandInConfig().users[USERNAME]
+
+
+def measure_import_time(module: str) -> tuple[float, list[tuple[float, str]]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+    :param module: The module to import
+    :return: The cumulative import time of the module in seconds, and the cumulative import time in seconds of each
+        module it imported directly
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total, children = 0.0, []
+    # Lines look like "import time:       self |  cumulative | <indented module name>", innermost modules first
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if name.strip() == module:
+            total = int(cumulative) / 1e6
+        elif depth == 1:
+            children.append((int(cumulative) / 1e6, name.strip()))
+    return total, sorted(children, reverse=True)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_authentication(
+    upstream_url: str, server_args: list[str], timeout: float
+) -> float:
+    """
+    Start the API in a fresh process and time how long it takes to answer its first successful authentication.
+    :param upstream_url: Base URL of the stand-in upstream
+    :param server_args: Extra command line arguments of the API
+    :param timeout: Seconds to wait for the first successful authentication
+    :return: Seconds from starting the process to the first successful authentication
+    """
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/authenticate"
+    payload = {"username": USERNAME, "password": PASSWORD, "profile": True}
+    start_time = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.app", "--host", "127.0.0.1", "--port", str(port)]
+        + ["--upstream-url", upstream_url]
+        + server_args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    # A single client, since creating one loads the CA bundle, which would be timed as startup time
+    client = httpx.Client(timeout=timeout)
+    try:
+        while time.perf_counter() - start_time < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"The API exited with code {process.returncode}")
+            try:
+                response = client.post(url, json=payload)
+                if response.status_code == 200 and response.json()["status"]:
+                    return time.perf_counter() - start_time
+            except httpx.TransportError:
+                pass
+            time.sleep(0.005)
+        raise TimeoutError(f"No successful authentication within {timeout} seconds")
+    finally:
+        client.close()
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the import time of the API and its time to the first successful /authenticate against a "
+        "local stand-in, and fail if it is over budget."
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        help="Number of cold starts to time (default: 5)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=3.0,
+        help="Maximum median seconds to the first successful /authenticate (default: 3.0)",
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=None,
+        help="Maximum seconds to import app.app. Not checked by default.",
+    )
+    parser.add_argument(
+        "--server-args",
+        type=str,
+        default="--no-docs",
+        help="Extra arguments to start the API with (default: --no-docs)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of slowest imports to list (default: 10)",
+    )
+    args = parser.parse_args()
+
+    import_time, children = measure_import_time("app.app")
+    print(f"import app.app: {import_time * 1000:.1f} ms")
+    for cumulative, name in children[: args.top]:
+        print(f"  {name:<32} {cumulative * 1000:>8.1f} ms")
+
+    with StandInServer() as server:
+        times = [
+            measure_first_authentication(
+                server.base_url, shlex.split(args.server_args), timeout=60.0
+            )
+            for _ in range(args.runs)
+        ]
+    median = statistics.median(times)
+    print(
+        f"time to first /authenticate: median={median * 1000:.1f} ms, "
+        f"min={min(times) * 1000:.1f} ms, max={max(times) * 1000:.1f} ms"
+    )
+
+    failures = []
+    if median > args.budget:
+        failures.append(
+            f"time to first /authenticate {median:.3f}s is over the budget of {args.budget:.3f}s"
+        )
+    if args.import_budget is not None and import_time > args.import_budget:
+        failures.append(
+            f"import time {import_time:.3f}s is over the budget of {args.import_budget:.3f}s"
+        )
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
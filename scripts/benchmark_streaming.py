@@ -0,0 +1,121 @@
+import argparse
+import statistics
+import time
+from typing import Callable
+
+import httpx
+
+from app.fetch_plan import FULL_PLAN
+from app.pesu import PESUAcademy
+from app.streaming import CSRF_MARKERS, PAGE_MARKERS, PageMarkers
+from scripts.pesu_stand_in import DEFAULT_PROFILE, StandInConfig, StandInServer
+
+USERNAME = DEFAULT_PROFILE["prn"]
+PASSWORD = StandInConfig().users[USERNAME]
+
+
+def measure(
+    fetch: Callable[[], httpx.Response],
+    parse: Callable[[httpx.Response], object],
+    iterations: int,
+) -> tuple[float, int]:
+    """
+    Time fetching and parsing a page.
+    :param fetch: Callable that requests the page
+    :param parse: Callable that parses the response
+    :param iterations: Number of timed fetches
+    :return: Median time to result in seconds, and bytes of the body downloaded, before decoding
+    """
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = fetch()
+        parse(response)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), response.num_bytes_downloaded
+
+
+def summarize(label: str, full: tuple[float, int], streamed: tuple[float, int]):
+    print(
+        f"{label:<8} full: {full[0] * 1000:>8.2f} ms {full[1]:>10} B   "
+        f"streamed: {streamed[0] * 1000:>8.2f} ms {streamed[1]:>10} B   "
+        f"({full[0] / streamed[0]:.1f}x faster, {full[1] / streamed[1]:.0f}x fewer bytes)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark streamed page reads that stop at the page markers against full reads."
+    )
+    parser.add_argument(
+        "--padding-bytes",
+        type=int,
+        default=1_000_000,
+        help="Filler markup after the content of every stand-in page (default: 1000000)",
+    )
+    parser.add_argument(
+        "--drip-chunk-bytes",
+        type=int,
+        default=16_384,
+        help="Bytes the stand-in sends at a time, 0 to send pages at once (default: 16384)",
+    )
+    parser.add_argument(
+        "--drip-interval-ms",
+        type=float,
+        default=1.0,
+        help="Delay between dripped chunks in milliseconds (default: 1)",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Have the stand-in compress its pages with gzip, as PESU Academy does",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=20,
+        help="Number of timed fetches of each page in each mode (default: 20)",
+    )
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        padding_bytes=args.padding_bytes,
+        drip_chunk_bytes=args.drip_chunk_bytes,
+        drip_interval_ms=args.drip_interval_ms,
+        gzip=args.gzip,
+    )
+    with StandInServer(config) as server:
+        pesu_academy = PESUAcademy(base_url=server.base_url)
+        with pesu_academy.create_client() as client:
+            csrf_token = pesu_academy.fetch_csrf_token(client)
+            pesu_academy.login(client, csrf_token, USERNAME, PASSWORD)
+            pages = {
+                "csrf": (
+                    pesu_academy.home_url,
+                    {},
+                    CSRF_MARKERS,
+                    pesu_academy.parse_csrf_response,
+                ),
+                "profile": (
+                    pesu_academy.profile_url,
+                    pesu_academy.get_profile_query(),
+                    PageMarkers.for_profile(FULL_PLAN.details, FULL_PLAN.contact),
+                    lambda response: pesu_academy.parse_profile_response(
+                        response, USERNAME
+                    ),
+                ),
+            }
+            for label, (url, params, markers, parse) in pages.items():
+                results = []
+                for extensions in ({}, {PAGE_MARKERS: markers}):
+                    results.append(
+                        measure(
+                            lambda: client.get(
+                                url, params=params, extensions=extensions
+                            ),
+                            parse,
+                            args.iterations,
+                        )
+                    )
+                summarize(label, *results)
+        pesu_academy.close()
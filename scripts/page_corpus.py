@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+from typing import Any
+
+from scripts.pesu_stand_in import PADDING_BLOCK
+
+# Recorded, anonymized PESU Academy pages and the manifest of what each one parses to
+CORPUS_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "pages"
+
+
+def load_manifest() -> dict[str, dict[str, Any]]:
+    """
+    Load the manifest of the page corpus.
+    Every entry has the kind of the page, one of home, login or profile, and what the page is expected to parse to:
+    the CSRF token of a home page, whether a login page means the user was authenticated, or the profile of a profile
+    page.
+    :return: The expected results, keyed by the file name of the page
+    """
+    with open(CORPUS_DIR / "manifest.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_corpus() -> dict[str, bytes]:
+    """
+    Load the recorded pages of the corpus.
+    :return: The raw bytes of each page, keyed by its file name
+    """
+    return {name: (CORPUS_DIR / name).read_bytes() for name in load_manifest()}
+
+
+def padding(padding_bytes: int) -> bytes:
+    """
+    Build filler markup of an exact size from the stand-in padding block.
+    :param padding_bytes: Bytes of filler markup
+    :return: The filler markup
+    """
+    block = PADDING_BLOCK.encode()
+    return (block * (padding_bytes // len(block) + 1))[:padding_bytes]
+
+
+def large_page(html: bytes, padding_bytes: int, before: bool = False) -> bytes:
+    """
+    Grow a page with filler markup, as pages with long menus, timetables or inline assets are.
+    :param html: The page
+    :param padding_bytes: Bytes of filler markup to add
+    :param before: Whether to put the filler before the content of the page instead of after it
+    :return: The grown page
+    """
+    filler = padding(padding_bytes)
+    return filler + html if before else html + filler
+
+
+def malformed_pages(corpus: dict[str, bytes]) -> dict[str, tuple[str, bytes]]:
+    """
+    Derive broken and unusual variants of the recorded pages, which the parsers have to handle the same way whether the
+    page was read whole or streamed.
+    :param corpus: The recorded pages, as returned by load_corpus
+    :return: The kind and the bytes of each variant, keyed by a short description
+    """
+    home = corpus["home.html"]
+    failure = corpus["login_failure.html"]
+    profile = corpus["profile_btech_cse_rr.html"]
+    contact_start = profile.index(b'<div class="modal fade"')
+    return {
+        "home without csrf token": (
+            "home",
+            home.replace(b'name="csrf-token"', b'name="csrf-token-expired"', 1),
+        ),
+        "home in uppercase": ("home", home.upper()),
+        "home with bom and crlf": (
+            "home",
+            b"\xef\xbb\xbf" + home.replace(b"\n", b"\r\n"),
+        ),
+        "login form after padding": ("login", large_page(failure, 500_000, True)),
+        "login truncated in head": ("login", failure[: failure.index(b"<body")]),
+        "profile truncated in details": (
+            "profile",
+            profile[: profile.index(b"<label>", profile.index(b"Semester"))],
+        ),
+        "profile truncated in contact": (
+            "profile",
+            profile[: profile.index(b'id="updateContact"')],
+        ),
+        "profile with unclosed form groups": (
+            "profile",
+            profile.replace(b"</div>", b"", 4),
+        ),
+        "profile with duplicate contact inputs": (
+            "profile",
+            profile[:contact_start]
+            + profile[contact_start:].replace(b"student.one@", b"someone.else@")
+            + profile[contact_start:],
+        ),
+        "profile with single quoted attributes": (
+            "profile",
+            profile.replace(b'"', b"'"),
+        ),
+        "profile in uppercase tags": (
+            "profile",
+            profile.replace(b"<div", b"<DIV").replace(b"</div>", b"</DIV>"),
+        ),
+    }
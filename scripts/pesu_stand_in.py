@@ -0,0 +1,498 @@
+import argparse
+import gzip
+import random
+import secrets
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PROFILE = {
+    "name": "Johnny Blaze",
+    "prn": "PES1201800001",
+    "srn": "PES1UG18CS001",
+    "program": "Bachelor of Technology",
+    "branch": "Computer Science and Engineering",
+    "semester": "Sem-8",
+    "section": "Section A",
+    "email": "johnnyblaze@gmail.com",
+    "phone": "1234567890",
+}
+
+HOME_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <meta name="csrf-token" content="{csrf_token}">
+    <title>PESU Academy</title>
+</head>
+<body>
+<div class="login-form">
+    <form action="j_spring_security_check" method="post">
+        <input type="hidden" name="_csrf" value="{csrf_token}">
+        <input type="text" name="j_username" placeholder="Username">
+        <input type="password" name="j_password" placeholder="Password">
+        <button type="submit">Sign In</button>
+    </form>
+</div>
+{padding}
+</body>
+</html>
+"""
+
+LOGIN_FAILURE_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <meta name="csrf-token" content="{csrf_token}">
+    <title>PESU Academy</title>
+</head>
+<body>
+<div class="login-form">
+    <div class="login-msg">Invalid username or password</div>
+    <form action="j_spring_security_check" method="post">
+        <input type="hidden" name="_csrf" value="{csrf_token}">
+        <input type="text" name="j_username" placeholder="Username">
+        <input type="password" name="j_password" placeholder="Password">
+        <button type="submit">Sign In</button>
+    </form>
+</div>
+{padding}
+</body>
+</html>
+"""
+
+DASHBOARD_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <meta name="csrf-token" content="{csrf_token}">
+    <title>PESU Academy</title>
+</head>
+<body>
+<div class="dashboard">
+    <div class="welcome-text">Welcome, {name}</div>
+    <ul class="menu">
+        <li><a href="s/studentProfilePESUAdmin">My Profile</a></li>
+    </ul>
+</div>
+{padding}
+</body>
+</html>
+"""
+
+PROFILE_PAGE = """<div class="dashboard-info-bar">
+    <div class="elem-info-wrapper">
+        <div class="form-group">
+            <label class="lbl-title-light">Name</label>
+            <label>{name}</label>
+        </div>
+        <div class="form-group">
+            <label class="lbl-title-light">PESU Id</label>
+            <label>{prn}</label>
+        </div>
+        <div class="form-group">
+            <label class="lbl-title-light">SRN</label>
+            <label>{srn}</label>
+        </div>
+        <div class="form-group">
+            <label class="lbl-title-light">Program</label>
+            <label>{program}</label>
+        </div>
+        <div class="form-group">
+            <label class="lbl-title-light">Branch</label>
+            <label>{branch}</label>
+        </div>
+        <div class="form-group">
+            <label class="lbl-title-light">Semester</label>
+            <label>{semester}</label>
+        </div>
+        <div class="form-group">
+            <label class="lbl-title-light">Section</label>
+            <label>{section}</label>
+        </div>
+    </div>
+</div>
+<div class="modal" id="updateContactModal">
+    <form id="updateContactForm">
+        <div class="form-group">
+            <label>Email</label>
+            <input type="email" class="form-control" id="updateMail" name="email" value="{email}">
+        </div>
+        <div class="form-group">
+            <label>Phone</label>
+            <input type="text" class="form-control" id="updateContact" name="phone" value="{phone}">
+        </div>
+    </form>
+</div>
+{padding}
+"""
+
+PADDING_BLOCK = '<div class="news-item"><p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p></div>\n'
+
+
+@dataclass
+class StandInConfig:
+    """
+    Behaviour of the stand-in PESU Academy server.
+    """
+
+    users: dict[str, str] = field(default_factory=lambda: {"PES1201800001": "password"})
+    profile: dict[str, str] = field(default_factory=lambda: dict(DEFAULT_PROFILE))
+    latency_ms: float = 0.0
+    latency_distribution: str = "constant"
+    error_rate: float = 0.0
+    reset_rate: float = 0.0
+    padding_bytes: int = 0
+    drip_chunk_bytes: int = 0
+    drip_interval_ms: float = 0.0
+    gzip: bool = False
+    max_sessions: int = 10000
+    session_idle_seconds: float = 300.0
+    seed: Optional[int] = None
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Serves the home page, the login form handler and the student profile page of PESU Academy.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "StandInHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def get_session(self) -> tuple[str, dict]:
+        """
+        Look up the session of the JSESSIONID cookie, creating a new anonymous session if there is none.
+        :return: The session ID and the session state
+        """
+        cookie_header = self.headers.get("Cookie", "")
+        cookies = dict(
+            part.strip().split("=", 1)
+            for part in cookie_header.split(";")
+            if "=" in part
+        )
+        session_id = cookies.get("JSESSIONID")
+        sessions = self.server.sessions
+        now = time.monotonic()
+        with self.server.lock:
+            if session_id in sessions:
+                sessions.move_to_end(session_id)
+            else:
+                # Sessions are kept in least recently used order, so idle and excess sessions are at the front
+                config = self.server.config
+                while sessions and (
+                    len(sessions) >= config.max_sessions
+                    or now - next(iter(sessions.values()))["last_seen"]
+                    > config.session_idle_seconds
+                ):
+                    sessions.popitem(last=False)
+                session_id = secrets.token_hex(16)
+                sessions[session_id] = {
+                    "csrf_token": secrets.token_urlsafe(32),
+                    "authenticated": False,
+                }
+            session = sessions[session_id]
+            session["last_seen"] = now
+            return session_id, session
+
+    def inject_faults(self) -> bool:
+        """
+        Sleep for the configured latency and inject failures.
+        :return: True if a failure was injected and the request has been handled
+        """
+        config = self.server.config
+        delay = self.server.sample_latency()
+        if delay:
+            time.sleep(delay)
+        if config.reset_rate and self.server.random.random() < config.reset_rate:
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return True
+        if config.error_rate and self.server.random.random() < config.error_rate:
+            self.respond(503, "Service Unavailable")
+            return True
+        return False
+
+    def respond(
+        self,
+        status: int,
+        body: str,
+        session_id: Optional[str] = None,
+        location: Optional[str] = None,
+    ):
+        """
+        Send a response, dripping the body in chunks if configured.
+        :param status: The HTTP status code
+        :param body: The response body
+        :param session_id: Session ID to set in the JSESSIONID cookie
+        :param location: Redirect location
+        """
+        config = self.server.config
+        data = body.encode()
+        compress = config.gzip and "gzip" in self.headers.get("Accept-Encoding", "")
+        if compress:
+            data = gzip.compress(data, compresslevel=6)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html;charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        if session_id:
+            self.send_header("Set-Cookie", f"JSESSIONID={session_id}; Path=/Academy")
+        if location:
+            self.send_header("Location", location)
+        self.end_headers()
+        if config.drip_chunk_bytes:
+            for start in range(0, len(data), config.drip_chunk_bytes):
+                self.wfile.write(data[start : start + config.drip_chunk_bytes])
+                self.wfile.flush()
+                time.sleep(config.drip_interval_ms / 1000)
+        else:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        if self.inject_faults():
+            return
+        path = urlparse(self.path).path
+        session_id, session = self.get_session()
+        padding = self.server.padding
+        if path == "/Academy/":
+            self.respond(
+                200,
+                HOME_PAGE.format(csrf_token=session["csrf_token"], padding=padding),
+                session_id,
+            )
+        elif path == "/Academy/s/studentProfilePESUAdmin":
+            if not session["authenticated"]:
+                self.respond(302, "", session_id, location="/Academy/")
+                return
+            profile = self.server.config.profile
+            self.respond(200, PROFILE_PAGE.format(padding=padding, **profile))
+        else:
+            self.respond(404, "Not Found")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        if self.inject_faults():
+            return
+        path = urlparse(self.path).path
+        if path != "/Academy/j_spring_security_check":
+            self.respond(404, "Not Found")
+            return
+        session_id, session = self.get_session()
+        if form.get("_csrf", [None])[0] != session["csrf_token"]:
+            self.respond(403, "Invalid CSRF Token")
+            return
+        username = form.get("j_username", [""])[0]
+        password = form.get("j_password", [""])[0]
+        padding = self.server.padding
+        # Spring Security rotates the CSRF token after every login attempt
+        session["csrf_token"] = secrets.token_urlsafe(32)
+        if self.server.config.users.get(username) != password:
+            self.respond(
+                200,
+                LOGIN_FAILURE_PAGE.format(
+                    csrf_token=session["csrf_token"], padding=padding
+                ),
+                session_id,
+            )
+            return
+        session["authenticated"] = True
+        self.respond(
+            200,
+            DASHBOARD_PAGE.format(
+                csrf_token=session["csrf_token"],
+                name=self.server.config.profile["name"],
+                padding=padding,
+            ),
+            session_id,
+        )
+
+
+class StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: StandInConfig):
+        super().__init__(address, StandInHandler)
+        self.config = config
+        self.sessions: OrderedDict[str, dict] = OrderedDict()
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+        self.padding = (
+            PADDING_BLOCK * (config.padding_bytes // len(PADDING_BLOCK) + 1)
+        )[: config.padding_bytes]
+
+    def handle_error(self, request, client_address):
+        # Clients close the connection once they have read the part of a page they need
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    def sample_latency(self) -> float:
+        """
+        Sample the latency of a response from the configured distribution.
+        :return: The latency in seconds
+        """
+        mean = self.config.latency_ms / 1000
+        if mean <= 0:
+            return 0.0
+        distribution = self.config.latency_distribution
+        if distribution == "uniform":
+            return self.random.uniform(0, 2 * mean)
+        if distribution == "exponential":
+            return self.random.expovariate(1 / mean)
+        if distribution == "lognormal":
+            # Long-tailed with the configured mean: the median is about 0.6 times the mean and p99 about 6 times
+            return self.random.lognormvariate(-0.5, 1) * mean
+        return mean
+
+
+class StandInServer:
+    """
+    Local stand-in for PESU Academy, running in a background thread.
+    Use it as a context manager from tests and benchmarks, and pass its base_url to PESUAcademy.
+    """
+
+    def __init__(
+        self,
+        config: Optional[StandInConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.httpd = StandInHTTPServer((host, port), config or StandInConfig())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a local stand-in for PESU Academy for load testing."
+    )
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Host (default: 127.0.0.1)"
+    )
+    parser.add_argument("--port", type=int, default=5001, help="Port (default: 5001)")
+    parser.add_argument(
+        "--username",
+        type=str,
+        default="PES1201800001",
+        help="Username that can log in (default: PES1201800001)",
+    )
+    parser.add_argument(
+        "--password",
+        type=str,
+        default="password",
+        help="Password of the user (default: password)",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Mean latency added to every response in milliseconds (default: 0)",
+    )
+    parser.add_argument(
+        "--latency-distribution",
+        choices=["constant", "uniform", "exponential", "lognormal"],
+        default="constant",
+        help="Distribution of the added latency (default: constant)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with 503 Service Unavailable (default: 0)",
+    )
+    parser.add_argument(
+        "--reset-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests whose connection is closed without a response (default: 0)",
+    )
+    parser.add_argument(
+        "--padding-bytes",
+        type=int,
+        default=0,
+        help="Bytes of filler markup added to every page (default: 0)",
+    )
+    parser.add_argument(
+        "--drip-chunk-bytes",
+        type=int,
+        default=0,
+        help="Send response bodies in chunks of this many bytes (default: 0, send at once)",
+    )
+    parser.add_argument(
+        "--drip-interval-ms",
+        type=float,
+        default=0.0,
+        help="Delay between dripped chunks in milliseconds (default: 0)",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Compress response bodies with gzip for clients that accept it, as PESU Academy does",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed for latency and failure injection"
+    )
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=10000,
+        help="Maximum number of sessions kept, least recently used are evicted first (default: 10000)",
+    )
+    parser.add_argument(
+        "--session-idle-seconds",
+        type=float,
+        default=300.0,
+        help="Seconds after which an idle session is evicted (default: 300)",
+    )
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        users={args.username: args.password},
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_distribution,
+        error_rate=args.error_rate,
+        reset_rate=args.reset_rate,
+        padding_bytes=args.padding_bytes,
+        drip_chunk_bytes=args.drip_chunk_bytes,
+        drip_interval_ms=args.drip_interval_ms,
+        gzip=args.gzip,
+        max_sessions=args.max_sessions,
+        session_idle_seconds=args.session_idle_seconds,
+        seed=args.seed,
+    )
+    server = StandInServer(config, host=args.host, port=args.port)
+    print(f"PESU Academy stand-in listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import re
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from app.pesu import PESUAcademy
+from scripts.page_corpus import CORPUS_DIR
+
+load_dotenv()
+
+CSRF_PATTERN = re.compile(rb'(name="csrf-token" content=|name="_csrf" value=)"[^"]*"')
+# Replacement values of the anonymized pages
+ANONYMOUS_PROFILE = {
+    "name": "Recorded Student",
+    "email": "recorded.student@example.com",
+    "phone": "9000000000",
+}
+
+
+def anonymize(html: bytes, profile: dict, label: str) -> bytes:
+    """
+    Replace the personal details and the CSRF tokens of a recorded page.
+    The PRN and SRN keep their campus, year and branch digits, so that the page parses to the same campus and program.
+    :param html: The recorded page
+    :param profile: The profile of the account the page was recorded with
+    :param label: Label of the page, used in its replacement CSRF tokens
+    :return: The anonymized page
+    """
+    html = CSRF_PATTERN.sub(
+        lambda match: match.group(1) + f'"anonymized-{label}"'.encode(), html
+    )
+    replacements = {profile.get(key): value for key, value in ANONYMOUS_PROFILE.items()}
+    for key in ("prn", "srn"):
+        if value := profile.get(key):
+            replacements[value] = value[:-3] + "000"
+    for original, replacement in replacements.items():
+        if original:
+            html = html.replace(original.encode(), replacement.encode())
+    return html
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Record anonymized PESU Academy pages for the page corpus. The full pages are read, not only up to "
+        "their markers. Review every recorded page before committing it."
+    )
+    parser.add_argument(
+        "--username",
+        type=str,
+        default=None,
+        help="Username to log in with (default: TEST_PRN environment variable)",
+    )
+    parser.add_argument(
+        "--password",
+        type=str,
+        default=None,
+        help="Password to log in with (default: TEST_PASSWORD environment variable)",
+    )
+    parser.add_argument(
+        "--name",
+        type=str,
+        required=True,
+        help="Name of the recorded profile page, such as btech_cse_rr",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=CORPUS_DIR,
+        help=f"Directory to write the pages to (default: {CORPUS_DIR})",
+    )
+    args = parser.parse_args()
+    username = args.username or os.getenv("TEST_PRN")
+    password = args.password or os.getenv("TEST_PASSWORD")
+
+    pesu_academy = PESUAcademy()
+    with pesu_academy.create_client() as client:
+        home = client.get(pesu_academy.home_url)
+        csrf_token = pesu_academy.parse_csrf_response(home)
+        failure = client.post(
+            pesu_academy.login_url,
+            data={"_csrf": csrf_token, "j_username": username, "j_password": ""},
+        )
+        csrf_token = pesu_academy.parse_csrf_response(failure)
+        success = client.post(
+            pesu_academy.login_url,
+            data={"_csrf": csrf_token, "j_username": username, "j_password": password},
+        )
+        if not pesu_academy.parse_login_response(success):
+            raise SystemExit("Login failed, no pages were recorded.")
+        profile_page = client.get(
+            pesu_academy.profile_url, params=pesu_academy.get_profile_query()
+        )
+        profile = pesu_academy.parse_profile_response(profile_page, username)
+    pesu_academy.close()
+
+    pages = {
+        "home.html": home,
+        "login_failure.html": failure,
+        "login_success.html": success,
+        f"profile_{args.name}.html": profile_page,
+    }
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for file_name, response in pages.items():
+        label = file_name.removesuffix(".html").replace("_", "-")
+        html = anonymize(response.content, profile, label)
+        (args.output_dir / file_name).write_bytes(html)
+        print(f"Recorded {file_name} ({len(html)} bytes)")
+    anonymized = {
+        key: ANONYMOUS_PROFILE.get(key, value) for key, value in profile.items()
+    }
+    for key in ("prn", "srn"):
+        if key in anonymized:
+            anonymized[key] = anonymized[key][:-3] + "000"
+    print("Manifest entry of the profile page:")
+    print(
+        json.dumps(
+            {f"profile_{args.name}.html": {"kind": "profile", "profile": anonymized}},
+            indent=4,
+        )
+    )
@@ -0,0 +1,102 @@
+import pytest
+
+import app.app as app_module
+from app.cache import AuthenticationCache
+from app.pesu import PESUAcademy
+from scripts.pesu_stand_in import DEFAULT_PROFILE, StandInServer
+
+USERNAME = "PES1201800001"
+PASSWORD = "password"
+
+
+@pytest.fixture
+def stand_in():
+    with StandInServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(stand_in, monkeypatch):
+    pesu_academy = PESUAcademy(base_url=stand_in.base_url, session_store_size=10)
+    monkeypatch.setattr(app_module, "pesu_academy", pesu_academy)
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+    pesu_academy.close()
+
+
+def login(client) -> dict:
+    response = client.post(
+        "/authenticate",
+        json={"username": USERNAME, "password": PASSWORD, "session": True},
+    )
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_profile_over_a_kept_session(client, stand_in):
+    result = login(client)
+    assert result["status"] is True
+    assert result["session_expires_in"] == 300
+    assert "profile" not in result
+
+    response = client.post(
+        "/profile",
+        json={"session_token": result["session_token"], "fields": ["prn", "name"]},
+    )
+    assert response.status_code == 200
+    assert response.get_json()["profile"] == {
+        "prn": DEFAULT_PROFILE["prn"],
+        "name": DEFAULT_PROFILE["name"],
+    }
+    assert "profile;dur=" in response.headers["Server-Timing"]
+    # The profile was fetched without logging in again
+    assert len(stand_in.httpd.sessions) == 1
+
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    assert "pesu_auth_session_store_size 1" in lines
+
+
+def test_unknown_token_is_unauthorized(client):
+    response = client.post("/profile", json={"session_token": "made-up"})
+    assert response.status_code == 401
+    assert response.get_json()["message"] == "Invalid or expired session token."
+
+
+@pytest.mark.parametrize("fields", [None, ["email"]])
+def test_session_ended_upstream_is_dropped(client, stand_in, fields):
+    token = login(client)["session_token"]
+    stand_in.httpd.sessions.clear()
+    response = client.post("/profile", json={"session_token": token, "fields": fields})
+    assert response.status_code == 502
+    assert client.post("/profile", json={"session_token": token}).status_code == 401
+
+
+def test_session_tokens_require_the_store(client, monkeypatch):
+    monkeypatch.setattr(app_module.pesu_academy, "session_store", None)
+    response = client.post(
+        "/authenticate",
+        json={"username": USERNAME, "password": PASSWORD, "session": True},
+    )
+    assert response.status_code == 400
+    assert "not enabled" in response.get_json()["message"]
+
+
+def test_profile_rejects_invalid_requests(client):
+    assert client.post("/profile", json={}).status_code == 400
+    response = client.post(
+        "/profile", json={"session_token": "token", "fields": ["password"]}
+    )
+    assert response.status_code == 400
+
+
+def test_session_tokens_are_never_served_from_the_cache(client, monkeypatch):
+    monkeypatch.setattr(app_module, "authentication_cache", AuthenticationCache())
+    first, second = login(client), login(client)
+    assert first["session_token"] != second["session_token"]
+    response = client.post(
+        "/authenticate", json={"username": USERNAME, "password": PASSWORD}
+    )
+    assert "session_token" not in response.get_json()
+    assert app_module.authentication_cache.stats()["hits"] == 1
@@ -0,0 +1,132 @@
+import httpx
+import pytest
+
+from app.pesu import PESUAcademy
+from app.streaming import CSRF_MARKERS, PAGE_MARKERS
+from scripts.pesu_stand_in import DEFAULT_PROFILE, StandInConfig, StandInServer
+
+
+@pytest.fixture(scope="module")
+def stand_in():
+    with StandInServer() as server:
+        yield server
+
+
+@pytest.fixture
+def pesu_academy(stand_in):
+    pesu_academy = PESUAcademy(base_url=stand_in.base_url)
+    yield pesu_academy
+    pesu_academy.close()
+
+
+def test_stand_in_authenticate_success(pesu_academy: PESUAcademy):
+    result = pesu_academy.authenticate("PES1201800001", "password")
+    assert result == {"status": True, "message": "Login successful."}
+
+
+def test_stand_in_authenticate_with_profile(pesu_academy: PESUAcademy):
+    result = pesu_academy.authenticate("PES1201800001", "password", profile=True)
+    assert result["status"] is True
+    assert result["profile"] == {
+        **DEFAULT_PROFILE,
+        "branch_short_code": "CSE",
+        "campus_code": 1,
+        "campus": "RR",
+    }
+
+
+def test_stand_in_authenticate_with_specific_profile_fields(
+    pesu_academy: PESUAcademy,
+):
+    fields = ["prn", "branch", "branch_short_code", "campus"]
+    result = pesu_academy.authenticate(
+        "PES1201800001", "password", profile=True, fields=fields
+    )
+    assert result["profile"] == {
+        "prn": "PES1201800001",
+        "branch": "Computer Science and Engineering",
+        "branch_short_code": "CSE",
+        "campus": "RR",
+    }
+
+
+def test_stand_in_authenticate_invalid_credentials(pesu_academy: PESUAcademy):
+    result = pesu_academy.authenticate("PES1201800001", "wrongpass", profile=True)
+    assert result["status"] is False
+    assert "Invalid username or password" in result["message"]
+    assert "profile" not in result
+
+
+def test_stand_in_rejects_invalid_csrf_token(stand_in):
+    with httpx.Client(base_url=stand_in.base_url) as client:
+        response = client.post(
+            "/Academy/j_spring_security_check",
+            data={"_csrf": "wrong", "j_username": "x", "j_password": "y"},
+        )
+    assert response.status_code == 403
+
+
+def test_stand_in_error_injection():
+    config = StandInConfig(error_rate=1.0)
+    with StandInServer(config) as server:
+        pesu_academy = PESUAcademy(base_url=server.base_url)
+        result = pesu_academy.authenticate("PES1201800001", "password")
+        pesu_academy.close()
+    assert result["status"] is False
+    assert "Unable to fetch csrf token" in result["message"]
+
+
+def test_stand_in_slow_drip_and_padding():
+    config = StandInConfig(
+        padding_bytes=20_000, drip_chunk_bytes=4096, drip_interval_ms=1
+    )
+    with StandInServer(config) as server:
+        response = httpx.get(f"{server.base_url}/Academy/")
+    assert response.status_code == 200
+    assert len(response.content) > 20_000
+    assert 'name="csrf-token"' in response.text
+
+
+def test_large_slow_pages_are_read_up_to_their_markers():
+    config = StandInConfig(
+        padding_bytes=1_000_000, drip_chunk_bytes=16_384, drip_interval_ms=1
+    )
+    with StandInServer(config) as server:
+        pesu_academy = PESUAcademy(base_url=server.base_url)
+        with pesu_academy.create_client() as client:
+            response = client.get(
+                pesu_academy.home_url, extensions={PAGE_MARKERS: CSRF_MARKERS}
+            )
+        result = pesu_academy.authenticate(
+            "PES1201800001", "password", profile=True, fields=["name", "email"]
+        )
+        pesu_academy.close()
+    assert len(response.content) < 100_000
+    assert pesu_academy.parse_csrf_response(response)
+    assert result["profile"] == {
+        "name": DEFAULT_PROFILE["name"],
+        "email": DEFAULT_PROFILE["email"],
+    }
+
+
+def test_gzip_pages_are_scanned_as_they_are_decoded():
+    config = StandInConfig(padding_bytes=200_000, gzip=True)
+    with StandInServer(config) as server:
+        pesu_academy = PESUAcademy(base_url=server.base_url)
+        with pesu_academy.create_client() as client:
+            response = client.get(
+                pesu_academy.home_url, extensions={PAGE_MARKERS: CSRF_MARKERS}
+            )
+        result = pesu_academy.authenticate("PES1201800001", "password", profile=True)
+        pesu_academy.close()
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert pesu_academy.parse_csrf_response(response)
+    assert result["profile"]["email"] == DEFAULT_PROFILE["email"]
+
+
+def test_stand_in_evicts_sessions_beyond_the_cap():
+    config = StandInConfig(max_sessions=3)
+    with StandInServer(config) as server:
+        for _ in range(10):
+            httpx.get(f"{server.base_url}/Academy/")
+        assert len(server.httpd.sessions) == 3
@@ -0,0 +1,183 @@
+import asyncio
+
+import httpx
+import pytest
+
+import app.app as app_module
+import app.asgi as asgi_module
+from app.cache import AuthenticationCache
+from app.circuit_breaker import CircuitBreaker
+from app.rate_limit import TokenBucketLimiter
+
+
+def post(payload) -> httpx.Response:
+    async def send():
+        transport = httpx.ASGITransport(app=asgi_module.application)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            return await client.post("/authenticate", json=payload)
+
+    return asyncio.run(send())
+
+
+@pytest.fixture
+def mock_upstream(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            if b"j_password=correct" in request.content:
+                return httpx.Response(
+                    200, text='<meta name="csrf-token" content="new-csrf-token">'
+                )
+            return httpx.Response(200, text='<div class="login-form"></div>')
+        return httpx.Response(
+            200, text='<meta name="csrf-token" content="fake-csrf-token">'
+        )
+
+    logins = []
+
+    def counting_handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            logins.append(request)
+        return handler(request)
+
+    monkeypatch.setattr(
+        asgi_module.async_pesu_academy.transport,
+        "transport",
+        httpx.MockTransport(counting_handler),
+    )
+    return logins
+
+
+def test_asgi_authenticate_success(mock_upstream):
+    response = post({"username": "user", "password": "correct"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] is True
+    assert data["message"] == "Login successful."
+    assert "timestamp" in data
+
+
+def test_asgi_authenticate_invalid_password(mock_upstream):
+    response = post({"username": "user", "password": "wrong"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] is False
+    assert "Invalid username or password" in data["message"]
+
+
+def test_asgi_authenticate_missing_username(mock_upstream):
+    response = post({"password": "correct"})
+    assert response.status_code == 400
+    data = response.json()
+    assert data["status"] is False
+    assert "username" in data["message"].lower()
+
+
+def test_asgi_authenticate_uses_cache(mock_upstream, monkeypatch):
+    monkeypatch.setattr(app_module, "authentication_cache", AuthenticationCache(ttl=60))
+    for _ in range(2):
+        response = post({"username": "user", "password": "correct"})
+        assert response.json()["status"] is True
+    assert len(mock_upstream) == 1
+    post({"username": "user", "password": "correct", "bypass_cache": True})
+    assert len(mock_upstream) == 2
+
+
+def test_asgi_authenticate_invalid_bypass_cache(mock_upstream):
+    response = post({"username": "user", "password": "correct", "bypass_cache": 1})
+    assert response.status_code == 400
+    assert "Bypass cache" in response.json()["message"]
+
+
+def test_asgi_authenticate_coalesces_concurrent_calls(monkeypatch):
+    logins = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            logins.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(
+            200, text='<meta name="csrf-token" content="fake-csrf-token">'
+        )
+
+    monkeypatch.setattr(
+        asgi_module.async_pesu_academy.transport,
+        "transport",
+        httpx.MockTransport(handler),
+    )
+
+    async def send():
+        transport = httpx.ASGITransport(app=asgi_module.application)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            payload = {"username": "user", "password": "correct"}
+            return await asyncio.gather(
+                *(client.post("/authenticate", json=payload) for _ in range(3))
+            )
+
+    responses = asyncio.run(send())
+    assert all(response.json()["status"] is True for response in responses)
+    assert len(logins) == 1
+
+
+def test_asgi_delegates_other_routes_to_flask():
+    async def send():
+        transport = httpx.ASGITransport(app=asgi_module.application)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            return await client.get("/does-not-exist")
+
+    response = asyncio.run(send())
+    assert response.status_code == 404
+
+
+def test_asgi_authenticate_sets_server_timing_header(mock_upstream):
+    response = post({"username": "user", "password": "correct"})
+    header = response.headers["server-timing"]
+    assert "csrf;dur=" in header
+    assert "login;dur=" in header
+    assert "total;dur=" in header
+
+
+def test_asgi_open_circuit_fails_fast(mock_upstream, monkeypatch):
+    breaker = CircuitBreaker(open_seconds=30.0)
+    breaker.trip(breaker.clock())
+    monkeypatch.setattr(asgi_module.async_pesu_academy, "circuit_breaker", breaker)
+    response = post({"username": "user", "password": "correct"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
+    assert response.json()["status"] is False
+    assert mock_upstream == []
+
+
+def test_asgi_rate_limited_username(mock_upstream, monkeypatch):
+    monkeypatch.setattr(
+        app_module, "username_rate_limiter", TokenBucketLimiter(rate=0.5, burst=1)
+    )
+    assert post({"username": "user", "password": "correct"}).status_code == 200
+    response = post({"username": "USER", "password": "correct"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
+    assert "username" in response.json()["message"]
+    assert len(mock_upstream) == 1
+
+
+def test_asgi_deadline_exceeded(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(
+            200, text='<meta name="csrf-token" content="fake-csrf-token">'
+        )
+
+    monkeypatch.setattr(
+        asgi_module.async_pesu_academy.transport,
+        "transport",
+        httpx.MockTransport(handler),
+    )
+    response = post({"username": "user", "password": "correct", "timeout": 1.5})
+    assert response.status_code == 504
+    assert "deadline of 1.5 seconds" in response.json()["message"]
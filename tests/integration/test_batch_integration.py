@@ -0,0 +1,172 @@
+import json
+import threading
+import time
+
+import pytest
+
+import app.app as app_module
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def read_results(response) -> list[dict]:
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_batch_streams_results_in_completion_order(client, monkeypatch):
+    def authenticate(
+        username,
+        password,
+        profile,
+        fields=None,
+        timer=None,
+        deadline=None,
+        keep_session=False,
+    ):
+        if username == "slow":
+            time.sleep(0.2)
+        return {
+            "status": password == "correct",
+            "message": "Login successful.",
+            "profile": {"name": username, "prn": "PES1201800001"},
+        }
+
+    monkeypatch.setattr(app_module.pesu_academy, "authenticate", authenticate)
+    response = client.post(
+        "/authenticate/batch",
+        json={
+            "credentials": [
+                {"username": "slow", "password": "correct"},
+                {
+                    "username": "fast",
+                    "password": "correct",
+                    "profile": True,
+                    "fields": ["name"],
+                },
+                {"username": "invalid"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    results = read_results(response)
+    assert [result["index"] for result in results][-1] == 0
+    by_index = {result["index"]: result for result in results}
+    assert by_index[0]["status"] is True
+    assert "profile" not in by_index[0]
+    assert by_index[1]["profile"] == {"name": "fast"}
+    assert by_index[2]["status"] is False
+    assert "Password not provided" in by_index[2]["message"]
+
+
+def test_batch_concurrency_is_capped(client, monkeypatch):
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def authenticate(
+        username,
+        password,
+        profile,
+        fields=None,
+        timer=None,
+        deadline=None,
+        keep_session=False,
+    ):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return {"status": True, "message": "Login successful."}
+
+    monkeypatch.setattr(app_module.pesu_academy, "authenticate", authenticate)
+    monkeypatch.setattr(app_module, "batch_concurrency", 2)
+    credentials = [
+        {"username": f"user{index}", "password": "pass"} for index in range(8)
+    ]
+    response = client.post("/authenticate/batch", json={"credentials": credentials})
+    results = read_results(response)
+    assert sorted(result["index"] for result in results) == list(range(8))
+    assert peak == 2
+
+
+def test_every_batch_result_has_a_timestamp(client, monkeypatch):
+    def authenticate(username, password, profile, *args, **kwargs):
+        if username == "broken":
+            raise RuntimeError("unexpected")
+        return {"status": True, "message": "Login successful."}
+
+    monkeypatch.setattr(app_module.pesu_academy, "authenticate", authenticate)
+    credentials = [
+        {"username": "user", "password": "pass"},
+        {"username": "broken", "password": "pass"},
+        {"username": "invalid"},
+    ]
+    response = client.post("/authenticate/batch", json={"credentials": credentials})
+    results = read_results(response)
+    assert len(results) == 3
+    assert all("timestamp" in result for result in results)
+    broken = next(result for result in results if result["index"] == 1)
+    assert "unexpected" in broken["message"]
+
+
+def test_batch_deadline_starts_with_each_login(client, monkeypatch):
+    remaining = []
+
+    def authenticate(
+        username,
+        password,
+        profile,
+        fields=None,
+        timer=None,
+        deadline=None,
+        keep_session=False,
+    ):
+        remaining.append(deadline.remaining())
+        time.sleep(0.1)
+        deadline.timeout()
+        return {"status": True, "message": "Login successful."}
+
+    monkeypatch.setattr(app_module.pesu_academy, "authenticate", authenticate)
+    monkeypatch.setattr(app_module, "batch_concurrency", 1)
+    credentials = [
+        {"username": f"user{index}", "password": "pass"} for index in range(4)
+    ]
+    response = client.post(
+        "/authenticate/batch", json={"credentials": credentials, "timeout": 0.25}
+    )
+    # The batch takes longer than its timeout, but no login waited for a worker on its own budget
+    results = read_results(response)
+    assert all(result["status"] for result in results)
+    assert min(remaining) > 0.2
+
+
+@pytest.mark.parametrize(
+    "payload, message",
+    [
+        ({}, "non-empty list"),
+        ({"credentials": []}, "non-empty list"),
+        ([{"username": "u", "password": "p"}], "JSON object"),
+    ],
+)
+def test_batch_rejects_invalid_batches(client, payload, message):
+    response = client.post("/authenticate/batch", json=payload)
+    assert response.status_code == 400
+    assert message in response.get_json()["message"]
+
+
+def test_batch_rejects_oversized_batches(client, monkeypatch):
+    monkeypatch.setattr(app_module, "batch_max_size", 1)
+    credentials = [{"username": "u", "password": "p"}] * 2
+    response = client.post("/authenticate/batch", json={"credentials": credentials})
+    assert response.status_code == 400
+    assert "at most 1" in response.get_json()["message"]
@@ -0,0 +1,214 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import app.app as app_module
+from app import metrics
+from app.metrics import PhaseTimer
+from app.admission import AdmissionController, AdmissionRejectedError
+from app.deadline import Deadline, DeadlineExceededError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for condition"
+        time.sleep(0.01)
+
+
+def test_admits_up_to_the_limit_and_sheds_when_the_queue_is_full():
+    controller = AdmissionController(initial_limit=2, queue_size=0)
+    controller.acquire()
+    controller.acquire()
+    with pytest.raises(AdmissionRejectedError) as error:
+        controller.acquire()
+    assert "wait queue is full" in str(error.value)
+    assert error.value.retry_after >= 1.0
+    assert controller.stats()["rejected"] == 1
+
+    controller.release(0.1)
+    controller.acquire()
+    assert controller.stats()["in_flight"] == 2
+
+
+def test_waiting_request_is_shed_after_the_timeout():
+    controller = AdmissionController(initial_limit=1, queue_timeout=0.05)
+    controller.acquire()
+    with pytest.raises(AdmissionRejectedError) as error:
+        controller.acquire()
+    assert "timed out" in str(error.value)
+    stats = controller.stats()
+    assert stats["queued"] == 1
+    assert stats["timed_out"] == 1
+    assert stats["waiting"] == 0
+
+
+def test_waiting_requests_are_admitted_in_arrival_order():
+    controller = AdmissionController(initial_limit=1, queue_timeout=2.0)
+    controller.acquire()
+    order = []
+
+    def wait(name: str):
+        controller.acquire()
+        order.append(name)
+        controller.release(0.1)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = []
+        for name in ("first", "second", "third"):
+            futures.append(executor.submit(wait, name))
+            wait_for(lambda: controller.stats()["waiting"] == len(futures))
+        controller.release(0.1)
+        for future in futures:
+            future.result()
+    assert order == ["first", "second", "third"]
+
+
+def test_limit_grows_while_saturated_and_latency_is_normal():
+    controller = AdmissionController(initial_limit=2, max_limit=3)
+    for _ in range(20):
+        controller.acquire()
+        controller.acquire()
+        controller.release(0.1)
+        controller.release(0.1)
+    assert controller.stats()["limit"] == 3
+
+
+def test_limit_does_not_grow_while_unused():
+    controller = AdmissionController(initial_limit=4)
+    for _ in range(20):
+        controller.acquire()
+        controller.release(0.1)
+    assert controller.stats()["limit"] == 4
+
+
+def test_limit_shrinks_on_slow_or_failed_calls():
+    clock = FakeClock()
+    controller = AdmissionController(initial_limit=10, min_limit=2, clock=clock)
+    controller.acquire()
+    controller.release(0.1)
+
+    controller.acquire()
+    controller.release(1.0)
+    assert controller.limit == pytest.approx(9.0)
+
+    # A second slow call right after belongs to the same congestion episode
+    controller.acquire()
+    controller.release(1.0)
+    assert controller.limit == pytest.approx(9.0)
+
+    clock.now += 1.0
+    controller.acquire()
+    controller.release(0.1, failed=True)
+    assert controller.limit == pytest.approx(8.1)
+
+    for _ in range(50):
+        clock.now += 1.0
+        controller.acquire()
+        controller.release(0.1, failed=True)
+    assert controller.stats()["limit"] == 2
+
+
+def test_dropped_calls_do_not_adapt_the_limit():
+    controller = AdmissionController(initial_limit=1)
+    for _ in range(5):
+        controller.acquire()
+        controller.release(0.001, dropped=True)
+    assert controller.limit == 1.0
+    assert controller.baseline is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, text='<meta name="csrf-token" content="fake-csrf-token">'
+        )
+
+    controller = AdmissionController(initial_limit=1, queue_size=1, queue_timeout=0.5)
+    monkeypatch.setattr(app_module, "admission_controller", controller)
+    monkeypatch.setattr(
+        app_module.pesu_academy.transport, "transport", httpx.MockTransport(handler)
+    )
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+    monkeypatch.setattr(
+        app_module, "authentication_metrics", metrics.AuthenticationMetrics()
+    )
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def test_login_holds_a_slot(client):
+    response = client.post(
+        "/authenticate", json={"username": "user", "password": "password"}
+    )
+    assert response.status_code == 200
+    assert "queue;dur=" in response.headers["Server-Timing"]
+    stats = app_module.admission_controller.stats()
+    assert stats["admitted"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_overloaded_server_sheds_with_retry_after(client):
+    controller = app_module.admission_controller
+    controller.acquire()
+
+    def wait():
+        with pytest.raises(AdmissionRejectedError):
+            controller.acquire()
+
+    # Keep the only place in the queue taken, so that the request is shed immediately
+    waiting = threading.Thread(target=wait)
+    waiting.start()
+    try:
+        wait_for(lambda: controller.stats()["waiting"] == 1)
+        response = client.post(
+            "/authenticate", json={"username": "user", "password": "password"}
+        )
+    finally:
+        waiting.join()
+        controller.release(0.1)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "wait queue is full" in response.get_json()["message"]
+
+    response = client.post(
+        "/authenticate/batch",
+        json={"credentials": [{"username": "user", "password": "password"}]},
+    )
+    assert response.status_code == 200
+
+    status = client.get("/status").get_json()["admission"]
+    assert status["rejected"] == 1
+    assert status["timed_out"] == 1
+
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    assert "# TYPE pesu_auth_admission_limit gauge" in lines
+    assert "pesu_auth_admission_rejected_total 1" in lines
+    assert 'pesu_auth_requests_total{outcome="load_shed"} 1' in lines
+
+
+def test_status_without_admission_control(client, monkeypatch):
+    monkeypatch.setattr(app_module, "admission_controller", None)
+    assert client.get("/status").get_json()["admission"] is None
+
+
+def test_spent_deadline_is_a_timeout_rather_than_load_shedding(client):
+    timer = PhaseTimer()
+    with pytest.raises(DeadlineExceededError):
+        with app_module.admit_login(timer, Deadline(0.0)):
+            pass
+    assert timer.outcome == metrics.DEADLINE_EXCEEDED
+    assert app_module.admission_controller.stats()["admitted"] == 0
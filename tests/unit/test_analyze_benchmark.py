@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from scripts.analyze_benchmark import (
+    bootstrap_delta,
+    compare_runs,
+    load_run,
+    summarize,
+    wall_time,
+)
+
+
+def write_run(path, times, parallel: int = 1, failed: int = 0) -> str:
+    """
+    Write a benchmark CSV of requests sent in waves of `parallel` concurrent requests.
+    :return: The path of the CSV
+    """
+    lines = ["status,time,start,end,queue"]
+    start = 0.0
+    for index, elapsed in enumerate(times):
+        if index and index % parallel == 0:
+            start += max(times[index - parallel : index])
+        lines.append(f"{int(index >= failed)},{elapsed},{start},{start + elapsed},0.0")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_throughput_of_a_parallel_run_uses_wall_clock_time(tmp_path):
+    run = load_run(write_run(tmp_path / "run.csv", [1.0] * 100, parallel=10))
+    assert wall_time(run) == (10.0, True)
+    summary = summarize(run)
+    assert summary["throughput"] == pytest.approx(10.0)
+    assert summary["p50"] == 1.0
+
+
+def test_runs_without_timestamps_fall_back_to_the_sum_of_times(tmp_path):
+    path = tmp_path / "old.csv"
+    path.write_text("status,time\n1,0.5\nnot,a row\n0,1.5\n")
+    run = load_run(str(path))
+    assert wall_time(run) == (2.0, False)
+    summary = summarize(run)
+    assert summary["total"] == 2
+    assert summary["success_rate"] == 50.0
+
+
+def test_bootstrap_interval_contains_the_observed_change():
+    rng = np.random.default_rng(0)
+    baseline = rng.lognormal(-1.5, 0.3, 1000)
+    delta, lower, upper = bootstrap_delta(
+        baseline, baseline * 1.5, 95, rng=np.random.default_rng(1)
+    )
+    assert delta == pytest.approx(0.5)
+    assert 0 < lower <= delta <= upper
+
+
+def test_compare_runs_gates_on_tail_regressions(tmp_path):
+    rng = np.random.default_rng(0)
+    times = rng.lognormal(-1.5, 0.3, 500)
+    baseline = write_run(tmp_path / "baseline.csv", times, parallel=10)
+    same = write_run(tmp_path / "same.csv", rng.permutation(times), parallel=10)
+    slower = write_run(tmp_path / "slower.csv", times * 1.3, parallel=10)
+
+    assert compare_runs(baseline, same, rng=np.random.default_rng(1)) == []
+    assert compare_runs(baseline, slower, rng=np.random.default_rng(1)) == [95, 99]
+    # A slowdown below the threshold does not fail the comparison
+    assert compare_runs(baseline, slower, threshold=0.5) == []
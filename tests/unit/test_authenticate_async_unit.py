@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.pesu import AsyncPESUAcademy
+
+PROFILE_HTML = """
+<div class="form-group"><label>Name</label> <label>Test User</label></div>
+<div class="form-group"><label>PESU Id</label> <label>PES1201800001</label></div>
+<div class="form-group"><label>SRN</label> <label>PES1UG18CS001</label></div>
+<div class="form-group"><label>Program</label> <label>Bachelor of Technology</label></div>
+<div class="form-group"><label>Branch</label> <label>Computer Science and Engineering</label></div>
+<div class="form-group"><label>Semester</label> <label>Sem-8</label></div>
+<div class="form-group"><label>Section</label> <label>Section A</label></div>
+<input id="updateMail" value=" test@example.com ">
+<input id="updateContact" value="1234567890">
+"""
+
+
+def upstream(login_html: str, profile_status: int = 200):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            return httpx.Response(200, text=login_html)
+        if request.url.path.endswith("studentProfilePESUAdmin"):
+            return httpx.Response(profile_status, text=PROFILE_HTML)
+        return httpx.Response(
+            200, text='<meta name="csrf-token" content="fake-csrf-token">'
+        )
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def pesu():
+    return AsyncPESUAcademy()
+
+
+def test_authenticate_success_no_profile(pesu):
+    pesu.transport.transport = upstream(
+        '<meta name="csrf-token" content="new-csrf-token">'
+    )
+    result = asyncio.run(pesu.authenticate("user", "pass", profile=False))
+    assert result == {"status": True, "message": "Login successful."}
+
+
+def test_authenticate_success_with_profile(pesu):
+    pesu.transport.transport = upstream(
+        '<meta name="csrf-token" content="new-csrf-token">'
+    )
+    result = asyncio.run(pesu.authenticate("user", "pass", profile=True))
+    assert result["status"] is True
+    assert result["profile"] == {
+        "name": "Test User",
+        "prn": "PES1201800001",
+        "srn": "PES1UG18CS001",
+        "program": "Bachelor of Technology",
+        "branch_short_code": "CSE",
+        "branch": "Computer Science and Engineering",
+        "semester": "Sem-8",
+        "section": "Section A",
+        "email": "test@example.com",
+        "phone": "1234567890",
+        "campus_code": 1,
+        "campus": "RR",
+    }
+
+
+def test_authenticate_with_field_filtering(pesu):
+    pesu.transport.transport = upstream(
+        '<meta name="csrf-token" content="new-csrf-token">'
+    )
+    result = asyncio.run(
+        pesu.authenticate("user", "pass", profile=True, fields=["prn", "campus"])
+    )
+    assert result["profile"] == {"prn": "PES1201800001", "campus": "RR"}
+
+
+def test_authenticate_login_failure(pesu):
+    pesu.transport.transport = upstream('<div class="login-form">Login error</div>')
+    result = asyncio.run(pesu.authenticate("user", "pass", profile=True))
+    assert result["status"] is False
+    assert "Invalid username or password" in result["message"]
+    assert "profile" not in result
+
+
+def test_authenticate_csrf_fetch_failure(pesu):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("CSRF fetch failed")
+
+    pesu.transport.transport = httpx.MockTransport(handler)
+    result = asyncio.run(pesu.authenticate("user", "pass"))
+    assert result["status"] is False
+    assert "Unable to fetch csrf token" in result["message"]
+
+
+def test_profile_page_not_accessible(pesu):
+    pesu.transport.transport = upstream(
+        '<meta name="csrf-token" content="new-csrf-token">', profile_status=500
+    )
+    result = asyncio.run(pesu.authenticate("user", "pass", profile=True))
+    assert result["status"] is True
+    assert "Unable to fetch profile data" in result["profile"]["error"]
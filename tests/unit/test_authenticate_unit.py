@@ -1,5 +1,6 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
+import httpx
 import pytest
 
 from app.pesu import PESUAcademy
@@ -14,14 +15,15 @@ def pesu():
 @patch("app.pesu.httpx.Client.post")
 def test_authenticate_success_no_profile(mock_post, mock_get, pesu):
     # Mock GET home page response with csrf token meta
-    mock_get_response = MagicMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
-    mock_get_response.status_code = 200
+    mock_get_response = httpx.Response(
+        200, text='<meta name="csrf-token" content="fake-csrf-token">'
+    )
     mock_get.return_value = mock_get_response
 
     # Mock POST login success response with csrf token meta
-    mock_post_response = MagicMock()
-    mock_post_response.text = '<meta name="csrf-token" content="new-csrf-token">'
+    mock_post_response = httpx.Response(
+        200, text='<meta name="csrf-token" content="new-csrf-token">'
+    )
     mock_post.return_value = mock_post_response
 
     result = pesu.authenticate("user", "pass", profile=False)
@@ -35,12 +37,14 @@ def test_authenticate_success_no_profile(mock_post, mock_get, pesu):
 @patch("app.pesu.httpx.Client.post")
 @patch("app.pesu.PESUAcademy.get_profile_information")
 def test_authenticate_success_with_profile(mock_get_profile, mock_post, mock_get, pesu):
-    mock_get_response = MagicMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response = httpx.Response(
+        200, text='<meta name="csrf-token" content="fake-csrf-token">'
+    )
     mock_get.return_value = mock_get_response
 
-    mock_post_response = MagicMock()
-    mock_post_response.text = '<meta name="csrf-token" content="new-csrf-token">'
+    mock_post_response = httpx.Response(
+        200, text='<meta name="csrf-token" content="new-csrf-token">'
+    )
     mock_post.return_value = mock_post_response
 
     mock_get_profile.return_value = {
@@ -72,13 +76,15 @@ def test_authenticate_csrf_fetch_failure(mock_get, pesu):
 @patch("app.pesu.httpx.Client.get")
 @patch("app.pesu.httpx.Client.post")
 def test_authenticate_login_failure(mock_post, mock_get, pesu):
-    mock_get_response = MagicMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response = httpx.Response(
+        200, text='<meta name="csrf-token" content="fake-csrf-token">'
+    )
     mock_get.return_value = mock_get_response
 
     # Simulate login failure: login form div present
-    mock_post_response = MagicMock()
-    mock_post_response.text = '<div class="login-form">Login error</div>'
+    mock_post_response = httpx.Response(
+        200, text='<div class="login-form">Login error</div>'
+    )
     mock_post.return_value = mock_post_response
 
     result = pesu.authenticate("user", "pass")
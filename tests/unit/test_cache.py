@@ -0,0 +1,147 @@
+import time
+from unittest.mock import ANY, MagicMock
+
+import pytest
+
+import app.app as app_module
+from app.cache import AuthenticationCache, CredentialHasher
+from app.pesu import PESUAcademy
+
+FULL_RESULT = {
+    "status": True,
+    "message": "Login successful.",
+    "profile": {
+        "name": "Test User",
+        "prn": "PES1201800001",
+        "branch": "Computer Science and Engineering",
+        "campus": "RR",
+    },
+}
+
+
+def test_hash_is_keyed_and_does_not_contain_credentials():
+    hasher = CredentialHasher(key=b"k" * 32)
+    digest = hasher.hash("user", "pass")
+    assert digest == hasher.hash("user", "pass")
+    assert digest != CredentialHasher(key=b"x" * 32).hash("user", "pass")
+    assert digest != hasher.hash("user", "pass2")
+    assert b"pass" not in digest
+
+
+def test_hash_separates_username_and_password():
+    hasher = CredentialHasher()
+    assert hasher.hash("ab", "c") != hasher.hash("a", "bc")
+
+
+def test_cache_hit_returns_copy():
+    cache = AuthenticationCache(ttl=60)
+    cache.set(b"key", FULL_RESULT)
+    result = cache.get(b"key", profile=True)
+    assert result == FULL_RESULT
+    result["profile"]["name"] = "Changed"
+    assert cache.get(b"key", profile=True)["profile"]["name"] == "Test User"
+    assert cache.stats()["hits"] == 2
+
+
+def test_cache_entry_without_profile_does_not_serve_profile_requests():
+    cache = AuthenticationCache(ttl=60)
+    cache.set(b"key", {"status": True, "message": "Login successful."})
+    assert cache.get(b"key", profile=False) is not None
+    assert cache.get(b"key", profile=True) is None
+
+
+def test_cache_entries_expire():
+    cache = AuthenticationCache(ttl=0.01)
+    cache.set(b"key", FULL_RESULT)
+    time.sleep(0.02)
+    assert cache.get(b"key", profile=False) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = AuthenticationCache(ttl=60, max_entries=2)
+    cache.set(b"a", FULL_RESULT)
+    cache.set(b"b", FULL_RESULT)
+    cache.get(b"a", profile=False)
+    cache.set(b"c", FULL_RESULT)
+    assert cache.get(b"b", profile=False) is None
+    assert cache.get(b"a", profile=False) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_ignores_failed_results():
+    cache = AuthenticationCache(ttl=60)
+    cache.set(b"key", {"status": False, "message": "Invalid username or password"})
+    cache.set(b"error", {"status": True, "profile": {"error": "Unable to fetch"}})
+    cache.set(
+        b"deadline",
+        {"status": True, "message": PESUAcademy.PROFILE_DEADLINE_MESSAGE},
+    )
+    assert cache.stats()["size"] == 0
+
+
+@pytest.fixture
+def mock_authenticate(monkeypatch):
+    mock = MagicMock(side_effect=lambda *args, **kwargs: dict(FULL_RESULT))
+    monkeypatch.setattr(app_module.pesu_academy, "authenticate", mock)
+    monkeypatch.setattr(app_module, "authentication_cache", AuthenticationCache(ttl=60))
+    return mock
+
+
+def test_authenticate_user_serves_field_projections_from_one_entry(mock_authenticate):
+    first = app_module.authenticate_user("user", "pass", True, ["name"])
+    second = app_module.authenticate_user("user", "pass", True, ["prn", "campus"])
+    third = app_module.authenticate_user("user", "pass", False, None)
+    assert first["profile"] == {"name": "Test User"}
+    assert second["profile"] == {"prn": "PES1201800001", "campus": "RR"}
+    assert "profile" not in third
+    mock_authenticate.assert_called_once_with(
+        "user", "pass", True, None, timer=ANY, deadline=None, keep_session=False
+    )
+
+
+def test_authenticate_user_bypass_cache(mock_authenticate):
+    app_module.authenticate_user("user", "pass", True, None)
+    app_module.authenticate_user("user", "pass", True, None, bypass_cache=True)
+    assert mock_authenticate.call_count == 2
+
+
+def test_authenticate_user_without_cache(monkeypatch):
+    mock = MagicMock(return_value=dict(FULL_RESULT))
+    monkeypatch.setattr(app_module.pesu_academy, "authenticate", mock)
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+    app_module.authenticate_user("user", "pass", True, ["name"])
+    result = app_module.authenticate_user("user", "pass", True, ["name"])
+    mock.assert_called_with(
+        "user",
+        "pass",
+        True,
+        [
+            "name",
+            "prn",
+            "srn",
+            "program",
+            "branch_short_code",
+            "branch",
+            "semester",
+            "section",
+            "campus_code",
+            "campus",
+        ],
+        timer=ANY,
+        deadline=None,
+        keep_session=False,
+    )
+    assert mock.call_count == 2
+    assert result["profile"] == {"name": "Test User"}
+
+
+def test_authenticate_user_keeps_profile_error_for_default_fields(monkeypatch):
+    error = {"status": True, "message": "Login successful.", "profile": {"error": "x"}}
+    monkeypatch.setattr(
+        app_module.pesu_academy, "authenticate", MagicMock(return_value=error)
+    )
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+    fields = list(app_module.PESUAcademyConstants.DEFAULT_FIELDS)
+    result = app_module.authenticate_user("user", "pass", True, fields)
+    assert result["profile"] == {"error": "x"}
@@ -0,0 +1,158 @@
+import httpx
+import pytest
+
+import app.app as app_module
+from app import metrics
+from app.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker(
+        window=10,
+        min_calls=4,
+        failure_rate=0.5,
+        slow_call_seconds=1.0,
+        slow_call_rate=0.75,
+        open_seconds=5.0,
+        half_open_probes=2,
+        clock=clock,
+    )
+
+
+def test_opens_when_failure_rate_is_crossed():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for failed in (False, True, False):
+        breaker.record(breaker.acquire(), failed, 0.1)
+    assert breaker.state == CLOSED
+    breaker.record(breaker.acquire(), True, 0.1)
+    assert breaker.state == OPEN
+
+    clock.now += 2.0
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.acquire()
+    assert error.value.retry_after == pytest.approx(3.0)
+    assert "Retry after 3 seconds" in str(error.value)
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_opens_when_calls_are_slow():
+    breaker = make_breaker(FakeClock())
+    for _ in range(4):
+        breaker.record(breaker.acquire(), False, 2.0)
+    assert breaker.state == OPEN
+
+
+def test_old_outcomes_leave_the_window():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record(breaker.acquire(), True, 0.1)
+    clock.now += 11.0
+    breaker.record(breaker.acquire(), True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.status()["calls"] == 1
+
+
+def test_half_open_probes_close_the_circuit():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    breaker.trip(clock.now)
+    clock.now += 5.0
+
+    first, second = breaker.acquire(), breaker.acquire()
+    assert first and second
+    assert breaker.state == HALF_OPEN
+    # Only the configured number of probes is let through
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.record(first, False, 0.1)
+    assert breaker.state == HALF_OPEN
+    breaker.record(second, False, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.acquire() is False
+
+
+def test_failed_probe_reopens_the_circuit():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    breaker.trip(clock.now)
+    clock.now += 5.0
+    probe = breaker.acquire()
+    breaker.record(probe, True, 0.1)
+    assert breaker.state == OPEN
+    assert breaker.status()["retry_after"] == pytest.approx(5.0)
+    assert breaker.stats()["opened"] == 2
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("PESU Academy is down")
+
+    breaker = CircuitBreaker(min_calls=2, open_seconds=30.0)
+    monkeypatch.setattr(app_module.pesu_academy, "circuit_breaker", breaker)
+    monkeypatch.setattr(
+        app_module.pesu_academy.transport, "transport", httpx.MockTransport(handler)
+    )
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+    monkeypatch.setattr(
+        app_module, "authentication_metrics", metrics.AuthenticationMetrics()
+    )
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def test_open_circuit_fails_fast_with_retry_after(client):
+    payload = {"username": "user", "password": "password"}
+    for _ in range(2):
+        response = client.post("/authenticate", json=payload)
+        assert response.status_code == 200
+        assert response.get_json()["message"] == "Unable to fetch csrf token."
+
+    response = client.post("/authenticate", json=payload)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert "PESU Academy is unavailable" in response.get_json()["message"]
+
+    status = client.get("/status").get_json()["circuit_breaker"]
+    assert status["state"] == "open"
+    assert status["failure_rate"] == 1.0
+
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    assert "pesu_auth_circuit_breaker_state 1" in lines
+    assert "pesu_auth_circuit_breaker_rejected_total 1" in lines
+    assert 'pesu_auth_requests_total{outcome="circuit_open"} 1' in lines
+
+
+def test_batch_reports_open_circuit(client):
+    app_module.pesu_academy.circuit_breaker.trip(
+        app_module.pesu_academy.circuit_breaker.clock()
+    )
+    response = client.post(
+        "/authenticate/batch",
+        json={"credentials": [{"username": "user", "password": "password"}]},
+    )
+    (line,) = response.get_data(as_text=True).splitlines()
+    assert '"retry_after": 30' in line
+
+
+def test_status_without_circuit_breaker(client, monkeypatch):
+    monkeypatch.setattr(app_module.pesu_academy, "circuit_breaker", None)
+    assert client.get("/status").get_json()["circuit_breaker"] is None
@@ -0,0 +1,67 @@
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from app.pesu import PESUAcademy, SharedTransport
+
+
+@pytest.fixture
+def pesu():
+    pesu = PESUAcademy(max_connections=10, max_keepalive_connections=5)
+    yield pesu
+    pesu.close()
+
+
+def test_clients_share_the_same_transport(pesu):
+    first = pesu.create_client()
+    second = pesu.create_client()
+    assert first._transport is pesu.transport
+    assert second._transport is pesu.transport
+    first.close()
+    second.close()
+
+
+def test_pool_limits_are_configurable(pesu):
+    assert pesu.limits.max_connections == 10
+    assert pesu.limits.max_keepalive_connections == 5
+    assert pesu.limits.keepalive_expiry == 30.0
+
+
+def test_clients_have_isolated_cookie_jars(pesu):
+    first = pesu.create_client()
+    second = pesu.create_client()
+    first.cookies.set("JSESSIONID", "first-session")
+    assert second.cookies.get("JSESSIONID") is None
+    first.close()
+    second.close()
+
+
+def test_closing_a_client_does_not_close_the_pool():
+    inner = MagicMock(spec=httpx.BaseTransport)
+    transport = SharedTransport(inner)
+    client = httpx.Client(transport=transport)
+    client.close()
+    inner.close.assert_not_called()
+
+    transport.shutdown()
+    inner.close.assert_called_once()
+
+
+def test_requests_are_routed_through_the_shared_pool(pesu):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="ok")
+
+    pesu.transport.transport = httpx.MockTransport(handler)
+    with pesu.create_client() as client:
+        assert client.get("https://www.pesuacademy.com/Academy/").text == "ok"
+    with pesu.create_client() as client:
+        assert client.get("https://www.pesuacademy.com/Academy/").text == "ok"
+
+
+@patch("app.pesu.httpx.Client.get")
+def test_authenticate_uses_pooled_client(mock_get, pesu):
+    mock_get.side_effect = Exception("CSRF fetch failed")
+    with patch.object(pesu, "create_client", wraps=pesu.create_client) as mock_create:
+        pesu.authenticate("user", "pass")
+    mock_create.assert_called_once()
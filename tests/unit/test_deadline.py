@@ -0,0 +1,164 @@
+import httpx
+import pytest
+
+import app.app as app_module
+from app import metrics
+from app.circuit_breaker import CircuitBreaker
+from app.deadline import Deadline, DeadlineExceededError
+from app.metrics import PhaseTimer
+from app.pesu import PESUAcademy
+
+CSRF_PAGE = '<meta name="csrf-token" content="fake-csrf-token">'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_timeout_is_a_share_of_the_remaining_budget():
+    clock = FakeClock()
+    deadline = Deadline(4.0, clock=clock)
+    assert deadline.timeout(0.5) == pytest.approx(2.0)
+    clock.now += 3.0
+    assert deadline.timeout() == pytest.approx(1.0)
+    clock.now += 1.0
+    with pytest.raises(DeadlineExceededError, match="deadline of 4 seconds"):
+        deadline.timeout()
+
+
+@pytest.mark.parametrize(
+    "body, header, seconds",
+    [
+        (None, None, 10.0),
+        (2, None, 2.0),
+        (None, "3.5", 3.5),
+        (5, "2", 2.0),
+        (120, None, 30.0),
+    ],
+)
+def test_create_deadline(body, header, seconds):
+    assert app_module.create_deadline(body, header).seconds == seconds
+
+
+@pytest.mark.parametrize(
+    "body, header",
+    [(0, None), (-1, None), ("5", None), (True, None), (None, "soon"), (None, "inf")],
+)
+def test_create_deadline_rejects_invalid_timeouts(body, header):
+    with pytest.raises(AssertionError):
+        app_module.create_deadline(body, header)
+
+
+def make_pesu_academy(handler, **kwargs) -> PESUAcademy:
+    pesu_academy = PESUAcademy(**kwargs)
+    pesu_academy.transport.transport = httpx.MockTransport(handler)
+    return pesu_academy
+
+
+def test_upstream_calls_share_the_budget():
+    timeouts = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts[request.url.path] = request.extensions["timeout"]["read"]
+        if request.url.path.endswith("j_spring_security_check"):
+            return httpx.Response(200, text=CSRF_PAGE)
+        if request.url.path.endswith("studentProfilePESUAdmin"):
+            return httpx.Response(500)
+        return httpx.Response(200, text=CSRF_PAGE)
+
+    pesu_academy = make_pesu_academy(handler)
+    result = pesu_academy.authenticate(
+        "user", "password", profile=True, deadline=Deadline(4.0)
+    )
+    assert result["status"] is True
+    # The CSRF request leaves half of the budget for the login, which may use the rest
+    assert timeouts["/Academy/"] <= 2.0
+    assert 2.0 < timeouts["/Academy/j_spring_security_check"] <= 4.0
+    assert timeouts["/Academy/s/studentProfilePESUAdmin"] <= 4.0
+
+
+def test_login_timeout_raises_deadline_exceeded():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, text=CSRF_PAGE)
+
+    breaker = CircuitBreaker(min_calls=1)
+    pesu_academy = make_pesu_academy(handler, circuit_breaker=breaker)
+    timer = PhaseTimer()
+    with pytest.raises(DeadlineExceededError):
+        pesu_academy.authenticate(
+            "user", "password", timer=timer, deadline=Deadline(1.0)
+        )
+    assert timer.outcome == metrics.DEADLINE_EXCEEDED
+    # The caller ran out of time, which is not a failure of PESU Academy
+    assert breaker.stats()["window_failures"] == 0
+
+
+def test_timeout_without_deadline_is_an_upstream_error():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, text=CSRF_PAGE)
+
+    timer = PhaseTimer()
+    result = make_pesu_academy(handler).authenticate("user", "password", timer=timer)
+    assert result["message"] == "Unable to authenticate."
+    assert timer.outcome == metrics.UPSTREAM_ERROR
+
+
+def test_profile_past_the_deadline_is_left_out():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("studentProfilePESUAdmin"):
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, text=CSRF_PAGE)
+
+    timer = PhaseTimer()
+    result = make_pesu_academy(handler).authenticate(
+        "user", "password", profile=True, timer=timer, deadline=Deadline(1.0)
+    )
+    assert result == {
+        "status": True,
+        "message": PESUAcademy.PROFILE_DEADLINE_MESSAGE,
+    }
+    assert timer.outcome == metrics.SUCCESS
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, text=CSRF_PAGE)
+
+    monkeypatch.setattr(
+        app_module.pesu_academy.transport, "transport", httpx.MockTransport(handler)
+    )
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def test_authenticate_returns_504_past_the_deadline(client):
+    response = client.post(
+        "/authenticate",
+        json={"username": "user", "password": "password"},
+        headers={"X-Request-Timeout": "2"},
+    )
+    assert response.status_code == 504
+    assert response.get_json()["message"] == (
+        "PESU Academy did not respond within the deadline of 2 seconds."
+    )
+
+
+def test_authenticate_rejects_invalid_timeout(client):
+    response = client.post(
+        "/authenticate",
+        json={"username": "user", "password": "password", "timeout": "soon"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,113 @@
+import itertools
+
+import httpx
+import pytest
+
+from app.constants import PESUAcademyConstants
+from app.fetch_plan import FULL_PLAN, FetchPlan, plan_profile_fetch
+from app.pesu import PESUAcademy
+from scripts.benchmark_profile_parser import stand_in_page
+from scripts.page_corpus import CORPUS_DIR
+
+PRN = "PES1201800001"
+FIELDS = PESUAcademyConstants.DEFAULT_FIELDS
+# Every single field, every pair of fields and all fields together
+FIELD_SETS = [[field] for field in FIELDS] + [
+    list(pair) for pair in itertools.combinations(FIELDS, 2)
+]
+
+
+@pytest.fixture
+def pesu():
+    page = stand_in_page(0)
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("j_spring_security_check"):
+            return httpx.Response(
+                200, text='<meta name="csrf-token" content="new-csrf-token">'
+            )
+        if request.url.path.endswith("studentProfilePESUAdmin"):
+            return httpx.Response(200, text=page)
+        return httpx.Response(
+            200, text='<meta name="csrf-token" content="fake-csrf-token">'
+        )
+
+    pesu_academy = PESUAcademy()
+    pesu_academy.transport.transport = httpx.MockTransport(handler)
+    pesu_academy.requests = requests
+    yield pesu_academy
+    pesu_academy.close()
+
+
+def profile_requests(pesu_academy: PESUAcademy) -> int:
+    return sum(
+        request.url.path.endswith("studentProfilePESUAdmin")
+        for request in pesu_academy.requests
+    )
+
+
+def test_full_plan():
+    assert plan_profile_fetch("user@example.com", None) == FULL_PLAN
+    assert FULL_PLAN.fields() == FIELDS
+
+
+def test_campus_of_a_prn_username_needs_no_page():
+    plan = plan_profile_fetch(PRN.lower(), ["campus"])
+    assert plan == FetchPlan(
+        details=False, contact=False, campus={"campus_code": 1, "campus": "RR"}
+    )
+    assert not plan.fetch_profile_page
+    assert plan.fields() == ["campus_code", "campus"]
+
+
+def test_campus_of_other_usernames_needs_the_prn_on_the_page():
+    for username in ("PES1UG18CS001", "user@example.com", "9876543210"):
+        plan = plan_profile_fetch(username, ["campus_code"])
+        assert plan == FetchPlan(details=True, contact=False)
+
+
+def test_name_skips_the_contact_inputs():
+    plan = plan_profile_fetch(PRN, ["name"])
+    assert plan.details and not plan.contact
+    assert "email" not in plan.fields()
+
+
+@pytest.mark.parametrize("username", [PRN, "PES1UG18CS001"])
+@pytest.mark.parametrize("fields", FIELD_SETS + [FIELDS])
+def test_planned_profile_matches_the_full_scrape(pesu, username, fields):
+    full = pesu.authenticate(username, "password", profile=True)
+    full_requests = profile_requests(pesu)
+    planned = pesu.authenticate(username, "password", profile=True, fields=fields)
+    assert planned["profile"] == PESUAcademy.filter_profile_fields(
+        full["profile"], fields
+    )
+    assert profile_requests(pesu) - full_requests == int(
+        plan_profile_fetch(username, fields).fetch_profile_page
+    )
+
+
+def test_campus_only_login_does_not_fetch_the_profile_page(pesu):
+    result = pesu.authenticate(PRN, "password", profile=True, fields=["campus"])
+    assert result["profile"] == {"campus": "RR"}
+    assert profile_requests(pesu) == 0
+
+
+@pytest.mark.parametrize("fields", FIELD_SETS + [FIELDS])
+def test_planned_profile_of_a_page_without_contact_inputs(pesu, fields):
+    html = (CORPUS_DIR / "profile_mca_rr_no_contact.html").read_bytes()
+    full = pesu.parse_profile_response(httpx.Response(200, content=html), PRN)
+    assert "email" not in full
+    plan = plan_profile_fetch(PRN, fields)
+    planned = pesu.parse_profile_response(httpx.Response(200, content=html), PRN, plan)
+    assert PESUAcademy.filter_profile_fields(
+        planned, fields
+    ) == PESUAcademy.filter_profile_fields(full, fields)
+
+
+def test_planned_profile_rejects_the_login_page(pesu):
+    response = httpx.Response(200, text="<div class='login-form'></div>")
+    plan = plan_profile_fetch(PRN, ["email"])
+    with pytest.raises(ValueError, match="returned the login page"):
+        pesu.parse_profile_response(response, PRN, plan)
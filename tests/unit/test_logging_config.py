@@ -0,0 +1,110 @@
+import io
+import json
+import logging
+import threading
+
+import pytest
+
+from app import logging_config
+from app.logging_config import (
+    SamplingFilter,
+    parse_sample_rates,
+    setup_logging,
+    stop_logging,
+)
+from app.pesu import BasePESUAcademy
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def make_record(name: str, level: int) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, "message", None, None)
+
+
+def test_json_format(root_logger):
+    stream = io.StringIO()
+    setup_logging(json_format=True, stream=stream)
+    logging.getLogger("app.pesu").info("Login for user=%s", "PES1201800001")
+    entry = json.loads(stream.getvalue())
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.pesu"
+    assert entry["message"] == "Login for user=PES1201800001"
+
+
+def test_background_logging_formats_in_listener(root_logger):
+    class Argument:
+        formatted_by = None
+
+        def __str__(self):
+            Argument.formatted_by = threading.current_thread()
+            return "argument"
+
+    stream = io.StringIO()
+    setup_logging(background=True, stream=stream)
+    listener_thread = logging_config.queue_listener._thread
+    logging.getLogger("app.app").info("Formatted %s", Argument())
+    stop_logging()
+    assert "Formatted argument" in stream.getvalue()
+    assert Argument.formatted_by is listener_thread
+
+
+def test_sampling_filter_keeps_warnings_and_unsampled_loggers():
+    sampling_filter = SamplingFilter({"app.pesu": 0.0})
+    assert not sampling_filter.filter(make_record("app.pesu", logging.INFO))
+    assert not sampling_filter.filter(make_record("app.pesu.child", logging.DEBUG))
+    assert sampling_filter.filter(make_record("app.pesu", logging.WARNING))
+    assert sampling_filter.filter(make_record("app.app", logging.INFO))
+
+
+def test_sampling_filter_rate():
+    sampling_filter = SamplingFilter({"app": 0.25})
+    sampling_filter.random.seed(0)
+    kept = sum(
+        sampling_filter.filter(make_record("app.pesu", logging.INFO))
+        for _ in range(4000)
+    )
+    assert 800 < kept < 1200
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates(["app.pesu=0.1", "app.app=1"]) == {
+        "app.pesu": 0.1,
+        "app.app": 1.0,
+    }
+    with pytest.raises(AssertionError, match="Invalid sampling rate"):
+        parse_sample_rates(["app.pesu=2"])
+
+
+def test_branch_short_code_warning_logged_once(monkeypatch, caplog):
+    monkeypatch.setattr(BasePESUAcademy, "branch_short_code_warned", False)
+    with caplog.at_level(logging.WARNING, logger="app.pesu"):
+        BasePESUAcademy.map_branch_to_short_code("Computer Science and Engineering")
+        BasePESUAcademy.map_branch_to_short_code("Computer Science and Engineering")
+    assert (
+        len([record for record in caplog.records if "deprecated" in record.message])
+        == 1
+    )
+
+
+def test_background_logging_restarts_after_fork(root_logger):
+    stream = io.StringIO()
+    setup_logging(background=True, stream=stream)
+    parent_listener = logging_config.queue_listener
+    # Simulate the fork hook, which replaces the listener thread that a forked child does not inherit
+    logging_config.after_fork()
+    parent_listener.stop()
+    assert logging_config.queue_listener is not parent_listener
+    logging.getLogger("app.app").info("Logged from the child")
+    stop_logging()
+    assert "Logged from the child" in stream.getvalue()
@@ -0,0 +1,151 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import app.app as app_module
+from app import metrics
+from app.metrics import AuthenticationMetrics, PhaseTimer
+from app.singleflight import SingleFlight
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for condition"
+        time.sleep(0.01)
+
+
+def test_server_timing_lists_recorded_phases_and_total():
+    timer = PhaseTimer()
+    timer.durations[metrics.CSRF] = 0.0125
+    timer.durations[metrics.LOGIN] = 0.2
+    timer.finish(metrics.SUCCESS)
+    header = timer.server_timing()
+    assert header.startswith("csrf;dur=12.5, login;dur=200.0, total;dur=")
+    assert "profile" not in header
+
+
+def test_render_counts_requests_by_outcome():
+    authentication_metrics = AuthenticationMetrics(buckets=(0.1, 1.0))
+    for outcome, duration in (
+        (metrics.SUCCESS, 0.05),
+        (metrics.SUCCESS, 0.5),
+        (metrics.INVALID_CREDENTIALS, 0.05),
+    ):
+        timer = PhaseTimer()
+        timer.durations[metrics.LOGIN] = duration
+        timer.finish(outcome)
+        authentication_metrics.observe(timer)
+    # Timers without an outcome did not complete an upstream login and are not counted
+    authentication_metrics.observe(PhaseTimer())
+
+    lines = authentication_metrics.render().splitlines()
+    assert "# TYPE pesu_auth_requests_total counter" in lines
+    assert 'pesu_auth_requests_total{outcome="success"} 2' in lines
+    assert 'pesu_auth_requests_total{outcome="invalid_credentials"} 1' in lines
+    assert 'pesu_auth_requests_total{outcome="upstream_error"} 0' in lines
+    assert "# TYPE pesu_auth_phase_duration_seconds histogram" in lines
+    assert (
+        'pesu_auth_phase_duration_seconds_bucket{phase="login",outcome="success",le="0.1"} 1'
+        in lines
+    )
+    assert (
+        'pesu_auth_phase_duration_seconds_bucket{phase="login",outcome="success",le="+Inf"} 2'
+        in lines
+    )
+    assert (
+        'pesu_auth_phase_duration_seconds_count{phase="login",outcome="success"} 2'
+        in lines
+    )
+    assert not any('phase="csrf"' in line for line in lines)
+
+
+@pytest.fixture
+def authentication_metrics(monkeypatch):
+    authentication_metrics = AuthenticationMetrics()
+    monkeypatch.setattr(app_module, "authentication_metrics", authentication_metrics)
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+    return authentication_metrics
+
+
+def test_coalesced_failure_is_counted_once(monkeypatch, authentication_metrics):
+    release = threading.Event()
+    single_flight = SingleFlight()
+
+    def authenticate(
+        username,
+        password,
+        profile,
+        fields=None,
+        timer=None,
+        deadline=None,
+        keep_session=False,
+    ):
+        release.wait()
+        raise httpx.ConnectError("upstream down")
+
+    monkeypatch.setattr(app_module.pesu_academy, "authenticate", authenticate)
+    monkeypatch.setattr(app_module, "single_flight", single_flight)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(app_module.authenticate_user, "user", "pass", False, None)
+            for _ in range(3)
+        ]
+        try:
+            wait_for(lambda: single_flight.stats()["coalesced"] == 2)
+        finally:
+            release.set()
+        for future in futures:
+            with pytest.raises(httpx.ConnectError):
+                future.result()
+
+    assert authentication_metrics.requests[metrics.UPSTREAM_ERROR] == 1
+    assert sum(authentication_metrics.requests) == 1
+
+
+@pytest.fixture
+def client(monkeypatch, authentication_metrics):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            if b"j_password=correct" in request.content:
+                return httpx.Response(
+                    200, text='<meta name="csrf-token" content="new-csrf-token">'
+                )
+            return httpx.Response(200, text='<div class="login-form"></div>')
+        return httpx.Response(
+            200, text='<meta name="csrf-token" content="fake-csrf-token">'
+        )
+
+    monkeypatch.setattr(
+        app_module.pesu_academy.transport, "transport", httpx.MockTransport(handler)
+    )
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def test_authenticate_sets_server_timing_header(client):
+    response = client.post(
+        "/authenticate", json={"username": "user", "password": "correct"}
+    )
+    assert response.status_code == 200
+    header = response.headers["Server-Timing"]
+    assert "csrf;dur=" in header
+    assert "login;dur=" in header
+    assert "total;dur=" in header
+
+
+def test_metrics_route_exports_outcomes(client):
+    client.post("/authenticate", json={"username": "user", "password": "correct"})
+    client.post("/authenticate", json={"username": "user", "password": "wrong"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    lines = response.get_data(as_text=True).splitlines()
+    assert 'pesu_auth_requests_total{outcome="success"} 1' in lines
+    assert 'pesu_auth_requests_total{outcome="invalid_credentials"} 1' in lines
+    assert "# TYPE pesu_auth_single_flight_in_flight gauge" in lines
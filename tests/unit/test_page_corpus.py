@@ -0,0 +1,112 @@
+import httpx
+import pytest
+
+from app.fetch_plan import FULL_PLAN
+from app.pesu import PESUAcademy, SharedTransport
+from app.profile_parser import BACKENDS, ProfilePageParser
+from app.streaming import CSRF_MARKERS, LOGIN_MARKERS, PAGE_MARKERS, PageMarkers
+from scripts.page_corpus import large_page, load_corpus, load_manifest, malformed_pages
+from tests.unit.test_streaming import ChunkedStream
+
+MANIFEST = load_manifest()
+CORPUS = load_corpus()
+MARKERS = {
+    "home": CSRF_MARKERS,
+    "login": LOGIN_MARKERS,
+    "profile": PageMarkers.for_profile(FULL_PLAN.details, FULL_PLAN.contact),
+}
+
+
+@pytest.fixture(params=list(BACKENDS))
+def pesu(request):
+    pesu_academy = PESUAcademy()
+    pesu_academy.profile_parser = ProfilePageParser(request.param)
+    yield pesu_academy
+    pesu_academy.close()
+
+
+def replay(html: bytes, kind: str, streamed: bool, chunk_bytes: int = 512):
+    """
+    Serve a page through the shared transport in chunks, the way it arrives from the upstream.
+    :return: The response, read whole or up to its markers
+    """
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={
+                "Content-Type": "text/html;charset=UTF-8",
+                "Content-Length": str(len(html)),
+            },
+            stream=ChunkedStream(html, chunk_bytes),
+        )
+
+    extensions = {PAGE_MARKERS: MARKERS[kind]} if streamed else {}
+    transport = SharedTransport(httpx.MockTransport(handler))
+    with httpx.Client(transport=transport) as client:
+        return client.get("https://pesu.test/", extensions=extensions)
+
+
+def parse(pesu_academy: PESUAcademy, kind: str, response: httpx.Response):
+    """
+    Parse a page with the parser of its kind.
+    :return: The parsed result, or the type and message of the exception it raised
+    """
+    try:
+        if kind == "home":
+            return pesu_academy.parse_csrf_response(response)
+        if kind == "login":
+            return pesu_academy.parse_login_response(response)
+        return pesu_academy.parse_profile_response(response, "user")
+    except Exception as e:
+        return type(e), str(e)
+
+
+def expected(entry: dict):
+    return {
+        "home": entry.get("csrf_token"),
+        "login": entry.get("authenticated"),
+        "profile": entry.get("profile"),
+    }[entry["kind"]]
+
+
+def test_manifest_covers_every_kind_of_page():
+    kinds = [entry["kind"] for entry in MANIFEST.values()]
+    assert {"home", "login", "profile"} == set(kinds)
+    assert {True, False} == {
+        entry["authenticated"]
+        for entry in MANIFEST.values()
+        if "authenticated" in entry
+    }
+    campuses = {
+        entry["profile"]["campus"] for entry in MANIFEST.values() if "profile" in entry
+    }
+    assert campuses == {"RR", "EC"}
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+@pytest.mark.parametrize("name", list(MANIFEST))
+def test_recorded_pages_parse_as_recorded(pesu, name, streamed):
+    entry = MANIFEST[name]
+    response = replay(CORPUS[name], entry["kind"], streamed)
+    assert parse(pesu, entry["kind"], response) == expected(entry)
+
+
+@pytest.mark.parametrize("name", list(MANIFEST))
+def test_large_recorded_pages_are_read_up_to_their_markers(pesu, name):
+    entry = MANIFEST[name]
+    html = large_page(CORPUS[name], 1_000_000)
+    response = replay(html, entry["kind"], streamed=True, chunk_bytes=16_384)
+    assert parse(pesu, entry["kind"], response) == expected(entry)
+    # A successful login and a profile page without the contact form have no markers that end them early
+    read_whole = entry.get("authenticated", False) or (
+        entry["kind"] == "profile" and "email" not in entry["profile"]
+    )
+    assert (len(response.content) == len(html)) == read_whole
+
+
+@pytest.mark.parametrize("name", list(malformed_pages(CORPUS)))
+def test_malformed_pages_parse_the_same_streamed_or_whole(pesu, name):
+    kind, html = malformed_pages(CORPUS)[name]
+    whole = parse(pesu, kind, replay(html, kind, streamed=False))
+    assert parse(pesu, kind, replay(html, kind, streamed=True)) == whole
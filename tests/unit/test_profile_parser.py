@@ -0,0 +1,141 @@
+import httpx
+import pytest
+
+from app.pesu import PESUAcademy
+from app.profile_parser import BACKENDS, ProfilePageParser
+from scripts.benchmark_profile_parser import legacy_extract, stand_in_page
+
+NESTED_PAGE = """
+<div class="form-group outer"><label class="lbl-title-light">Name</label> <label>Nested User</label>
+    <div class="form-group"><label class="lbl-title-light">PESU Id</label> <label>PES2202300123</label></div>
+</div>
+<div class="form-group"><label class="lbl-title-light">SRN</label> <label>PES2UG23EC123</label></div>
+<div class="form-group"><label class="lbl-title-light">Program</label> <label>Bachelor of Technology</label></div>
+<div class="form-group"><label class="lbl-title-light">Branch</label> <label>Electronics and Communication Engineering</label></div>
+<div class="form-group"><label class="lbl-title-light">Semester</label> <label>Sem-2</label></div>
+<div class="form-group"><label class="lbl-title-light">Section</label> <label>Section B</label></div>
+<div class="form-group"><label class="lbl-title-light">Ignored</label> <label>Eighth group</label></div>
+<input id="updateMail" value="">
+"""
+
+MISSING_CONTACT_PAGE = """
+<div class="form-group"><label>PESU Id</label> <label>PES1201800002</label></div>
+<div class="form-group"><label>Name</label> <label>  Spaced   Name  </label></div>
+<input id="updateContact">
+<input id="updateContact" value="duplicate">
+"""
+
+BLANK_CONTACT_PAGE = """
+<div class="form-group"><label>PESU Id</label> <label>PES1201800003</label></div>
+<input id="updateMail" value="">
+<input id="updateContact" value="   ">
+"""
+
+PAGES = [
+    stand_in_page(0),
+    stand_in_page(50_000),
+    NESTED_PAGE,
+    MISSING_CONTACT_PAGE,
+    BLANK_CONTACT_PAGE,
+]
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("html", PAGES)
+def test_extract_matches_css_scans(backend, html):
+    assert ProfilePageParser(backend).extract(html) == legacy_extract(html, backend)
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("html", PAGES)
+def test_profile_matches_previous_parser(backend, html):
+    response = httpx.Response(200, text=html)
+    pesu_academy = PESUAcademy(parser_backend=backend)
+    profile = pesu_academy.parse_profile_response(response, "user")
+
+    pesu_academy.profile_parser.extract = lambda page, *plan: legacy_extract(
+        page, backend
+    )
+    assert profile == pesu_academy.parse_profile_response(response, "user")
+    pesu_academy.close()
+
+
+@pytest.mark.parametrize("html", PAGES)
+def test_profile_is_the_same_with_both_backends(html):
+    profiles = []
+    for backend in BACKENDS:
+        pesu_academy = PESUAcademy(parser_backend=backend)
+        response = httpx.Response(200, text=html)
+        profiles.append(pesu_academy.parse_profile_response(response, "user"))
+        pesu_academy.close()
+    assert profiles[0] == profiles[1]
+
+
+def test_blank_contact_values():
+    response = httpx.Response(200, text=BLANK_CONTACT_PAGE)
+    profile = PESUAcademy(parser_backend="lexbor").parse_profile_response(
+        response, "user"
+    )
+    # An empty attribute is None with both backends, while a whitespace-only value is an empty string as before
+    assert profile["email"] is None
+    assert profile["phone"] == ""
+
+
+def test_extract_stops_after_profile_and_contact_inputs():
+    page = ProfilePageParser().extract(NESTED_PAGE)
+    assert len(page.form_groups) == 7
+    assert "Eighth group" not in "".join(page.form_groups)
+    assert list(page.contact_inputs) == ["updateMail"]
+
+
+def test_invalid_backend():
+    with pytest.raises(ValueError, match="Invalid parser backend"):
+        ProfilePageParser("html5lib")
+
+
+def test_extract_only_what_the_plan_needs():
+    details = ProfilePageParser().extract(stand_in_page(0), contact=False)
+    assert len(details.form_groups) == 7
+    assert details.contact_inputs == {}
+
+    contact = ProfilePageParser().extract(stand_in_page(0), details=False)
+    assert contact.form_groups == []
+    assert contact.contact_inputs == legacy_extract(stand_in_page(0)).contact_inputs
+
+
+UNICODE_PAGE = """<meta charset="iso-8859-1">
+<div class="form-group"><label>PESU Id</label> <label>PES1201800003</label></div>
+<div class="form-group"><label>Name</label> <label>Ñandú Ramírez ✓</label></div>
+"""
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize(
+    "content_type",
+    ["text/html;charset=UTF-8", "text/html;charset=us-ascii", "text/html", None],
+)
+def test_utf8_bodies_are_parsed_from_bytes(backend, content_type):
+    headers = {"Content-Type": content_type} if content_type else {}
+    response = httpx.Response(200, headers=headers, content=UNICODE_PAGE.encode())
+    assert PESUAcademy.response_markup(response) is response.content
+    pesu_academy = PESUAcademy(parser_backend=backend)
+    profile = pesu_academy.parse_profile_response(response, "user")
+    pesu_academy.close()
+    # The meta tag is ignored like it was when the decoded text was parsed
+    assert profile["name"] == "Ñandú Ramírez ✓"
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_other_declared_encodings_are_decoded(backend):
+    html = UNICODE_PAGE.replace(" ✓", "")
+    response = httpx.Response(
+        200,
+        headers={"Content-Type": "text/html; charset=ISO-8859-1"},
+        content=html.encode("latin-1"),
+    )
+    assert PESUAcademy.response_markup(response) == html
+    pesu_academy = PESUAcademy(parser_backend=backend)
+    assert pesu_academy.parse_profile_response(response, "user")["name"] == (
+        "Ñandú Ramírez"
+    )
+    pesu_academy.close()
@@ -0,0 +1,130 @@
+import httpx
+import pytest
+
+import app.app as app_module
+from app.rate_limit import TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_then_refill():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rate=2.0, burst=3, clock=clock)
+    assert [limiter.acquire("client") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("client") == pytest.approx(0.5)
+
+    clock.now += 0.25
+    assert limiter.acquire("client") == pytest.approx(0.25)
+    clock.now += 0.25
+    assert limiter.acquire("client") == 0.0
+
+    # Refilling never goes over the burst
+    clock.now += 100.0
+    assert [limiter.acquire("client") for _ in range(4)][-1] > 0
+    assert limiter.stats() == {"keys": 1, "allowed": 7, "limited": 3, "evicted": 0}
+
+
+def test_keys_have_separate_buckets():
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, clock=FakeClock())
+    assert limiter.acquire("first") == 0.0
+    assert limiter.acquire("first") > 0
+    assert limiter.acquire("second") == 0.0
+
+
+def test_least_recently_used_keys_are_evicted():
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, max_keys=2, shards=1)
+    limiter.acquire("first")
+    limiter.acquire("second")
+    limiter.acquire("first")
+    limiter.acquire("third")
+    stats = limiter.stats()
+    assert stats["keys"] == 2
+    assert stats["evicted"] == 1
+    assert set(limiter.shards[0].buckets) == {"first", "third"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("j_spring_security_check"):
+            return httpx.Response(200, text='<div class="login-form"></div>')
+        return httpx.Response(
+            200, text='<meta name="csrf-token" content="fake-csrf-token">'
+        )
+
+    monkeypatch.setattr(
+        app_module.pesu_academy.transport, "transport", httpx.MockTransport(handler)
+    )
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+    monkeypatch.setattr(app_module, "api_keys", frozenset({"known-key"}))
+    monkeypatch.setattr(
+        app_module, "client_rate_limiter", TokenBucketLimiter(rate=0.1, burst=2)
+    )
+    monkeypatch.setattr(
+        app_module, "username_rate_limiter", TokenBucketLimiter(rate=0.1, burst=3)
+    )
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def login(client, username: str = "user", headers=None):
+    return client.post(
+        "/authenticate",
+        json={"username": username, "password": "wrong"},
+        headers=headers,
+    )
+
+
+def test_client_is_rate_limited(client):
+    assert login(client, "first").status_code == 200
+    assert login(client, "second").status_code == 200
+    response = login(client, "third")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    assert response.get_json()["message"].startswith(
+        "Too many requests for this client."
+    )
+
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    assert "pesu_auth_client_rate_limit_limited_total 1" in lines
+    assert "pesu_auth_client_rate_limit_keys 1" in lines
+
+
+def test_known_api_key_gets_its_own_bucket(client):
+    login(client, "first")
+    login(client, "second")
+    assert login(client, "third").status_code == 429
+    assert login(client, "third", headers={"X-API-Key": "known-key"}).status_code == 200
+    # Unknown keys fall back to the address of the client
+    assert login(client, "third", headers={"X-API-Key": "made-up"}).status_code == 429
+
+
+def test_username_is_rate_limited_across_clients(client, monkeypatch):
+    monkeypatch.setattr(app_module, "client_rate_limiter", None)
+    for username in ("User", "user", "USER"):
+        assert login(client, username).status_code == 200
+    response = login(client, "user", headers={"X-API-Key": "known-key"})
+    assert response.status_code == 429
+    assert "username" in response.get_json()["message"]
+
+
+def test_batch_items_are_rate_limited(client):
+    response = client.post(
+        "/authenticate/batch",
+        json={
+            "credentials": [
+                {"username": f"user{index}", "password": "wrong"} for index in range(3)
+            ]
+        },
+    )
+    results = response.get_data(as_text=True).splitlines()
+    limited = [line for line in results if '"retry_after": 10' in line]
+    assert len(results) == 3
+    assert len(limited) == 1
@@ -1,29 +1,105 @@
-from unittest.mock import mock_open, patch
+import gzip
+from unittest.mock import patch
 
+import pytest
 
 import app.app as app_module
+from app.precompressed import PrecompressedContent
 
 
-def test_convert_readme_to_html_writes_html():
-    m_open = mock_open(read_data="# Title\nSome content")
-    with patch("builtins.open", m_open):
-        with patch("gh_md_to_html.main") as mock_gh_md_to_html:
-            mock_gh_md_to_html.return_value = "<h1>Title</h1>"
-            app_module.convert_readme_to_html()
-    # Now you can assert open was called to write "README_tmp.md" and "README.html"
-    m_open.assert_any_call("README_tmp.md", "w")
-    m_open.assert_any_call("README.html", "w")
-    handle = m_open()
-    handle.write.assert_any_call("<h1>Title</h1>")
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, "readme_content", None)
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def test_convert_readme_to_html_writes_no_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "README.md").write_text("# Title :rocket: Some content")
+    with patch("gh_md_to_html.main") as mock_gh_md_to_html:
+        mock_gh_md_to_html.return_value = "<h1>Title</h1>\n"
+        html = app_module.convert_readme_to_html()
+    assert html == "<h1>Title</h1>"
+    assert mock_gh_md_to_html.call_args.args[0] == "# Title Some content"
+    assert mock_gh_md_to_html.call_args.kwargs["origin_type"] == "string"
+    assert [path.name for path in tmp_path.iterdir()] == ["README.md"]
 
 
 def test_readme_raises_exception(monkeypatch):
     def raise_exception():
         raise Exception("fail")
 
-    monkeypatch.setattr(app_module.os, "listdir", lambda: [])
+    monkeypatch.setattr(app_module, "readme_content", None)
     monkeypatch.setattr(app_module, "convert_readme_to_html", raise_exception)
 
     response, status_code = app_module.readme()
     assert status_code == 500
     assert "Error occurred" in response
+
+
+def test_readme_is_rendered_once(client, monkeypatch):
+    calls = []
+
+    def convert():
+        calls.append(1)
+        return "<h1>README</h1>" * 100
+
+    monkeypatch.setattr(app_module, "convert_readme_to_html", convert)
+    for _ in range(3):
+        response = client.get("/readme")
+        assert response.status_code == 200
+        assert response.get_data(as_text=True) == "<h1>README</h1>" * 100
+    assert response.mimetype == "text/html"
+    assert response.headers["Cache-Control"] == app_module.README_CACHE_CONTROL
+    assert len(calls) == 1
+
+
+def test_readme_conditional_get_and_compression(client, monkeypatch):
+    html = "<h1>README</h1>" * 100
+    monkeypatch.setattr(app_module, "convert_readme_to_html", lambda: html)
+
+    response = client.get("/readme", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.get_data()).decode() == html
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        "/readme", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    assert response.headers["ETag"] == etag
+
+    # The gzip entity tag does not validate the uncompressed representation
+    response = client.get("/readme", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("", None),
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("identity", None),
+        ("*", "br"),
+    ],
+)
+def test_content_negotiation(accept_encoding, expected):
+    pytest.importorskip("brotli")
+    content = PrecompressedContent.create(b"<p>content</p>" * 100, "text/html")
+    with app_module.app.test_request_context(
+        headers={"Accept-Encoding": accept_encoding}
+    ):
+        assert content.negotiate(app_module.request) == expected
+
+
+def test_incompressible_content_has_no_variants():
+    content = PrecompressedContent.create(b"x", "text/plain")
+    assert content.variants == {}
@@ -0,0 +1,43 @@
+import pytest
+
+from app.app import app
+from app.server import run_gunicorn
+
+gunicorn_base = pytest.importorskip("gunicorn.app.base")
+
+
+def test_run_gunicorn_configures_workers(monkeypatch):
+    applications = []
+    monkeypatch.setattr(
+        gunicorn_base.BaseApplication, "run", lambda self: applications.append(self)
+    )
+    calls = []
+    run_gunicorn(
+        app,
+        host="127.0.0.1",
+        port=5000,
+        workers=3,
+        threads=4,
+        keepalive=7,
+        backlog=128,
+        timeout=30,
+        preload=True,
+        setup=lambda: calls.append("setup"),
+        post_fork=lambda: calls.append("post_fork"),
+    )
+    (application,) = applications
+    cfg = application.cfg
+    assert cfg.bind == ["127.0.0.1:5000"]
+    assert (cfg.workers, cfg.threads, cfg.keepalive, cfg.backlog, cfg.timeout) == (
+        3,
+        4,
+        7,
+        128,
+        30,
+    )
+    assert cfg.worker_class_str == "gthread"
+    assert cfg.preload_app is True
+
+    assert application.load() is app
+    cfg.post_worker_init(None)
+    assert calls == ["setup", "post_fork"]
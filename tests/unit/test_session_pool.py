@@ -0,0 +1,133 @@
+import time
+
+import httpx
+import pytest
+
+from app.pesu import PESUAcademy
+from app.session_pool import AnonymousSession, AnonymousSessionPool
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for condition"
+        time.sleep(0.01)
+
+
+def make_session() -> AnonymousSession:
+    return AnonymousSession(cookies=httpx.Cookies(), csrf_token="pooled-csrf-token")
+
+
+def test_pool_is_refilled_in_the_background():
+    pool = AnonymousSessionPool(make_session, size=3, refill_interval=0.01)
+    assert pool.acquire() is None
+    wait_for(lambda: pool.stats()["size"] == 3)
+    assert pool.acquire().csrf_token == "pooled-csrf-token"
+    stats = pool.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    pool.stop()
+
+
+def test_pool_is_warm_after_start():
+    pool = AnonymousSessionPool(make_session, size=2, refill_interval=0.01)
+    pool.start()
+    wait_for(lambda: pool.stats()["size"] == 2)
+    assert pool.acquire() is not None
+    assert pool.stats()["misses"] == 0
+    pool.stop()
+
+
+def test_pool_is_restarted_after_fork():
+    pool = AnonymousSessionPool(make_session, size=1, refill_interval=0.01)
+    pool.start()
+    wait_for(lambda: pool.stats()["size"] == 1)
+    inherited_thread = pool.thread
+    pool.after_fork()
+    assert pool.thread is not inherited_thread
+    wait_for(lambda: pool.stats()["size"] == 1)
+    pool.stop()
+    inherited_thread.join()
+
+
+def test_expired_sessions_are_discarded():
+    pool = AnonymousSessionPool(make_session, size=1, max_age=60.0)
+    pool.start = lambda: None
+    pool.sessions.append(
+        AnonymousSession(
+            cookies=httpx.Cookies(),
+            csrf_token="old-csrf-token",
+            created_at=time.monotonic() - 120.0,
+        )
+    )
+    assert pool.acquire() is None
+    stats = pool.stats()
+    assert stats["expired"] == 1
+    assert stats["misses"] == 1
+
+
+def upstream(requests: list, login_status: int = 200, rejected_text="Forbidden"):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.method, request.url.path))
+        if request.url.path.endswith("j_spring_security_check"):
+            if b"_csrf=pooled-csrf-token" in request.content:
+                return httpx.Response(login_status, text=rejected_text)
+            return httpx.Response(
+                200, text='<meta name="csrf-token" content="new-csrf-token">'
+            )
+        return httpx.Response(
+            200, text='<meta name="csrf-token" content="fresh-csrf-token">'
+        )
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def pesu():
+    pesu = PESUAcademy(session_pool_size=1)
+    pesu.session_pool.start = lambda: None
+    pesu.session_pool.sessions.append(make_session())
+    return pesu
+
+
+def test_authenticate_uses_pooled_session(pesu):
+    requests = []
+    pesu.transport.transport = upstream(requests)
+    result = pesu.authenticate("user", "pass")
+    assert result["status"] is True
+    assert requests == [("POST", "/Academy/j_spring_security_check")]
+    assert pesu.session_pool.stats()["hits"] == 1
+
+
+def test_authenticate_falls_back_when_pooled_token_is_stale(pesu):
+    requests = []
+    pesu.transport.transport = upstream(requests, login_status=403)
+    result = pesu.authenticate("user", "pass")
+    assert result["status"] is True
+    assert requests == [
+        ("POST", "/Academy/j_spring_security_check"),
+        ("GET", "/Academy/"),
+        ("POST", "/Academy/j_spring_security_check"),
+    ]
+    assert pesu.session_pool.stats()["stale"] == 1
+
+
+def test_authenticate_falls_back_when_pool_is_empty(pesu):
+    requests = []
+    pesu.session_pool.sessions.clear()
+    pesu.transport.transport = upstream(requests)
+    result = pesu.authenticate("user", "pass")
+    assert result["status"] is True
+    assert requests[0] == ("GET", "/Academy/")
+    assert pesu.session_pool.stats()["misses"] == 1
+
+
+def test_wrong_password_on_pooled_session_is_not_retried(pesu):
+    requests = []
+    pesu.transport.transport = upstream(
+        requests, rejected_text='<div class="login-form"></div>'
+    )
+    result = pesu.authenticate("user", "wrong")
+    assert result["status"] is False
+    assert requests == [("POST", "/Academy/j_spring_security_check")]
+    assert pesu.session_pool.stats()["stale"] == 0
@@ -0,0 +1,81 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.session_store import SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def closed():
+    return []
+
+
+@pytest.fixture
+def store(clock, closed):
+    return SessionStore(ttl=60.0, max_sessions=2, close=closed.append, clock=clock)
+
+
+def test_tokens_are_opaque_and_unique(store):
+    first = store.create("user", MagicMock())
+    second = store.create("user", MagicMock())
+    assert first != second
+    assert len(first) >= 32
+    assert "user" not in first
+
+
+def test_get_returns_the_session(store):
+    client = MagicMock()
+    token = store.create("user", client)
+    session = store.get(token)
+    assert session.username == "user"
+    assert session.client is client
+    assert store.get("unknown") is None
+    assert store.stats()["hits"] == 1
+    assert store.stats()["misses"] == 1
+
+
+def test_expired_sessions_are_closed(store, clock, closed):
+    client = MagicMock()
+    token = store.create("user", client)
+    clock.now += 60.0
+    assert store.get(token) is None
+    assert closed == [client]
+    assert store.stats()["expired"] == 1
+    assert store.stats()["size"] == 0
+
+
+def test_oldest_session_is_evicted_when_full(store, clock, closed):
+    clients = [MagicMock() for _ in range(3)]
+    tokens = []
+    for client in clients:
+        tokens.append(store.create("user", client))
+        clock.now += 1.0
+    assert closed == [clients[0]]
+    assert store.get(tokens[0]) is None
+    assert store.get(tokens[2]).client is clients[2]
+    assert store.stats()["evictions"] == 1
+
+
+def test_remove_and_clear_close_the_clients(store, closed):
+    first, second = MagicMock(), MagicMock()
+    token = store.create("user", first)
+    store.create("user", second)
+    store.remove(token)
+    store.remove(token)
+    assert closed == [first]
+    store.clear()
+    assert closed == [first, second]
+    assert store.stats()["size"] == 0
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import ANY, MagicMock
+
+import pytest
+
+import app.app as app_module
+from app.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for condition"
+        time.sleep(0.01)
+
+
+def test_concurrent_calls_with_same_key_are_coalesced():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait()
+        return {"status": True}
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(single_flight.do, "key", slow) for _ in range(5)]
+        try:
+            wait_for(lambda: single_flight.stats()["coalesced"] == 4)
+        finally:
+            release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result == {"status": True} for result in results)
+    assert len({id(result) for result in results}) == 5
+    assert single_flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+
+
+def test_different_keys_are_not_coalesced():
+    single_flight = SingleFlight()
+    assert single_flight.do("a", lambda: 1) == 1
+    assert single_flight.do("b", lambda: 2) == 2
+    assert single_flight.stats()["executed"] == 2
+
+
+def test_errors_are_shared_and_cleared():
+    single_flight = SingleFlight()
+
+    def fail():
+        raise ValueError("upstream failed")
+
+    with pytest.raises(ValueError, match="upstream failed"):
+        single_flight.do("key", fail)
+    assert single_flight.do("key", lambda: "ok") == "ok"
+
+
+def test_async_concurrent_calls_with_same_key_are_coalesced():
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"status": True}
+
+    async def run():
+        return await asyncio.gather(*(single_flight.do("key", slow) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert len({id(result) for result in results}) == 5
+    assert single_flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+
+
+def test_authenticate_user_coalesces_and_projects_per_caller(monkeypatch):
+    release = threading.Event()
+
+    def authenticate(
+        username,
+        password,
+        profile,
+        fields=None,
+        timer=None,
+        deadline=None,
+        keep_session=False,
+    ):
+        release.wait()
+        return {
+            "status": True,
+            "message": "Login successful.",
+            "profile": {"name": "Test User", "prn": "PES1201800001"},
+        }
+
+    mock = MagicMock(side_effect=authenticate)
+    single_flight = SingleFlight()
+    monkeypatch.setattr(app_module.pesu_academy, "authenticate", mock)
+    monkeypatch.setattr(app_module, "single_flight", single_flight)
+    monkeypatch.setattr(app_module, "authentication_cache", None)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        name = executor.submit(
+            app_module.authenticate_user, "user", "pass", True, ["name"]
+        )
+        prn = executor.submit(
+            app_module.authenticate_user, "user", "pass", True, ["prn"]
+        )
+        try:
+            wait_for(lambda: single_flight.stats()["coalesced"] == 1)
+        finally:
+            release.set()
+
+    assert name.result()["profile"] == {"name": "Test User"}
+    assert prn.result()["profile"] == {"prn": "PES1201800001"}
+    mock.assert_called_once_with(
+        "user",
+        "pass",
+        True,
+        [
+            "name",
+            "prn",
+            "srn",
+            "program",
+            "branch_short_code",
+            "branch",
+            "semester",
+            "section",
+            "campus_code",
+            "campus",
+        ],
+        timer=ANY,
+        deadline=None,
+        keep_session=False,
+    )
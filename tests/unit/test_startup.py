@@ -0,0 +1,25 @@
+import datetime
+import subprocess
+import sys
+
+from app.app import IST
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, app.app; "
+            "print(sorted({'gh_md_to_html', 'flasgger', 'pytz'} & set(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_ist_offset():
+    timestamp = datetime.datetime(2025, 1, 1, 12, 0, tzinfo=datetime.timezone.utc)
+    assert str(timestamp.astimezone(IST)) == "2025-01-01 17:30:00+05:30"
@@ -0,0 +1,233 @@
+import asyncio
+import gzip
+import secrets
+import zlib
+
+import httpx
+import pytest
+
+from app.pesu import AsyncSharedTransport, PESUAcademy, SharedTransport
+from app.profile_parser import ProfilePageParser
+from app.streaming import (
+    CSRF_MARKERS,
+    DRAIN_LIMIT,
+    LOGIN_MARKERS,
+    PAGE_MARKERS,
+    PageMarkers,
+    PageScanner,
+)
+from scripts.benchmark_profile_parser import stand_in_page
+from scripts.pesu_stand_in import HOME_PAGE, LOGIN_FAILURE_PAGE, PADDING_BLOCK
+from tests.unit.test_profile_parser import NESTED_PAGE
+
+PROFILE_MARKERS = PageMarkers.for_profile(details=True, contact=True)
+
+
+def settled_at(html: str, markers: PageMarkers) -> int:
+    """
+    Feed a page one byte at a time.
+    :return: The number of bytes after which the scanner settled, or -1 if it never did
+    """
+    scanner = PageScanner(markers)
+    data = html.encode()
+    for index in range(len(data)):
+        if scanner.feed(data[index : index + 1]):
+            return index + 1
+    return -1
+
+
+@pytest.mark.parametrize(
+    "details, contact", [(True, True), (True, False), (False, True)]
+)
+def test_prefix_extracts_like_the_whole_page(details, contact):
+    html = stand_in_page(5000)
+    end = settled_at(html, PageMarkers.for_profile(details, contact))
+    assert 0 < end < len(html) - 5000
+    parser = ProfilePageParser()
+    prefix = html.encode()[:end].decode()
+    assert parser.extract(prefix, details, contact) == parser.extract(
+        html, details, contact
+    )
+
+
+def test_nested_form_group_settles_once_the_outer_group_is_closed():
+    html = NESTED_PAGE.replace('<input id="updateMail" value="">', "")
+    end = settled_at(html, PageMarkers.for_profile(details=True, contact=False))
+    parser = ProfilePageParser()
+    assert parser.extract(html[:end], contact=False) == parser.extract(
+        html, contact=False
+    )
+
+
+def test_markers_in_comments_and_scripts_are_ignored():
+    html = (
+        '<!-- <meta name="csrf-token" content="commented"> -->'
+        '<script>var tag = \'<meta name="csrf-token" content="scripted">\';</script>'
+        '<meta name="csrf-token" content="real">'
+    )
+    assert settled_at(html, CSRF_MARKERS) == len(html)
+
+
+def test_csrf_token_and_login_form():
+    html = HOME_PAGE.format(csrf_token="token", padding=PADDING_BLOCK * 100)
+    meta_end = html.index('content="token">') + len('content="token">')
+    assert settled_at(html, CSRF_MARKERS) == meta_end
+
+    failure = LOGIN_FAILURE_PAGE.format(csrf_token="token", padding="")
+    assert 0 < settled_at(failure, LOGIN_MARKERS) < len(failure)
+    # A successful login has no marker that settles it, so the whole page is read
+    assert settled_at("<div class='dashboard'></div>", LOGIN_MARKERS) == -1
+
+
+class ChunkedStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """
+    Body served in fixed-size chunks, counting how many were read and whether it was closed.
+    """
+
+    def __init__(self, data: bytes, chunk_bytes: int = 1024):
+        self.chunks = [
+            data[start : start + chunk_bytes]
+            for start in range(0, len(data), chunk_bytes)
+        ]
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+    async def aclose(self):
+        self.closed = True
+
+
+def serve(html: str, streams: list, content_length: bool = True):
+    def handler(request: httpx.Request) -> httpx.Response:
+        data = html.encode()
+        stream = ChunkedStream(data)
+        streams.append(stream)
+        headers = {"Content-Length": str(len(data))} if content_length else {}
+        return httpx.Response(200, headers=headers, stream=stream)
+
+    return handler
+
+
+def test_transport_stops_reading_once_the_markers_are_found():
+    html = stand_in_page(DRAIN_LIMIT * 4)
+    streams = []
+    transport = SharedTransport(httpx.MockTransport(serve(html, streams)))
+    with httpx.Client(transport=transport) as client:
+        response = client.get(
+            "https://pesu.test/", extensions={PAGE_MARKERS: PROFILE_MARKERS}
+        )
+        full = client.get("https://pesu.test/")
+
+    assert len(response.content) == 2048
+    assert streams[0].read == 2
+    assert streams[0].closed
+    assert full.content == html.encode()
+    pesu_academy = PESUAcademy()
+    profile = pesu_academy.parse_profile_response(response, "user")
+    assert profile == pesu_academy.parse_profile_response(full, "user")
+    pesu_academy.close()
+
+
+def test_transport_drains_small_remainders_for_reuse():
+    html = stand_in_page(DRAIN_LIMIT // 2)
+    streams = []
+    transport = SharedTransport(httpx.MockTransport(serve(html, streams)))
+    with httpx.Client(transport=transport) as client:
+        response = client.get(
+            "https://pesu.test/", extensions={PAGE_MARKERS: PROFILE_MARKERS}
+        )
+    assert len(response.content) == 2048
+    assert streams[0].read == len(streams[0].chunks)
+
+
+def test_transport_does_not_drain_bodies_of_unknown_length():
+    html = stand_in_page(DRAIN_LIMIT // 2)
+    streams = []
+    transport = SharedTransport(
+        httpx.MockTransport(serve(html, streams, content_length=False))
+    )
+    with httpx.Client(transport=transport) as client:
+        client.get("https://pesu.test/", extensions={PAGE_MARKERS: PROFILE_MARKERS})
+    assert streams[0].read == 2
+
+
+def test_async_transport_stops_reading_once_the_markers_are_found():
+    html = stand_in_page(DRAIN_LIMIT * 4)
+    streams = []
+
+    async def fetch() -> httpx.Response:
+        transport = AsyncSharedTransport(httpx.MockTransport(serve(html, streams)))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get(
+                "https://pesu.test/", extensions={PAGE_MARKERS: PROFILE_MARKERS}
+            )
+
+    response = asyncio.run(fetch())
+    assert len(response.content) == 2048
+    assert streams[0].read == 2
+    assert streams[0].closed
+
+
+@pytest.mark.parametrize(
+    "encoding, compress",
+    [
+        ("gzip", gzip.compress),
+        ("deflate", zlib.compress),
+        ("deflate", lambda data: zlib.compress(data, wbits=-zlib.MAX_WBITS)),
+    ],
+)
+def test_transport_scans_compressed_pages(encoding, compress):
+    # Random filler, so that the compressed page is still many chunks long
+    html = stand_in_page(0) + f"<!-- {secrets.token_hex(DRAIN_LIMIT * 2)} -->"
+    data = compress(html.encode())
+    streams = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        stream = ChunkedStream(data)
+        streams.append(stream)
+        headers = {"Content-Encoding": encoding, "Content-Length": str(len(data))}
+        return httpx.Response(200, headers=headers, stream=stream)
+
+    transport = SharedTransport(httpx.MockTransport(handler))
+    with httpx.Client(transport=transport) as client:
+        response = client.get(
+            "https://pesu.test/", extensions={PAGE_MARKERS: PROFILE_MARKERS}
+        )
+        full = client.get("https://pesu.test/")
+
+    assert streams[0].read < len(streams[0].chunks) // 10
+    assert streams[0].closed
+    assert full.text == html
+    pesu_academy = PESUAcademy()
+    profile = pesu_academy.parse_profile_response(response, "user")
+    assert profile == pesu_academy.parse_profile_response(full, "user")
+    pesu_academy.close()
+
+
+def test_transport_reads_other_encodings_whole():
+    html = stand_in_page(DRAIN_LIMIT * 4)
+    streams = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        stream = ChunkedStream(html.encode())
+        streams.append(stream)
+        # httpx passes encodings it does not know through as they are
+        headers = {"Content-Encoding": "compress"}
+        return httpx.Response(200, headers=headers, stream=stream)
+
+    transport = SharedTransport(httpx.MockTransport(handler))
+    with httpx.Client(transport=transport) as client:
+        client.get("https://pesu.test/", extensions={PAGE_MARKERS: PROFILE_MARKERS})
+    assert streams[0].read == len(streams[0].chunks)
@@ -0,0 +1,90 @@
+import gzip
+import json
+
+import pytest
+from flasgger import Swagger
+from flask import Flask
+
+import app.app as app_module
+from app.app import setup_swagger
+
+
+@pytest.fixture
+def docs_app():
+    flask_app = Flask(__name__)
+
+    @flask_app.route("/ping")
+    def ping():
+        """
+        Check that the API is up.
+        ---
+        responses:
+          200:
+            description: The API is up
+        """
+        return "pong"
+
+    setup_swagger(flask_app)
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+def test_spec_is_generated_once(docs_app, monkeypatch):
+    client = docs_app.test_client()
+    response = client.get("/v1.json")
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert response.headers["Cache-Control"] == app_module.DOCS_CACHE_CONTROL
+    spec = response.get_json()
+    assert spec["info"]["title"] == "PESU Auth API"
+    assert "/ping" in spec["paths"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The spec was regenerated")
+
+    monkeypatch.setattr(Swagger, "get_apispecs", fail)
+    assert client.get("/v1.json").get_json() == spec
+
+
+def test_spec_conditional_get_and_compression(docs_app):
+    client = docs_app.test_client()
+    response = client.get("/v1.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "/ping" in json.loads(gzip.decompress(response.get_data()))["paths"]
+
+    response = client.get(
+        "/v1.json",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == 304
+
+
+def test_static_assets_are_served_from_memory(docs_app):
+    client = docs_app.test_client()
+    response = client.get(
+        "/flasgger_static/swagger-ui.css", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/css"
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Cache-Control"] == app_module.DOCS_STATIC_CACHE_CONTROL
+    assert b".swagger-ui" in gzip.decompress(response.get_data())
+
+    etag = response.headers["ETag"]
+    response = client.get(
+        "/flasgger_static/swagger-ui.css",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize("filename", ["missing.js", "../__init__.py"])
+def test_static_assets_outside_the_folder_are_not_found(docs_app, filename):
+    response = docs_app.test_client().get(f"/flasgger_static/{filename}")
+    assert response.status_code == 404
+
+
+def test_swagger_ui_is_mounted(docs_app):
+    response = docs_app.test_client().get("/")
+    assert response.status_code == 200
+    assert b"swagger-ui" in response.get_data()
@@ -50,3 +50,8 @@ def test_fields_with_invalid_field_name():
     with pytest.raises(AssertionError) as e:
         validate_input("user", "pass", True, ["not_a_field"])
     assert "Invalid field" in str(e.value)
+
+
+def test_bypass_cache_not_boolean():
+    with pytest.raises(AssertionError, match="Bypass cache should be a boolean."):
+        validate_input("user", "pass", False, None, "yes")